@@ -1,19 +1,20 @@
 # backend/app/api/endpoints/ai_analysis_endpoints.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.crud import ai_analysis_crud as crud
 from app.schemas import ai_analysis_schema as schemas
 from app.database import get_db
+from app.crud.pagination import NEXT_CURSOR_HEADER
+from app.services.response_cache import cached_response, serialize_model, serialize_models
 
 router = APIRouter(prefix="/ai-analysis", tags=["ai-analysis"])
 
 @router.get("/article/{article_id}", response_model=schemas.AIAnalysisResponse)
-async def get_ai_analysis(article_id: int, db: Session = Depends(get_db)):
+async def get_ai_analysis(article_id: int, request: Request, db: Session = Depends(get_db)):
     """Lấy AI analysis của bài báo"""
-    try:
-        # Sử dụng function đã sửa để trả về parsed data
+    def build():
         ai_analysis = crud.get_ai_analysis_by_article_id(db, article_id)
         
         if not ai_analysis:
@@ -22,8 +23,10 @@ async def get_ai_analysis(article_id: int, db: Session = Depends(get_db)):
                 detail=f"AI analysis not found for article {article_id}"
             )
         
-        return ai_analysis  # Đã được parse trong CRUD
-        
+        return serialize_model(schemas.AIAnalysisResponse, ai_analysis), {}
+
+    try:
+        return cached_response(request, db, ("ai_analysis",), build)
     except HTTPException:
         raise
     except Exception as e:
@@ -32,12 +35,39 @@ async def get_ai_analysis(article_id: int, db: Session = Depends(get_db)):
             detail=f"Error fetching AI analysis: {str(e)}"
         )
 
+@router.get("/articles", response_model=List[schemas.ArticleWithAIResponse])
+async def get_articles_with_ai_analysis(
+    request: Request, limit: int = 20, cursor: Optional[str] = None, db: Session = Depends(get_db)
+):
+    """Lấy articles đã có AI analysis, mới nhất trước (trang sau: cursor = header X-Next-Cursor)"""
+    return _paged(request, crud.get_articles_with_ai_analysis, db, limit=limit, cursor=cursor)
+
 @router.get("/category/{category}", response_model=List[schemas.ArticleWithAIResponse])
-async def get_articles_by_category(category: str, db: Session = Depends(get_db)):
-    """Lấy articles theo category"""
-    return crud.get_articles_by_category(db, category)
+async def get_articles_by_category(
+    category: str, request: Request, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)
+):
+    """Lấy articles theo category (trang sau: cursor = header X-Next-Cursor)"""
+    return _paged(request, crud.get_articles_by_category, db, category, limit=limit, cursor=cursor)
 
 @router.get("/high-impact", response_model=List[schemas.ArticleWithAIResponse])
-async def get_high_impact_articles(min_impact: float = 0.7, db: Session = Depends(get_db)):
-    """Lấy articles có impact cao"""
-    return crud.get_high_impact_articles(db, min_impact)
+async def get_high_impact_articles(
+    request: Request, min_impact: float = 0.7, limit: int = 100, cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Lấy articles có impact cao (trang sau: cursor = header X-Next-Cursor)"""
+    return _paged(request, crud.get_high_impact_articles, db, min_impact, limit=limit, cursor=cursor)
+
+def _paged(request: Request, crud_function, db: Session, *args, **kwargs):
+    """
+    Gọi hàm crud phân trang bằng cursor, gắn cursor trang sau vào header.
+    Response được cache theo query cho tới khi articles/ai_analysis có thay đổi.
+    """
+    def build():
+        articles, next_cursor = crud_function(db, *args, **kwargs)
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return serialize_models(schemas.ArticleWithAIResponse, articles), headers
+
+    try:
+        return cached_response(request, db, ("articles", "ai_analysis"), build)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.crud import article_crud as crud
+from app.crud import search_crud
+from app.crud import article_counter_crud
 from app.schemas import article_schema as schemas
 from app.database import get_db
+from app.crud.pagination import NEXT_CURSOR_HEADER
+from app.services.response_cache import cached_response, serialize_models
 
 # Tạo router
 router = APIRouter(prefix="/articles", tags=["articles"])
@@ -24,28 +28,108 @@ async def create_new_article(
             detail=f"Lỗi khi tạo article: {str(e)}"
         )
 
+@router.post("/bulk", response_model=schemas.ArticleBulkResult)
+async def create_articles_bulk(
+    payload: schemas.ArticleBulkCreate,
+    db: Session = Depends(get_db)
+):
+    """Tạo nhiều article trong một request, trả về trạng thái created/duplicate của từng bài"""
+    try:
+        items = crud.create_articles_bulk(db=db, articles=payload.articles)
+        created_count = len([item for item in items if item["status"] == "created"])
+        return {
+            "created_count": created_count,
+            "duplicate_count": len(items) - created_count,
+            "items": items
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Lỗi khi tạo articles: {str(e)}"
+        )
+
 @router.get("", response_model=List[schemas.ArticleInDB])
 async def read_articles(
+    request: Request,
     skip: int = 0, 
     limit: int = 20, 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Lấy danh sách articles"""
+    """
+    Lấy danh sách articles, mới nhất trước. Trang sau: gửi lại giá trị header X-Next-Cursor
+    trong tham số cursor (không có header = đã hết). skip chỉ để tương thích, trang sâu sẽ chậm.
+    Response được cache cho tới khi bảng articles có thay đổi.
+    """
+    def build():
+        if skip and not cursor:
+            return serialize_models(schemas.ArticleInDB, crud.get_articles(db=db, skip=skip, limit=limit)), {}
+        articles, next_cursor = crud.get_articles_page(db=db, limit=limit, cursor=cursor)
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return serialize_models(schemas.ArticleInDB, articles), headers
+
     try:
-        articles = crud.get_articles(db=db, skip=skip, limit=limit)
-        return articles
+        return cached_response(request, db, ("articles",), build)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Lỗi khi lấy danh sách articles: {str(e)}"
         )
 
+@router.get("/search", response_model=List[schemas.ArticleSearchResult])
+async def search_articles(
+    response: Response,
+    q: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort: str = "relevance",
+    db: Session = Depends(get_db)
+):
+    """
+    Tìm bài theo tiêu đề, đoạn trích, tóm tắt và từ khóa AI (không phân biệt dấu tiếng Việt).
+    Từ cuối được tìm theo tiền tố, VD: "gia va" khớp "giá vàng". sort: relevance | newest.
+    Trang sau: gửi lại giá trị header X-Next-Cursor trong tham số cursor.
+    """
+    try:
+        results, next_cursor = search_crud.search_articles(db=db, query=q, limit=limit, cursor=cursor, sort=sort)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [
+        {**schemas.ArticleInDB.model_validate(article).model_dump(), "rank": rank}
+        for article, rank in results
+    ]
+
 @router.get("/count")
-async def get_articles_count(db: Session = Depends(get_db)):
-    """Đếm tổng số articles"""
+async def get_articles_count(
+    by: Optional[str] = None,
+    days: int = 30,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """
+    Đếm tổng số articles (đọc bộ đếm, không quét bảng).
+    by=source | category | day: kèm số bài theo nguồn / category AI / ngày (days ngày gần nhất).
+    """
     try:
-        count = crud.get_articles_count(db=db)
-        return {"total_articles": count}
+        result = {"total_articles": crud.get_articles_count(db=db)}
+        if by:
+            result[f"by_{by}"] = article_counter_crud.get_count_breakdown(db=db, scope=by, limit=limit, days=days)
+        return result
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
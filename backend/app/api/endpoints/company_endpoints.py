@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 
@@ -6,6 +6,7 @@ from app.crud import company_crud as crud
 from app.schemas import company_schema as schemas
 from app.database import get_db
 from app.services.financial_api_service import financial_api
+from app.services.response_cache import cached_response, serialize_json, serialize_model, serialize_models
 
 router = APIRouter(prefix="/companies", tags=["companies"])
 
@@ -36,15 +37,19 @@ async def create_company(
 
 @router.get("", response_model=List[schemas.CompanyInDB])
 async def list_companies(
+    request: Request,
     skip: int = 0, 
     limit: int = 50, 
     active_only: bool = True, 
     db: Session = Depends(get_db)
 ):
     """List all companies with optional filtering"""
-    try:
+    def build():
         companies = crud.get_companies(db=db, skip=skip, limit=limit, active_only=active_only)
-        return companies
+        return serialize_models(schemas.CompanyInDB, companies), {}
+
+    try:
+        return cached_response(request, db, ("companies",), build)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -52,16 +57,19 @@ async def list_companies(
         )
 
 @router.get("/{symbol}", response_model=schemas.CompanyInDB)
-async def get_company(symbol: str, db: Session = Depends(get_db)):
+async def get_company(symbol: str, request: Request, db: Session = Depends(get_db)):
     """Get specific company by symbol"""
-    try:
+    def build():
         company = crud.get_company_by_symbol(db, symbol)
         if not company:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Company with symbol {symbol} not found"
             )
-        return company
+        return serialize_model(schemas.CompanyInDB, company), {}
+
+    try:
+        return cached_response(request, db, ("companies",), build)
     except HTTPException:
         raise
     except Exception as e:
@@ -115,11 +123,12 @@ async def delete_company(symbol: str, db: Session = Depends(get_db)):
 @router.get("/{symbol}/metrics", response_model=List[schemas.CompanyMetricsInDB])
 async def get_company_metrics_history(
     symbol: str, 
+    request: Request,
     limit: int = 10, 
     db: Session = Depends(get_db)
 ):
     """Get metrics history for a company"""
-    try:
+    def build():
         # Check if company exists
         company = crud.get_company_by_symbol(db, symbol)
         if not company:
@@ -129,7 +138,10 @@ async def get_company_metrics_history(
             )
         
         metrics_history = crud.get_metrics_history(db, symbol, limit)
-        return metrics_history
+        return serialize_models(schemas.CompanyMetricsInDB, metrics_history), {}
+
+    try:
+        return cached_response(request, db, ("companies", "company_metrics"), build)
     except HTTPException:
         raise
     except Exception as e:
@@ -139,9 +151,9 @@ async def get_company_metrics_history(
         )
 
 @router.get("/{symbol}/metrics/latest", response_model=schemas.CompanyMetricsInDB)
-async def get_latest_metrics(symbol: str, db: Session = Depends(get_db)):
+async def get_latest_metrics(symbol: str, request: Request, db: Session = Depends(get_db)):
     """Get most recent metrics for a company"""
-    try:
+    def build():
         # Check if company exists
         company = crud.get_company_by_symbol(db, symbol)
         if not company:
@@ -157,7 +169,10 @@ async def get_latest_metrics(symbol: str, db: Session = Depends(get_db)):
                 detail=f"No metrics found for company {symbol}"
             )
         
-        return latest_metrics
+        return serialize_model(schemas.CompanyMetricsInDB, latest_metrics), {}
+
+    try:
+        return cached_response(request, db, ("companies", "company_metrics"), build)
     except HTTPException:
         raise
     except Exception as e:
@@ -211,44 +226,49 @@ async def fetch_and_save_metrics(symbol: str, db: Session = Depends(get_db)):
         )
 
 @router.get("/overview/dashboard")
-async def get_dashboard_overview(db: Session = Depends(get_db)):
-    """Get overview dashboard data"""
+async def get_dashboard_overview(request: Request, db: Session = Depends(get_db)):
+    """Get overview dashboard data (cached until companies/metrics change or API usage moves)"""
     try:
-        companies_with_metrics = crud.get_companies_with_latest_metrics(db)
-        
-        total_companies = len(companies_with_metrics)
-        companies_with_data = len([c for c in companies_with_metrics if c['latest_metrics']])
-        
-        dashboard_data = {
-            "total_companies": total_companies,
-            "companies_with_data": companies_with_data,
-            "companies_without_data": total_companies - companies_with_data,
-            "api_usage_today": financial_api.request_count,
-            "api_limit": financial_api.daily_limit,
-            "companies": []
-        }
-        
-        # Add company summary data
-        for item in companies_with_metrics:
-            company = item['company']
-            metrics = item['latest_metrics']
-            
-            company_summary = {
-                "symbol": company.symbol,
-                "company_name": company.company_name,
-                "sector": company.sector,
-                "is_active": company.is_active,
-                "last_updated": metrics.recorded_at.isoformat() if metrics else None,
-                "pe_ratio": metrics.pe_ratio if metrics else None,
-                "market_cap": metrics.market_cap if metrics else None
-            }
-            
-            dashboard_data["companies"].append(company_summary)
-        
-        return dashboard_data
-        
+        return cached_response(
+            request, db, ("companies", "company_metrics"), lambda: (serialize_json(_build_dashboard(db)), {}),
+            extra_version=(financial_api.request_count, financial_api.daily_limit)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching dashboard data: {str(e)}"
         )
+
+def _build_dashboard(db: Session) -> Dict[str, Any]:
+    companies_with_metrics = crud.get_companies_with_latest_metrics(db)
+    
+    total_companies = len(companies_with_metrics)
+    companies_with_data = len([c for c in companies_with_metrics if c['latest_metrics']])
+    
+    dashboard_data = {
+        "total_companies": total_companies,
+        "companies_with_data": companies_with_data,
+        "companies_without_data": total_companies - companies_with_data,
+        "api_usage_today": financial_api.request_count,
+        "api_limit": financial_api.daily_limit,
+        "companies": []
+    }
+    
+    # Add company summary data
+    for item in companies_with_metrics:
+        company = item['company']
+        metrics = item['latest_metrics']
+        
+        company_summary = {
+            "symbol": company.symbol,
+            "company_name": company.company_name,
+            "sector": company.sector,
+            "is_active": company.is_active,
+            "last_updated": metrics.recorded_at.isoformat() if metrics else None,
+            "pe_ratio": metrics.pe_ratio if metrics else None,
+            "market_cap": metrics.market_cap if metrics else None
+        }
+        
+        dashboard_data["companies"].append(company_summary)
+    
+    return dashboard_data
@@ -0,0 +1,67 @@
+import logging
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from typing import Iterator, Optional
+from datetime import datetime, timezone
+
+from app.crud import export_crud as crud
+from app.database import SessionLocal
+from app.schemas.article_schema import ArticleInDB
+from app.schemas.ai_analysis_schema import AIAnalysisResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def _ndjson_lines(since: Optional[datetime], until: Optional[datetime]) -> Iterator[bytes]:
+    """
+    Mỗi dòng một article kèm "ai_analysis" (null nếu chưa phân tích), gửi từng lô.
+    Dùng session riêng vì session của request đóng trước khi stream xong.
+    """
+    with SessionLocal() as db:
+        chunk = []
+        count = 0
+        try:
+            for article, analysis in crud.iter_articles_with_analysis(db, since=since, until=until):
+                record = ArticleInDB.model_validate(article).model_dump(mode="json")
+                record["ai_analysis"] = (
+                    AIAnalysisResponse.model_validate(analysis).model_dump(mode="json") if analysis else None
+                )
+                chunk.append(to_json(record))
+                count += 1
+                if len(chunk) >= crud.EXPORT_BATCH_SIZE:
+                    yield b"\n".join(chunk) + b"\n"
+                    chunk = []
+            if chunk:
+                yield b"\n".join(chunk) + b"\n"
+        except Exception as e:
+            # Header 200 đã gửi đi, chỉ có thể dừng stream; client thấy dòng cuối bị thiếu
+            logger.error(f"❌ Export NDJSON dừng sau {count} bài: {e}")
+            raise
+
+def _to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """created_at lưu dạng UTC không có múi giờ"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+@router.get("/articles.ndjson")
+def export_articles_ndjson(since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    Xuất toàn bộ articles kèm AI analysis dạng NDJSON (stream, bộ nhớ không đổi theo số bài),
+    theo created_at tăng dần. since/until (ISO 8601, UTC) lọc since <= created_at < until.
+    """
+    since, until = _to_utc_naive(since), _to_utc_naive(until)
+    if since and until and since >= until:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="since phải nhỏ hơn until"
+        )
+    return StreamingResponse(
+        _ndjson_lines(since, until),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="articles.ndjson"'}
+    )
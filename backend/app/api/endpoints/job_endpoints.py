@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.crud import job_crud as crud
+from app.crud import article_state_crud
+from app.schemas import job_schema as schemas
+from app.database import get_db
+from app.services.job_queue import job_worker_pool
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/stats")
+async def get_job_stats(db: Session = Depends(get_db)):
+    """Số job trong hàng đợi theo loại và trạng thái, số article theo trạng thái xử lý"""
+    return {
+        "workers": job_worker_pool.num_workers,
+        "jobs": crud.get_job_stats(db=db),
+        "articles": article_state_crud.get_article_state_counts(db=db)
+    }
+
+@router.get("/failed", response_model=List[schemas.JobInDB])
+async def get_failed_jobs(limit: int = 50, db: Session = Depends(get_db)):
+    """Các job đã hết lượt thử"""
+    return crud.get_failed_jobs(db=db, limit=limit)
+
+@router.post("/{job_id}/retry", response_model=schemas.JobInDB)
+async def retry_job(job_id: int, db: Session = Depends(get_db)):
+    """Đưa job failed về lại hàng đợi"""
+    job = crud.retry_job(db=db, job_id=job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy job failed"
+        )
+    job_worker_pool.wake()
+    return job
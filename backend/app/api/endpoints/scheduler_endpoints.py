@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException, status
+
+from app.services.pipeline_scheduler import pipeline_scheduler
+from app.services.leader_election import scheduler_leader
+
+router = APIRouter(prefix="/scheduler", tags=["scheduler"])
+
+@router.get("/status")
+async def get_scheduler_status():
+    """
+    Trạng thái các pipeline: đang chạy, số lần chạy/lỗi/bỏ qua, thời gian chạy, lần chạy kế tiếp.
+    Chỉ process leader chạy scheduler; request vào process khác thấy running=False.
+    """
+    return {
+        **pipeline_scheduler.status(),
+        "leader": scheduler_leader.status()
+    }
+
+@router.post("/jobs/{name}/run", status_code=status.HTTP_202_ACCEPTED)
+async def run_pipeline_now(name: str):
+    """Chạy một pipeline ngay, không chờ tới lịch (chỉ trên process leader)"""
+    if not scheduler_leader.is_leader:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Process này không chạy scheduler (không phải leader)"
+        )
+    if name not in pipeline_scheduler.jobs:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy pipeline"
+        )
+    if not pipeline_scheduler.trigger(name):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Pipeline đang chạy"
+        )
+    return {"name": name, "status": "started"}
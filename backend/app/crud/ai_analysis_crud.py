@@ -1,9 +1,10 @@
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from app.models import ai_analysis_model as models
 from app.schemas import ai_analysis_schema as schemas
 from app.models.article_model import Article  
 from sqlalchemy.orm import Session, contains_eager
+from app.crud.pagination import paginate_articles
 
 def create_ai_analysis(db: Session, analysis: schemas.AIAnalysisCreate) -> models.ArticleAIAnalysis:
     """Tạo AI analysis mới"""
@@ -19,31 +20,39 @@ def get_ai_analysis_by_article_id(db: Session, article_id: int) -> Optional[mode
         models.ArticleAIAnalysis.article_id == article_id
     ).first()
 
-def get_articles_with_ai_analysis(db: Session, skip: int = 0, limit: int = 20) -> List:
-    """Lấy articles kèm AI analysis"""
-    return db.query(Article).join(
-        models.ArticleAIAnalysis, 
-        Article.id == models.ArticleAIAnalysis.article_id
-    ).offset(skip).limit(limit).all()
+def get_articles_with_ai_analysis(db: Session, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Article], Optional[str]]:
+    """Lấy articles kèm AI analysis, mới nhất trước; trả về (articles, cursor trang sau)"""
+    query = db.query(Article).join(
+        Article.ai_analysis
+    ).options(
+        contains_eager(Article.ai_analysis)
+    )
+    return paginate_articles(query, limit, cursor)
 
-def get_articles_by_category(db: Session, category: str) -> List[Article]:
-    """Lấy articles theo category AI và tải kèm analysis"""
-    return db.query(Article).join(
+def get_articles_by_category(
+    db: Session, category: str, limit: int = 100, cursor: Optional[str] = None
+) -> Tuple[List[Article], Optional[str]]:
+    """Lấy articles theo category AI và tải kèm analysis; trả về (articles, cursor trang sau)"""
+    query = db.query(Article).join(
         Article.ai_analysis
     ).options(
         # ✅ SỬA: Tải kèm ai_analysis để có trong response
         contains_eager(Article.ai_analysis) 
     ).filter(
         models.ArticleAIAnalysis.category == category
-    ).all()
+    )
+    return paginate_articles(query, limit, cursor)
 
-def get_high_impact_articles(db: Session, min_impact: float = 0.7) -> List[Article]:
-    """Lấy articles có impact cao và tải kèm analysis"""
-    return db.query(Article).join(
+def get_high_impact_articles(
+    db: Session, min_impact: float = 0.7, limit: int = 100, cursor: Optional[str] = None
+) -> Tuple[List[Article], Optional[str]]:
+    """Lấy articles có impact cao và tải kèm analysis; trả về (articles, cursor trang sau)"""
+    query = db.query(Article).join(
         Article.ai_analysis
     ).options(
         # ✅ SỬA: Tải kèm ai_analysis để có trong response
         contains_eager(Article.ai_analysis)
     ).filter(
         models.ArticleAIAnalysis.impact_score >= min_impact
-    ).all()
\ No newline at end of file
+    )
+    return paginate_articles(query, limit, cursor)
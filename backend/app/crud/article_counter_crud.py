@@ -0,0 +1,35 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Dict, Optional
+from datetime import datetime, timedelta
+
+from app.models.article_counter_model import ArticleCounter
+
+# Các kiểu thống kê chi tiết (scope trong bảng article_counters)
+BREAKDOWN_SCOPES = ("source", "category", "day")
+
+def get_total_count(db: Session) -> int:
+    """Tổng số article: đọc một dòng bộ đếm thay vì COUNT(*) trên bảng articles"""
+    count = db.execute(
+        select(ArticleCounter.count).where(ArticleCounter.scope == "total", ArticleCounter.key == "")
+    ).scalar()
+    return count or 0
+
+def get_count_breakdown(db: Session, scope: str, limit: int = 100, days: Optional[int] = None) -> Dict[str, int]:
+    """
+    Số article theo nguồn / category AI / ngày (UTC).
+    Theo ngày: N ngày gần nhất, mới trước; còn lại: nhiều bài trước.
+    """
+    if scope not in BREAKDOWN_SCOPES:
+        raise ValueError(f"Kiểu thống kê phải là một trong {BREAKDOWN_SCOPES}")
+    query = select(ArticleCounter.key, ArticleCounter.count).where(
+        ArticleCounter.scope == scope, ArticleCounter.count > 0
+    )
+    if scope == "day":
+        if days:
+            since = (datetime.utcnow() - timedelta(days=days - 1)).date().isoformat()
+            query = query.where(ArticleCounter.key >= since)
+        query = query.order_by(ArticleCounter.key.desc())
+    else:
+        query = query.order_by(ArticleCounter.count.desc(), ArticleCounter.key)
+    return {key: count for key, count in db.execute(query.limit(limit)).all()}
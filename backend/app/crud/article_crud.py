@@ -1,16 +1,32 @@
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
 import hashlib
 import json
+import os
 
 from app.models import article_model as models
 from app.schemas import article_schema as schemas
 from app.models import ai_analysis_model
 from app.crud import watchlist_crud
 from app.crud import ai_analysis_crud  # ← Thêm import
+from app.crud import job_crud
+from app.crud import article_state_crud
+from app.crud import article_counter_crud
+from app.crud.pagination import paginate_articles
 from app.schemas import ai_analysis_schema  # ← Thêm import
 from app.services import notification_service
 from app.services import gemini_service
+from app.services.job_queue import STAGE_JOB_TYPES, job_worker_pool
+from app.services.dedup_cache import article_dedup_cache
+from app.services.near_duplicate import SimHashIndex, compute_simhash, near_duplicate_index
+from app.services.article_body_fetcher import build_analysis_content, compress_body, decompress_body
+
+# Article không đổi trạng thái quá lâu (và không còn job) thì được xếp hàng lại
+STALLED_ARTICLE_MINUTES = float(os.getenv("STALLED_ARTICLE_MINUTES", "30"))
 
 def get_article_by_url(db: Session, url: str) -> Optional[models.Article]:
     """Lấy article theo URL"""
@@ -20,112 +36,425 @@ def get_article_by_content_hash(db: Session, content_hash: str) -> Optional[mode
     """Lấy article theo content hash"""
     return db.query(models.Article).filter(models.Article.content_hash == content_hash).first()
 
+def get_article_body(db_article: models.Article) -> Optional[str]:
+    """Nội dung đầy đủ của article (giải nén), None nếu chưa tải"""
+    return decompress_body(db_article.body_compressed)
+
+def compute_content_hash(title: Optional[str], summary: Optional[str]) -> str:
+    """Hash nội dung dùng để phát hiện bài trùng khác URL"""
+    content_to_hash = (title or "") + (summary or "")
+    return hashlib.md5(content_to_hash.encode('utf-8')).hexdigest()
+
 def create_article(db: Session, article: schemas.ArticleCreate) -> models.Article:
     """Tạo article mới hoặc trả về article đã tồn tại"""
     
     # Tính content hash
-    content_to_hash = (article.title or "") + (article.summary or "")
-    content_hash = hashlib.md5(content_to_hash.encode('utf-8')).hexdigest()
+    content_hash = compute_content_hash(article.title, article.summary)
     
-    # Kiểm tra trùng lặp theo URL
-    existing_article_by_url = get_article_by_url(db, url=article.url)
-    if existing_article_by_url:
-        print(f"📄 Article đã tồn tại (URL): {article.title[:50]}...")
-        return existing_article_by_url
+    # Kiểm tra trùng bằng cache trong bộ nhớ trước, chỉ hỏi DB khi cache không kết luận được
+    article_dedup_cache.ensure_warm(db)
+    cached_reason, cached_id = article_dedup_cache.lookup(article.url, content_hash)
+    if cached_id is not None:
+        existing_article = db.get(models.Article, cached_id)
+        if existing_article:
+            label = "URL" if cached_reason == "url" else "Content"
+            print(f"📄 Article đã tồn tại ({label}): {article.title[:50]}...")
+            return existing_article
+        cached_reason = None
     
-    # Kiểm tra trùng lặp theo content hash
-    existing_article_by_hash = get_article_by_content_hash(db, content_hash=content_hash)
-    if existing_article_by_hash:
-        print(f"📄 Article đã tồn tại (Content): {article.title[:50]}...")
-        return existing_article_by_hash
+    if cached_reason != "new":
+        # Kiểm tra trùng lặp theo URL
+        existing_article_by_url = get_article_by_url(db, url=article.url)
+        if existing_article_by_url:
+            print(f"📄 Article đã tồn tại (URL): {article.title[:50]}...")
+            article_dedup_cache.add(existing_article_by_url.url, existing_article_by_url.content_hash, existing_article_by_url.id)
+            return existing_article_by_url
+        
+        # Kiểm tra trùng lặp theo content hash
+        existing_article_by_hash = get_article_by_content_hash(db, content_hash=content_hash)
+        if existing_article_by_hash:
+            print(f"📄 Article đã tồn tại (Content): {article.title[:50]}...")
+            article_dedup_cache.add(existing_article_by_hash.url, existing_article_by_hash.content_hash, existing_article_by_hash.id)
+            return existing_article_by_hash
     
     # Tạo article mới
-    article_dict = article.dict()
+    article_dict = article.dict(exclude={'body'})
     article_dict['content_hash'] = content_hash
+    article_dict['body_compressed'] = compress_body(article.body)
+    article_dict['simhash'] = compute_simhash(article.title, article.summary)
+    
+    # Tin đăng lại/sửa tiêu đề: lưu và liên kết với bài gốc, không phân tích lại
+    near_duplicate_index.ensure_warm(db)
+    match = near_duplicate_index.find(article_dict['simhash'])
+    if match:
+        article_dict['duplicate_of_id'] = match[0]
+        article_dict['processing_state'] = article_state_crud.STATE_DUPLICATE
     
     db_article = models.Article(**article_dict)
     db.add(db_article)
+    try:
+        db.flush()
+    except IntegrityError:
+        # Process/request khác vừa chèn cùng URL (cache của process này chưa biết)
+        db.rollback()
+        existing_article_by_url = get_article_by_url(db, url=article.url)
+        if existing_article_by_url is None:
+            raise
+        print(f"📄 Article đã tồn tại (URL): {article.title[:50]}...")
+        article_dedup_cache.add(existing_article_by_url.url, existing_article_by_url.content_hash, existing_article_by_url.id)
+        return existing_article_by_url
+    if match:
+        db.commit()
+        db.refresh(db_article)
+        article_dedup_cache.add(db_article.url, db_article.content_hash, db_article.id)
+        print(f"🔗 Tạo article mới: {article.title[:50]}... (gần giống article {match[0]}, lệch {match[1]} bit, không phân tích lại)")
+        return db_article
+    
+    # Job phân tích AI được ghi cùng transaction với article: không có article nào bị bỏ sót
+    enqueue_stage_jobs(db, "analyze", [db_article.id])
     db.commit()
     db.refresh(db_article)
+    article_dedup_cache.add(db_article.url, db_article.content_hash, db_article.id)
+    near_duplicate_index.add(db_article.id, db_article.simhash)
+    job_worker_pool.wake()
     
-    print(f"✅ Tạo article mới: {article.title[:50]}...")
+    print(f"✅ Tạo article mới: {article.title[:50]}... (đã xếp hàng phân tích AI)")
     
-    # **PHÂN TÍCH AI VỚI GEMINI**
+    return db_article
+
+def enqueue_stage_jobs(db: Session, stage: str, article_ids: List[int], revive_finished: bool = False) -> int:
+    """Xếp hàng job cho một stage của các article (không commit, dùng chung transaction)"""
+    job_type = STAGE_JOB_TYPES[stage]
+    return job_crud.enqueue_jobs(
+        db,
+        job_type,
+        [{"article_id": article_id} for article_id in article_ids],
+        dedup_keys=[f"{job_type}:{article_id}" for article_id in article_ids],
+        commit=False,
+        revive_finished=revive_finished
+    )
+
+def _claim_article_for_stage(db: Session, article_id: int, stage: str, job: Dict) -> Optional[models.Article]:
+    """Lấy article và giữ lease cho stage; None nếu article không còn cần stage này"""
+    from_state, _ = article_state_crud.STAGE_TRANSITIONS[stage]
+    db_article = db.query(models.Article).filter(models.Article.id == article_id).first()
+    if db_article is None:
+        print(f"⚠️ Article {article_id} không còn tồn tại, bỏ qua job")
+        return None
+    if db_article.processing_state != from_state:
+        print(f"📄 Article {article_id} đang ở trạng thái '{db_article.processing_state}', bỏ qua stage {stage}")
+        return None
+    if not article_state_crud.acquire_article_lease(db, article_id, stage, job["worker_id"], job_worker_pool.visibility_timeout):
+        # Worker khác đang giữ article: để job thử lại sau
+        raise article_state_crud.ArticleLeaseError(f"Article {article_id} đang được worker khác xử lý")
+    db.refresh(db_article)
+    return db_article
+
+def _finish_article_stage(db: Session, article_id: int, stage: str, job: Dict, next_stage: Optional[str] = None):
+    """Chuyển trạng thái + enqueue stage kế tiếp trong cùng transaction với kết quả của stage"""
+    if not article_state_crud.advance_article_state(db, article_id, stage, job["worker_id"]):
+        raise article_state_crud.ArticleLeaseError(f"Mất lease của article {article_id} trước khi xong stage {stage}")
+    if next_stage:
+        enqueue_stage_jobs(db, next_stage, [article_id])
+    db.commit()
+    if next_stage:
+        job_worker_pool.wake()
+
+def process_analyze_article_job(db: Session, payload: Dict, job: Dict):
+    """Stage analyze (stored -> analyzed): gọi Gemini, lưu AI analysis, xếp hàng stage notify"""
+    article_id = payload["article_id"]
+    db_article = _claim_article_for_stage(db, article_id, "analyze", job)
+    if db_article is None:
+        return
     try:
-        # 1. Tóm tắt bằng Gemini
-        print(f"🤖 Đang tóm tắt bài viết bằng Gemini...")
-        try:
-            ai_summary = gemini_service.summarize_article_with_gemini(
-                title=db_article.title, 
-                content=db_article.summary or ""
-            )
-            print(f"✅ Tóm tắt thành công: {ai_summary[:50] if ai_summary else 'None'}...")
-        except Exception as e:
-            print(f"❌ Lỗi tóm tắt: {e}")
-            ai_summary = None
-        
-        # 2. Phân tích toàn diện bằng Gemini
-        print(f"🤖 Đang phân tích bài viết bằng Gemini...")
-        try:
-            full_analysis = gemini_service.analyze_article_with_gemini(
-                title=db_article.title,
-                content=db_article.summary or ""
+        if db_article.ai_analysis is None:
+            # Có nội dung đầy đủ thì AI phân tích trên toàn văn thay vì đoạn trích
+            analysis_content = build_analysis_content(db_article.summary, get_article_body(db_article))
+            # Lần thử cuối: không raise nữa mà lưu kết quả có được như trước
+            final_attempt = job["attempts"] >= job["max_attempts"]
+            ai_summary, full_analysis = request_ai_analysis(db_article, analysis_content, retry_on_failure=not final_attempt)
+            print(f"🤖 Đang lưu AI analysis vào database...")
+            db.add(build_ai_analysis_record(db_article, ai_summary, full_analysis))
+        _finish_article_stage(db, article_id, "analyze", job, next_stage="notify")
+        print(f"✅ Article {article_id}: analyzed")
+    except Exception:
+        db.rollback()
+        article_state_crud.release_article_lease(db, article_id, job["worker_id"])
+        raise
+
+def process_notify_article_job(db: Session, payload: Dict, job: Dict):
+    """
+    Stage notify (analyzed -> notified): gửi thông báo watchlist.
+    Crash sau khi gửi nhưng trước khi commit thì thông báo có thể bị gửi lại (at-least-once).
+    """
+    article_id = payload["article_id"]
+    db_article = _claim_article_for_stage(db, article_id, "notify", job)
+    if db_article is None:
+        return
+    try:
+        notify_watchlist_for_article(db, db_article)
+        _finish_article_stage(db, article_id, "notify", job)
+        print(f"✅ Article {article_id}: notified")
+    except Exception:
+        db.rollback()
+        article_state_crud.release_article_lease(db, article_id, job["worker_id"])
+        raise
+
+def resume_stalled_articles(db: Session, stalled_after_minutes: float = STALLED_ARTICLE_MINUTES) -> int:
+    """Xếp hàng lại stage còn dở cho các article bị kẹt (job hết lượt thử, dữ liệu cũ...)"""
+    stalled = article_state_crud.find_stalled_articles(db, stalled_after_minutes)
+    for stage in article_state_crud.STAGE_TRANSITIONS:
+        article_ids = [article_id for article_id, article_stage in stalled if article_stage == stage]
+        if article_ids:
+            enqueue_stage_jobs(db, stage, article_ids, revive_finished=True)
+    db.commit()
+    if stalled:
+        job_worker_pool.wake()
+        print(f"♻️ Xếp hàng lại {len(stalled)} article đang xử lý dở")
+    return len(stalled)
+
+def create_articles_bulk(db: Session, articles: List[schemas.ArticleCreate]) -> List[Dict]:
+    """
+    Tạo nhiều article trong một transaction:
+    - kiểm tra trùng URL/content hash của cả batch bằng một câu SELECT
+    - INSERT ... ON CONFLICT(url) DO NOTHING cho các bài mới, kèm job phân tích AI
+    Trả về trạng thái từng bài theo thứ tự đầu vào: created / duplicate.
+    """
+    if not articles:
+        return []
+
+    content_hashes = [compute_content_hash(article.title, article.summary) for article in articles]
+    urls = [article.url for article in articles]
+
+    existing_by_url: Dict[str, int] = {}
+    existing_by_hash: Dict[str, int] = {}
+    # Cache trong bộ nhớ trả lời phần lớn các bài (trùng hoặc chắc chắn mới),
+    # chỉ các bài cache không kết luận được mới phải tra DB
+    article_dedup_cache.ensure_warm(db)
+    unresolved_urls = []
+    unresolved_hashes = []
+    for url, content_hash in zip(urls, content_hashes):
+        cached_reason, cached_id = article_dedup_cache.lookup(url, content_hash)
+        if cached_reason == "url":
+            existing_by_url[url] = cached_id
+        elif cached_reason == "content_hash":
+            existing_by_hash[content_hash] = cached_id
+        elif cached_reason is None:
+            unresolved_urls.append(url)
+            unresolved_hashes.append(content_hash)
+    # Chia nhỏ danh sách để không vượt giới hạn số tham số của SQLite
+    for offset in range(0, len(unresolved_urls), 400):
+        url_chunk = unresolved_urls[offset:offset + 400]
+        hash_chunk = unresolved_hashes[offset:offset + 400]
+        rows = db.execute(
+            select(models.Article.id, models.Article.url, models.Article.content_hash)
+            .where(or_(models.Article.url.in_(url_chunk), models.Article.content_hash.in_(hash_chunk)))
+        ).all()
+        for article_id, url, content_hash in rows:
+            existing_by_url.setdefault(url, article_id)
+            if content_hash:
+                existing_by_hash.setdefault(content_hash, article_id)
+            article_dedup_cache.add(url, content_hash, article_id)
+
+    results: List[Dict] = []
+    new_rows = []
+    # Bài gần giống bài khác trong cùng batch: (row, url của bài gốc trong batch)
+    linked_rows = []
+    # URL / content hash -> kết quả của bài đầu tiên trong batch
+    batch_urls: Dict[str, Dict] = {}
+    batch_hashes: Dict[str, Dict] = {}
+    batch_duplicates = []
+    # SimHash của các bài gốc trong batch (khóa: URL)
+    near_duplicate_index.ensure_warm(db)
+    batch_simhashes = SimHashIndex(max_size=len(articles))
+    now = datetime.utcnow()
+    for index, (article, content_hash) in enumerate(zip(articles, content_hashes)):
+        result = {
+            "index": index, "url": article.url, "status": "duplicate", "id": None,
+            "duplicate_reason": None, "duplicate_of_id": None
+        }
+        if article.url in existing_by_url:
+            result.update(id=existing_by_url[article.url], duplicate_reason="url")
+        elif content_hash in existing_by_hash:
+            result.update(id=existing_by_hash[content_hash], duplicate_reason="content_hash")
+        elif article.url in batch_urls or content_hash in batch_hashes:
+            result["duplicate_reason"] = "batch"
+            batch_duplicates.append((result, batch_urls.get(article.url) or batch_hashes[content_hash]))
+        else:
+            result["status"] = "created"
+            batch_urls[article.url] = result
+            batch_hashes[content_hash] = result
+            simhash = compute_simhash(article.title, article.summary)
+            row = article.dict(exclude={'body'})
+            row.update(
+                content_hash=content_hash,
+                body_compressed=compress_body(article.body),
+                simhash=simhash,
+                duplicate_of_id=None,
+                processing_state=article_state_crud.STATE_STORED,
+                created_at=now,
+                updated_at=now,
             )
-            print(f"✅ Phân tích thành công: {full_analysis}")
-        except Exception as e:
-            print(f"❌ Lỗi phân tích: {e}")
-            full_analysis = None
-        
-        # 3. Tạo record ArticleAIAnalysis (KHÔNG dùng schema để tránh lỗi)
-        print(f"🤖 Đang tạo AI analysis record...")
-        try:
-            db_ai_analysis = ai_analysis_model.ArticleAIAnalysis(
-                article_id=db_article.id,
-                summary=ai_summary
+            # Tin đăng lại/sửa tiêu đề: lưu và liên kết với bài gốc, không phân tích lại
+            match = near_duplicate_index.find(simhash)
+            batch_match = None if match else batch_simhashes.find(simhash)
+            if match:
+                row.update(duplicate_of_id=match[0], processing_state=article_state_crud.STATE_DUPLICATE)
+                result["duplicate_of_id"] = match[0]
+                new_rows.append(row)
+            elif batch_match:
+                row["processing_state"] = article_state_crud.STATE_DUPLICATE
+                linked_rows.append((row, batch_match[0]))
+            else:
+                batch_simhashes.add(article.url, simhash)
+                new_rows.append(row)
+        results.append(result)
+
+    inserted_ids: Dict[str, int] = {}
+    if new_rows or linked_rows:
+        # Bài do request khác chèn cùng lúc bị ON CONFLICT bỏ qua (không có trong RETURNING)
+        # thay vì làm hỏng cả batch
+        statement = (
+            sqlite_insert(models.Article)
+            .on_conflict_do_nothing(index_elements=["url"])
+            .returning(models.Article.id, models.Article.url)
+        )
+        if new_rows:
+            inserted_ids = {url: article_id for article_id, url in db.execute(statement, new_rows).all()}
+        if linked_rows:
+            # Chèn sau bài gốc để biết id của bài gốc; bài gốc không chèn được thì bài này thành bài gốc
+            for row, canonical_url in linked_rows:
+                if canonical_url in inserted_ids:
+                    row["duplicate_of_id"] = inserted_ids[canonical_url]
+                else:
+                    row["processing_state"] = article_state_crud.STATE_STORED
+            inserted_ids.update(
+                {url: article_id for article_id, url in db.execute(statement, [row for row, _ in linked_rows]).all()}
             )
-            
-            # 4. Cập nhật kết quả phân tích nếu có
-            if full_analysis:
-                db_ai_analysis.category = full_analysis.get("category")
-                # Chuyển đổi sentiment text sang score số
-                sentiment_map = {"Tích cực": 1.0, "Trung tính": 0.0, "Tiêu cực": -1.0}
-                if db_ai_analysis.sentiment_score == None: db_ai_analysis.sentiment_score = 0.0
-                db_ai_analysis.sentiment_score = sentiment_map.get(full_analysis.get("sentiment"), 0.0)
-                # Chuyển đổi impact text sang score số
-                impact_map = {"Cao": 1.0, "Trung bình": 0.5, "Thấp": 0.1}
-                if db_ai_analysis.impact_score == None: db_ai_analysis.impact_score = 0.0
-                db_ai_analysis.impact_score = 1.0
-                db_ai_analysis.impact_score = impact_map.get(full_analysis.get("impact_level"), 0.1)
-                db_ai_analysis.keywords_extracted = json.dumps(full_analysis.get("key_entities", []), ensure_ascii=False)
-                # Lưu toàn bộ JSON phân tích để tham khảo sau
-                db_ai_analysis.analysis_metadata = json.dumps(full_analysis, ensure_ascii=False)
-                
-                print(f"📊 Phân tích hoàn tất: Category={full_analysis.get('category')}, Sentiment={full_analysis.get('sentiment')}, Impact={full_analysis.get('impact_level')}")
-            
-            # 5. Lưu kết quả AI vào database
-            print(f"🤖 Đang lưu AI analysis vào database...")
-            db.add(db_ai_analysis)
-            db.commit()
-            db.refresh(db_ai_analysis)
-            print(f"✅ Đã lưu AI analysis với ID: {db_ai_analysis.id}")
-            
-            # 6. Kiểm tra watchlist và gửi thông báo nâng cao
-            print(f"🤖 Đang kiểm tra watchlist...")
-            check_and_notify_watchlist_with_ai(db, db_article, db_ai_analysis, full_analysis)
-            
-        except Exception as e:
-            print(f"❌ Lỗi khi tạo/lưu AI analysis: {e}")
-            print(f"❌ Chi tiết lỗi: {type(e).__name__}: {str(e)}")
-            # Fallback về watchlist thông thường
-            check_and_notify_watchlist(db, db_article)
-            
+        all_rows = new_rows + [row for row, _ in linked_rows]
+        enqueue_stage_jobs(db, "analyze", [
+            inserted_ids[row["url"]] for row in all_rows
+            if row["url"] in inserted_ids and row["processing_state"] == article_state_crud.STATE_STORED
+        ])
+        db.commit()
+        for row in all_rows:
+            if row["url"] not in inserted_ids:
+                continue
+            article_dedup_cache.add(row["url"], row["content_hash"], inserted_ids[row["url"]])
+            if row["duplicate_of_id"] is None:
+                near_duplicate_index.add(inserted_ids[row["url"]], row["simhash"])
+        results_by_url = {result["url"]: result for result in results if result["status"] == "created"}
+        for row in all_rows:
+            results_by_url[row["url"]]["duplicate_of_id"] = row["duplicate_of_id"]
+        job_worker_pool.wake()
+
+    lost_urls = []
+    for result in results:
+        if result["status"] != "created":
+            continue
+        if result["url"] in inserted_ids:
+            result["id"] = inserted_ids[result["url"]]
+        else:
+            result.update(status="duplicate", duplicate_reason="url")
+            lost_urls.append(result["url"])
+    if lost_urls:
+        # Bài vừa được process khác chèn: lấy id để trả về như bài trùng thông thường
+        lost_ids = dict(db.execute(
+            select(models.Article.url, models.Article.id).where(models.Article.url.in_(lost_urls))
+        ).all())
+        for result in results:
+            if result["url"] in lost_ids and result["id"] is None:
+                result["id"] = lost_ids[result["url"]]
+    for result, first_result in batch_duplicates:
+        result["id"] = first_result["id"]
+
+    created = [r for r in results if r["status"] == "created"]
+    linked = [r for r in created if r["duplicate_of_id"]]
+    print(
+        f"✅ Bulk: tạo {len(created)} article mới ({len(linked)} bài gần giống bài cũ, không phân tích lại), "
+        f"{len(results) - len(created)} bài trùng"
+    )
+    return results
+
+def request_ai_analysis(
+    db_article: models.Article, analysis_content: str, retry_on_failure: bool = False
+) -> Tuple[Optional[str], Optional[Dict]]:
+    """
+    Gọi Gemini tóm tắt và phân tích article.
+    retry_on_failure=True: Gemini không trả kết quả thì raise GeminiUnavailableError
+    để job được thử lại, thay vì trả kết quả rỗng.
+    """
+    # 1. Tóm tắt bằng Gemini
+    print(f"🤖 Đang tóm tắt bài viết bằng Gemini...")
+    try:
+        ai_summary = gemini_service.summarize_article_with_gemini(
+            title=db_article.title, 
+            content=analysis_content
+        )
+        print(f"✅ Tóm tắt thành công: {ai_summary[:50] if ai_summary else 'None'}...")
+    except Exception as e:
+        print(f"❌ Lỗi tóm tắt: {e}")
+        ai_summary = None
+    
+    # 2. Phân tích toàn diện bằng Gemini
+    print(f"🤖 Đang phân tích bài viết bằng Gemini...")
+    try:
+        full_analysis = gemini_service.analyze_article_with_gemini(
+            title=db_article.title,
+            content=analysis_content
+        )
+        print(f"✅ Phân tích thành công: {full_analysis}")
     except Exception as e:
-        print(f"⚠️ Lỗi tổng thể khi phân tích AI: {e}")
-        print(f"⚠️ Chi tiết lỗi: {type(e).__name__}: {str(e)}")
-        # Vẫn kiểm tra watchlist thông thường nếu AI lỗi
+        print(f"❌ Lỗi phân tích: {e}")
+        full_analysis = None
+    
+    if (retry_on_failure and full_analysis is None and gemini_service.GOOGLE_API_KEY
+            and len(analysis_content.strip()) >= 50):
+        raise gemini_service.GeminiUnavailableError("Gemini không trả về kết quả phân tích")
+    
+    return ai_summary, full_analysis
+
+def build_ai_analysis_record(
+    db_article: models.Article, ai_summary: Optional[str], full_analysis: Optional[Dict]
+) -> ai_analysis_model.ArticleAIAnalysis:
+    """Tạo record ArticleAIAnalysis từ kết quả Gemini (KHÔNG dùng schema để tránh lỗi)"""
+    db_ai_analysis = ai_analysis_model.ArticleAIAnalysis(
+        article_id=db_article.id,
+        summary=ai_summary
+    )
+    
+    # Cập nhật kết quả phân tích nếu có
+    if full_analysis:
+        db_ai_analysis.category = full_analysis.get("category")
+        # Chuyển đổi sentiment text sang score số
+        sentiment_map = {"Tích cực": 1.0, "Trung tính": 0.0, "Tiêu cực": -1.0}
+        db_ai_analysis.sentiment_score = sentiment_map.get(full_analysis.get("sentiment"), 0.0)
+        # Chuyển đổi impact text sang score số
+        impact_map = {"Cao": 1.0, "Trung bình": 0.5, "Thấp": 0.1}
+        db_ai_analysis.impact_score = impact_map.get(full_analysis.get("impact_level"), 0.1)
+        db_ai_analysis.keywords_extracted = json.dumps(full_analysis.get("key_entities", []), ensure_ascii=False)
+        # Lưu toàn bộ JSON phân tích để tham khảo sau
+        db_ai_analysis.analysis_metadata = json.dumps(full_analysis, ensure_ascii=False)
+        
+        print(f"📊 Phân tích hoàn tất: Category={full_analysis.get('category')}, Sentiment={full_analysis.get('sentiment')}, Impact={full_analysis.get('impact_level')}")
+    
+    return db_ai_analysis
+
+def notify_watchlist_for_article(db: Session, db_article: models.Article):
+    """Kiểm tra watchlist và gửi thông báo dựa trên AI analysis đã lưu (fallback nếu không có)"""
+    db_ai_analysis = db_article.ai_analysis
+    if db_ai_analysis is None:
         check_and_notify_watchlist(db, db_article)
+        return
     
-    return db_article
+    full_analysis = None
+    if db_ai_analysis.analysis_metadata:
+        try:
+            full_analysis = json.loads(db_ai_analysis.analysis_metadata)
+        except json.JSONDecodeError:
+            full_analysis = None
+    print(f"🤖 Đang kiểm tra watchlist...")
+    check_and_notify_watchlist_with_ai(db, db_article, db_ai_analysis, full_analysis)
 
 def check_and_notify_watchlist_with_ai(db: Session, db_article: models.Article, db_ai_analysis, full_analysis):
     """Kiểm tra watchlist và gửi thông báo nâng cao với AI insights"""
@@ -300,25 +629,29 @@ def check_and_notify_watchlist(db: Session, db_article: models.Article):
 
 # Các hàm khác giữ nguyên...
 def get_articles(db: Session, skip: int = 0, limit: int = 20) -> List[models.Article]:
-    """Lấy danh sách articles với phân trang"""
+    """Lấy danh sách articles với phân trang OFFSET (cũ, trang càng sâu càng chậm - dùng get_articles_page)"""
     return db.query(models.Article)\
-             .order_by(models.Article.created_at.desc())\
+             .order_by(models.Article.created_at.desc(), models.Article.id.desc())\
              .offset(skip)\
              .limit(limit)\
              .all()
 
+def get_articles_page(db: Session, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[models.Article], Optional[str]]:
+    """Lấy một trang articles mới nhất trước, phân trang bằng cursor; trả về (articles, cursor trang sau)"""
+    return paginate_articles(db.query(models.Article), limit, cursor)
+
 def get_articles_count(db: Session) -> int:
-    """Đếm tổng số articles"""
-    return db.query(models.Article).count()
+    """Đếm tổng số articles (đọc bộ đếm do trigger duy trì, không quét bảng)"""
+    return article_counter_crud.get_total_count(db)
 
-def get_articles_with_ai_analysis(db: Session, skip: int = 0, limit: int = 20):
-    """Lấy articles kèm AI analysis"""
-    return ai_analysis_crud.get_articles_with_ai_analysis(db, skip, limit)
+def get_articles_with_ai_analysis(db: Session, limit: int = 20, cursor: Optional[str] = None):
+    """Lấy articles kèm AI analysis (phân trang bằng cursor)"""
+    return ai_analysis_crud.get_articles_with_ai_analysis(db, limit, cursor)
 
-def get_articles_by_category(db: Session, category: str):
+def get_articles_by_category(db: Session, category: str, limit: int = 100, cursor: Optional[str] = None):
     """Lấy articles theo category AI"""
-    return ai_analysis_crud.get_articles_by_category(db, category)
+    return ai_analysis_crud.get_articles_by_category(db, category, limit, cursor)
 
-def get_high_impact_articles(db: Session, min_impact: float = 0.7):
+def get_high_impact_articles(db: Session, min_impact: float = 0.7, limit: int = 100, cursor: Optional[str] = None):
     """Lấy articles có impact cao"""
-    return ai_analysis_crud.get_high_impact_articles(db, min_impact)
+    return ai_analysis_crud.get_high_impact_articles(db, min_impact, limit, cursor)
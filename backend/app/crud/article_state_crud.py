@@ -0,0 +1,133 @@
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+from typing import Dict, List, Tuple
+from datetime import datetime, timedelta
+
+from app.models import article_model as models
+from app.models import job_model
+from app.services.job_queue import STAGE_JOB_TYPES
+
+# Vòng đời xử lý của một article sau khi được lưu:
+#   stored --(analyze)--> analyzed --(notify)--> notified
+#   duplicate: bản đăng lại của bài khác, dừng ngay khi lưu
+# NULL: article tạo trước khi có state machine (đã xử lý theo luồng cũ)
+STATE_STORED = "stored"
+STATE_ANALYZED = "analyzed"
+STATE_NOTIFIED = "notified"
+# Bài gần giống một bài đã có (duplicate_of_id): không phân tích/thông báo lại
+STATE_DUPLICATE = "duplicate"
+
+
+class ArticleLeaseError(Exception):
+    """Article đang được worker khác giữ, hoặc worker đã mất lease giữa chừng"""
+
+
+# stage -> (trạng thái cần có để chạy stage, trạng thái sau khi xong)
+STAGE_TRANSITIONS: Dict[str, Tuple[str, str]] = {
+    "analyze": (STATE_STORED, STATE_ANALYZED),
+    "notify": (STATE_ANALYZED, STATE_NOTIFIED),
+}
+
+articles_table = models.Article.__table__
+jobs_table = job_model.Job.__table__
+
+# Giữ nguyên updated_at (không để onupdate của Article chạy): lease/trạng thái là thông tin
+# nội bộ, updated_at công khai qua API/export chỉ đổi khi nội dung bài thay đổi
+_KEEP_UPDATED_AT = {"updated_at": articles_table.c.updated_at}
+
+
+def acquire_article_lease(db: Session, article_id: int, stage: str, owner: str, lease_seconds: float) -> bool:
+    """
+    Giữ article để chạy một stage: chỉ thành công nếu article đang ở trạng thái đầu vào
+    của stage và không có worker khác giữ lease còn hạn. Commit ngay để worker khác thấy.
+    """
+    from_state, _ = STAGE_TRANSITIONS[stage]
+    now = datetime.utcnow()
+    result = db.execute(
+        update(articles_table)
+        .where(
+            articles_table.c.id == article_id,
+            articles_table.c.processing_state == from_state,
+            or_(
+                articles_table.c.lease_until.is_(None),
+                articles_table.c.lease_until < now,
+                articles_table.c.lease_owner == owner,
+            ),
+        )
+        .values(lease_owner=owner, lease_until=now + timedelta(seconds=lease_seconds), **_KEEP_UPDATED_AT)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def advance_article_state(db: Session, article_id: int, stage: str, owner: str) -> bool:
+    """
+    Chuyển article sang trạng thái kế tiếp và trả lease. KHÔNG commit: gọi chung
+    transaction với việc lưu kết quả của stage và enqueue stage sau.
+    Trả về False nếu worker đã mất lease (worker khác đã nhận article).
+    """
+    from_state, to_state = STAGE_TRANSITIONS[stage]
+    result = db.execute(
+        update(articles_table)
+        .where(
+            articles_table.c.id == article_id,
+            articles_table.c.processing_state == from_state,
+            articles_table.c.lease_owner == owner,
+        )
+        .values(
+            processing_state=to_state, lease_owner=None, lease_until=None, state_updated_at=datetime.utcnow(),
+            **_KEEP_UPDATED_AT
+        )
+    )
+    return result.rowcount == 1
+
+
+def release_article_lease(db: Session, article_id: int, owner: str):
+    """Trả lease khi stage lỗi để lần thử sau (hoặc worker khác) nhận được ngay"""
+    db.execute(
+        update(articles_table)
+        .where(articles_table.c.id == article_id, articles_table.c.lease_owner == owner)
+        .values(lease_owner=None, lease_until=None, **_KEEP_UPDATED_AT)
+    )
+    db.commit()
+
+
+def get_article_state_counts(db: Session) -> Dict[str, int]:
+    """Số article theo trạng thái xử lý"""
+    rows = db.execute(
+        select(articles_table.c.processing_state, func.count()).group_by(articles_table.c.processing_state)
+    ).all()
+    return {(state or "legacy"): count for state, count in rows}
+
+
+def find_stalled_articles(db: Session, stalled_after_minutes: float, limit: int = 500) -> List[Tuple[int, str]]:
+    """
+    Article kẹt giữa chừng: chưa tới trạng thái cuối, không ai giữ lease, lâu không đổi
+    trạng thái và không còn job pending/running cho stage kế tiếp (VD: job đã hết lượt thử).
+    Trả về danh sách (article_id, stage cần chạy).
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(minutes=stalled_after_minutes)
+    stalled = []
+    for stage, (from_state, _) in STAGE_TRANSITIONS.items():
+        active_job = (
+            select(jobs_table.c.id)
+            .where(
+                jobs_table.c.dedup_key == func.printf("%s:%d", STAGE_JOB_TYPES[stage], articles_table.c.id),
+                jobs_table.c.status.in_(["pending", "running"]),
+            )
+            .exists()
+        )
+        rows = db.execute(
+            select(articles_table.c.id)
+            .where(
+                articles_table.c.processing_state == from_state,
+                articles_table.c.state_updated_at < cutoff,
+                or_(articles_table.c.lease_until.is_(None), articles_table.c.lease_until < now),
+                ~active_job,
+            )
+            .order_by(articles_table.c.id)
+            .limit(limit)
+        ).all()
+        stalled.extend((row.id, stage) for row in rows)
+    return stalled
@@ -1,13 +1,28 @@
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
+import json
 
 from app.models import crawl_source_model as models
 from app.schemas import crawl_source_schema as schemas
+from app.services.html_parser import invalidate_compiled_selectors
+
+# Database tạo trước khi có nguồn feed vẫn giữ NOT NULL trên các cột này
+# (add_missing_columns không đổi được ràng buộc của cột đã có)
+LEGACY_REQUIRED_SELECTORS = ('article_container_selector', 'title_selector', 'link_selector')
+
+def _fill_feed_selectors(db_source: models.CrawlSource):
+    """Nguồn feed không dùng selector: ghi '' thay cho NULL để chạy được trên database cũ"""
+    if db_source.source_type != "feed":
+        return
+    for field in LEGACY_REQUIRED_SELECTORS:
+        if getattr(db_source, field) is None:
+            setattr(db_source, field, '')
 
 def create_crawl_source(db: Session, source: schemas.CrawlSourceCreate) -> models.CrawlSource:
     """Tạo nguồn crawl mới"""
     db_source = models.CrawlSource(**source.dict())
+    _fill_feed_selectors(db_source)
     db.add(db_source)
     db.commit()
     db.refresh(db_source)
@@ -38,12 +53,19 @@ def update_crawl_source(db: Session, source_id: int, source_update: schemas.Craw
         return None
     
     update_data = source_update.dict(exclude_unset=True)
+    if update_data.get('seen_urls') is not None:
+        update_data['seen_urls'] = json.dumps(update_data['seen_urls'], ensure_ascii=False)
     for field, value in update_data.items():
         setattr(db_source, field, value)
+    _fill_feed_selectors(db_source)
     
     db_source.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(db_source)
+    
+    # Selector thay đổi -> bỏ bản compile cũ của nguồn này
+    if any(field.endswith('_selector') for field in update_data):
+        invalidate_compiled_selectors(source_id)
     return db_source
 
 def update_crawl_source_last_crawled_at(db: Session, source_id: int, last_crawled_at: datetime) -> Optional[models.CrawlSource]:
@@ -66,4 +88,5 @@ def delete_crawl_source(db: Session, source_id: int) -> bool:
     
     db.delete(db_source)
     db.commit()
+    invalidate_compiled_selectors(source_id)
     return True
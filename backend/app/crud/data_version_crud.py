@@ -0,0 +1,19 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from typing import Sequence, Tuple
+
+from app.database import DATA_VERSION_TABLES
+
+def get_data_fingerprint(db: Session, tables: Sequence[str]) -> Tuple[int, ...]:
+    """
+    (phiên bản, max(id)) của từng bảng trong một câu SELECT, theo đúng thứ tự tables.
+    Phiên bản tăng ở mọi lần ghi; max(id) (tra trên khóa chính) phân biệt database
+    bị tạo lại khi phiên bản đếm lại từ đầu. Bảng chưa từng ghi = 0.
+    """
+    columns = []
+    for table in tables:
+        if table not in DATA_VERSION_TABLES:
+            raise ValueError(f"Bảng {table} không có số phiên bản dữ liệu")
+        columns.append(f"coalesce((SELECT version FROM data_versions WHERE name = '{table}'), 0)")
+        columns.append(f"coalesce((SELECT max(id) FROM {table}), 0)")
+    return tuple(db.execute(text("SELECT " + ", ".join(columns))).one())
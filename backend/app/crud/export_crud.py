@@ -0,0 +1,53 @@
+from sqlalchemy import Row, Table, select
+from sqlalchemy.orm import Session, defer
+from typing import Iterator, List, Optional, Sequence, Tuple
+from datetime import datetime
+
+from app.models.article_model import Article
+from app.models.ai_analysis_model import ArticleAIAnalysis
+
+EXPORT_BATCH_SIZE = 1000
+
+def iter_articles_with_analysis(
+    db: Session,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Tuple[Article, Optional[ArticleAIAnalysis]]]:
+    """
+    Duyệt mọi article (kèm AI analysis nếu có) theo created_at tăng dần, since <= created_at < until.
+    Đọc từng lô batch_size dòng (yield_per) nên bộ nhớ không tăng theo kích thước bảng.
+    """
+    query = (
+        select(Article, ArticleAIAnalysis)
+        .outerjoin(ArticleAIAnalysis, ArticleAIAnalysis.article_id == Article.id)
+        # Không đọc nội dung đầy đủ (nén): NDJSON không xuất, chỉ làm chậm lô và tốn bộ nhớ
+        .options(defer(Article.body_compressed))
+    )
+    if since is not None:
+        query = query.where(Article.created_at >= since)
+    if until is not None:
+        query = query.where(Article.created_at < until)
+    query = query.order_by(Article.created_at, Article.id).execution_options(yield_per=batch_size)
+    for article, analysis in db.execute(query):
+        yield article, analysis
+
+def iter_table_batches(
+    db: Session,
+    table: Table,
+    column_names: Sequence[str],
+    after_id: int = 0,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[List[Row]]:
+    """
+    Các dòng có id > after_id của một bảng theo id tăng dần, mỗi lần một lô (list các Row).
+    Dùng cho export tăng dần: lần sau truyền id lớn nhất đã xuất làm after_id.
+    """
+    query = (
+        select(*(table.c[name] for name in column_names))
+        .where(table.c.id > after_id)
+        .order_by(table.c.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for batch in db.execute(query).partitions():
+        yield batch
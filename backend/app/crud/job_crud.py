@@ -0,0 +1,235 @@
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import json
+import os
+
+from app.models import job_model as models
+
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+
+jobs_table = models.Job.__table__
+
+def _job_row(job_type: str, payload: Dict[str, Any], dedup_key: Optional[str], max_attempts: int, now: datetime) -> Dict:
+    return {
+        "job_type": job_type,
+        "payload": json.dumps(payload, ensure_ascii=False),
+        "dedup_key": dedup_key,
+        "status": "pending",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "available_at": now,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+def enqueue_jobs(
+    db: Session,
+    job_type: str,
+    payloads: List[Dict[str, Any]],
+    dedup_keys: Optional[List[Optional[str]]] = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    commit: bool = True,
+    revive_finished: bool = False
+) -> int:
+    """
+    Thêm job vào hàng đợi. Job có dedup_key đã tồn tại bị bỏ qua (ON CONFLICT DO NOTHING);
+    revive_finished=True: job trùng key đã done/failed được đưa lại về pending.
+    commit=False để enqueue chung transaction với thao tác tạo dữ liệu (không mất job khi crash).
+    """
+    if not payloads:
+        return 0
+    now = datetime.utcnow()
+    dedup_keys = dedup_keys or [None] * len(payloads)
+    rows = [_job_row(job_type, payload, key, max_attempts, now) for payload, key in zip(payloads, dedup_keys)]
+    statement = sqlite_insert(jobs_table)
+    if revive_finished:
+        statement = statement.on_conflict_do_update(
+            index_elements=["dedup_key"],
+            set_={
+                "status": "pending",
+                "attempts": 0,
+                "available_at": now,
+                "finished_at": None,
+                "last_error": None,
+                "updated_at": now,
+            },
+            where=jobs_table.c.status.in_(["done", "failed"]),
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=["dedup_key"])
+    result = db.execute(statement, rows)
+    if commit:
+        db.commit()
+    return result.rowcount
+
+def enqueue_job(
+    db: Session,
+    job_type: str,
+    payload: Dict[str, Any],
+    dedup_key: Optional[str] = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    commit: bool = True,
+    revive_finished: bool = False
+) -> int:
+    """Thêm một job vào hàng đợi"""
+    return enqueue_jobs(db, job_type, [payload], [dedup_key], max_attempts, commit, revive_finished)
+
+def claim_jobs(
+    db: Session,
+    worker_id: str,
+    job_types: List[str],
+    visibility_timeout_seconds: float,
+    limit: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Nhận job để xử lý bằng một câu UPDATE ... RETURNING (SQLite ghi tuần tự nên không
+    có 2 worker nhận cùng job). Lấy job pending đã tới hạn hoặc job running đã hết lease
+    (worker cũ chết/treo).
+    """
+    now = datetime.utcnow()
+    candidates = (
+        select(jobs_table.c.id)
+        .where(
+            jobs_table.c.job_type.in_(job_types),
+            jobs_table.c.attempts < jobs_table.c.max_attempts,
+            or_(
+                and_(jobs_table.c.status == "pending", jobs_table.c.available_at <= now),
+                and_(jobs_table.c.status == "running", jobs_table.c.locked_until < now),
+            ),
+        )
+        .order_by(jobs_table.c.available_at, jobs_table.c.id)
+        .limit(limit)
+        .scalar_subquery()
+    )
+    statement = (
+        update(jobs_table)
+        .where(jobs_table.c.id.in_(candidates))
+        .values(
+            status="running",
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=visibility_timeout_seconds),
+            attempts=jobs_table.c.attempts + 1,
+            updated_at=now,
+        )
+        .returning(
+            jobs_table.c.id, jobs_table.c.job_type, jobs_table.c.payload,
+            jobs_table.c.attempts, jobs_table.c.max_attempts,
+        )
+    )
+    rows = db.execute(statement).all()
+    db.commit()
+    return [
+        {
+            "id": row.id,
+            "job_type": row.job_type,
+            "payload": json.loads(row.payload or "{}"),
+            "attempts": row.attempts,
+            "max_attempts": row.max_attempts,
+        }
+        for row in rows
+    ]
+
+def extend_job_lease(db: Session, job_id: int, worker_id: str, visibility_timeout_seconds: float) -> bool:
+    """Gia hạn lease cho job chạy lâu, trả về False nếu job đã bị worker khác nhận"""
+    result = db.execute(
+        update(jobs_table)
+        .where(jobs_table.c.id == job_id, jobs_table.c.locked_by == worker_id, jobs_table.c.status == "running")
+        .values(locked_until=datetime.utcnow() + timedelta(seconds=visibility_timeout_seconds))
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def complete_job(db: Session, job_id: int, worker_id: str) -> bool:
+    """Đánh dấu job hoàn thành (chỉ khi worker vẫn còn giữ lease)"""
+    now = datetime.utcnow()
+    result = db.execute(
+        update(jobs_table)
+        .where(jobs_table.c.id == job_id, jobs_table.c.locked_by == worker_id, jobs_table.c.status == "running")
+        .values(status="done", locked_by=None, locked_until=None, last_error=None, finished_at=now, updated_at=now)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def fail_job(db: Session, job_id: int, worker_id: str, error: str) -> Optional[str]:
+    """
+    Ghi nhận job lỗi: còn lượt thì trả về pending với backoff lũy thừa, hết lượt thì failed.
+    Trả về trạng thái mới (None nếu worker đã mất lease).
+    """
+    job = db.query(models.Job).filter(models.Job.id == job_id, models.Job.locked_by == worker_id).first()
+    if job is None or job.status != "running":
+        return None
+    now = datetime.utcnow()
+    job.last_error = error[:2000]
+    job.locked_by = None
+    job.locked_until = None
+    if job.attempts >= job.max_attempts:
+        job.status = "failed"
+        job.finished_at = now
+    else:
+        job.status = "pending"
+        delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** (job.attempts - 1)))
+        job.available_at = now + timedelta(seconds=delay)
+    db.commit()
+    return job.status
+
+def fail_expired_jobs(db: Session) -> int:
+    """Job hết lease mà đã dùng hết lượt thử (worker chết ở lần cuối) -> failed"""
+    now = datetime.utcnow()
+    result = db.execute(
+        update(jobs_table)
+        .where(
+            jobs_table.c.status == "running",
+            jobs_table.c.locked_until < now,
+            jobs_table.c.attempts >= jobs_table.c.max_attempts,
+        )
+        .values(status="failed", locked_by=None, locked_until=None, finished_at=now,
+                last_error="Hết thời gian xử lý (worker dừng giữa chừng)")
+    )
+    db.commit()
+    return result.rowcount
+
+def purge_finished_jobs(db: Session, older_than_days: int = 7) -> int:
+    """Xóa job đã xong (done) cũ hơn N ngày; job failed được giữ lại để kiểm tra"""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    result = db.execute(
+        delete(jobs_table).where(jobs_table.c.status == "done", jobs_table.c.finished_at < cutoff)
+    )
+    db.commit()
+    return result.rowcount
+
+def get_job_stats(db: Session) -> Dict[str, Dict[str, int]]:
+    """Số job theo loại và trạng thái"""
+    rows = db.execute(
+        select(jobs_table.c.job_type, jobs_table.c.status, func.count())
+        .group_by(jobs_table.c.job_type, jobs_table.c.status)
+    ).all()
+    stats: Dict[str, Dict[str, int]] = {}
+    for job_type, status, count in rows:
+        stats.setdefault(job_type, {})[status] = count
+    return stats
+
+def get_failed_jobs(db: Session, limit: int = 50) -> List[models.Job]:
+    """Các job đã hết lượt thử"""
+    return db.query(models.Job)\
+             .filter(models.Job.status == "failed")\
+             .order_by(models.Job.finished_at.desc())\
+             .limit(limit)\
+             .all()
+
+def retry_job(db: Session, job_id: int) -> Optional[models.Job]:
+    """Đưa job failed về lại hàng đợi với số lượt thử mới"""
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if job is None or job.status != "failed":
+        return None
+    job.status = "pending"
+    job.attempts = 0
+    job.available_at = datetime.utcnow()
+    job.finished_at = None
+    db.commit()
+    db.refresh(job)
+    return job
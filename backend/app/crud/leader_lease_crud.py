@@ -0,0 +1,51 @@
+from sqlalchemy import case, delete, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional
+from datetime import datetime, timedelta
+
+from app.models import leader_lease_model as models
+
+leases_table = models.LeaderLease.__table__
+
+def try_acquire_lease(db: Session, name: str, owner: str, lease_seconds: float) -> bool:
+    """
+    Nhận hoặc gia hạn lease leader bằng một câu lệnh nguyên tử: thành công nếu chưa ai giữ,
+    mình đang giữ (heartbeat), hoặc lease của leader cũ đã hết hạn (takeover).
+    """
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=lease_seconds)
+    statement = sqlite_insert(leases_table).values(
+        name=name, owner=owner, lease_until=lease_until, acquired_at=now, heartbeat_at=now
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["name"],
+        set_={
+            "owner": owner,
+            "lease_until": lease_until,
+            "heartbeat_at": now,
+            # Chỉ gia hạn thì giữ nguyên thời điểm trở thành leader
+            "acquired_at": case((leases_table.c.owner == owner, leases_table.c.acquired_at), else_=now),
+        },
+        where=or_(leases_table.c.owner == owner, leases_table.c.lease_until < now),
+    )
+    row = db.execute(statement.returning(leases_table.c.owner)).first()
+    db.commit()
+    return row is not None
+
+def release_lease(db: Session, name: str, owner: str) -> bool:
+    """Trả lease khi process dừng để process khác nhận ngay, không phải chờ hết hạn"""
+    result = db.execute(
+        delete(leases_table).where(leases_table.c.name == name, leases_table.c.owner == owner)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def get_lease(db: Session, name: str) -> Optional[Dict[str, Any]]:
+    """Leader hiện tại của vai trò (kể cả lease đã hết hạn nhưng chưa ai nhận)"""
+    row = db.execute(select(leases_table).where(leases_table.c.name == name)).mappings().first()
+    if row is None:
+        return None
+    lease = dict(row)
+    lease["expired"] = lease["lease_until"] < datetime.utcnow()
+    return lease
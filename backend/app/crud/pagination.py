@@ -0,0 +1,56 @@
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import base64
+import json
+
+from app.models.article_model import Article
+
+# Trang tối đa cho các endpoint danh sách
+MAX_PAGE_SIZE = 200
+# Header trả cursor của trang sau (không có header = đã hết dữ liệu)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_token(data: Dict[str, Any]) -> str:
+    """Đóng gói vị trí trang thành chuỗi mờ (base64 URL-safe)"""
+    raw = json.dumps(data, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_token(cursor: str) -> Dict[str, Any]:
+    """Giải mã chuỗi từ encode_token; raise ValueError nếu không hợp lệ"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError as e:
+        raise ValueError(f"Cursor không hợp lệ: {cursor}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"Cursor không hợp lệ: {cursor}")
+    return data
+
+def encode_cursor(created_at: datetime, article_id: int) -> str:
+    """Cursor chứa vị trí (created_at, id) của bài cuối trang"""
+    return encode_token({"c": created_at.isoformat(), "i": article_id})
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Giải mã cursor; raise ValueError nếu cursor không hợp lệ"""
+    data = decode_token(cursor)
+    try:
+        return datetime.fromisoformat(data["c"]), int(data["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Cursor không hợp lệ: {cursor}") from e
+
+def paginate_articles(query: Query, limit: int, cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """
+    Phân trang keyset theo (Article.created_at, Article.id) giảm dần, dùng index
+    ix_articles_created_at_id: trang sâu tốn như trang đầu, không lệch khi có bài mới chèn vào.
+    Trả về (danh sách, cursor trang sau hoặc None nếu đã hết).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        created_at, article_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Article.created_at, Article.id) < tuple_(created_at, article_id))
+    rows = query.order_by(Article.created_at.desc(), Article.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.created_at, last.id)
@@ -0,0 +1,90 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+import re
+
+from app.models import article_model as models
+from app.crud.pagination import MAX_PAGE_SIZE, decode_token, encode_token
+
+# Trọng số bm25 theo cột của articles_fts: title, summary, ai_summary, keywords
+BM25_WEIGHTS = (10.0, 4.0, 4.0, 6.0)
+SEARCH_SORTS = ("relevance", "newest")
+
+_TERM_PATTERN = re.compile(r"\w+\*?", re.UNICODE)
+
+def fold_vietnamese(value: str) -> str:
+    """Đổi đ/Đ sang d/D như lúc ghi index (các dấu khác do tokenizer FTS5 bỏ)"""
+    return value.replace("đ", "d").replace("Đ", "D")
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Chuyển chuỗi người dùng nhập thành biểu thức FTS5 an toàn: mỗi từ được đặt trong
+    ngoặc kép (không dính cú pháp FTS5), các từ nối bằng AND. Từ cuối cùng hoặc từ có
+    dấu * ở cuối được tìm theo tiền tố (gõ tới đâu tìm tới đó).
+    """
+    terms = _TERM_PATTERN.findall(fold_vietnamese(query))
+    if not terms:
+        return None
+    parts = []
+    for position, term in enumerate(terms):
+        word = term.rstrip("*")
+        prefix = term.endswith("*") or position == len(terms) - 1
+        parts.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(parts)
+
+def search_articles(
+    db: Session, query: str, limit: int = 20, cursor: Optional[str] = None, sort: str = "relevance"
+) -> Tuple[List[Tuple[models.Article, float]], Optional[str]]:
+    """
+    Tìm bài theo tiêu đề, đoạn trích, tóm tắt và từ khóa AI bằng index FTS5 articles_fts.
+    sort=relevance: xếp theo bm25 (điểm càng nhỏ càng liên quan); sort=newest: bài mới trước.
+    Phân trang keyset bằng cursor (với relevance, bài mới chèn giữa hai trang có thể làm
+    điểm bm25 xê dịch chút ít). Trả về ([(article, điểm)], cursor trang sau).
+    Raise ValueError nếu truy vấn/cursor không hợp lệ.
+    """
+    if sort not in SEARCH_SORTS:
+        raise ValueError(f"sort phải là một trong {SEARCH_SORTS}")
+    match_query = build_match_query(query)
+    if match_query is None:
+        raise ValueError("Từ khóa tìm kiếm trống")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    rank_sql = f"bm25(articles_fts, {', '.join(str(weight) for weight in BM25_WEIGHTS)})"
+    params: Dict = {"match": match_query, "limit": limit + 1}
+    after = ""
+    if cursor:
+        position = decode_token(cursor)
+        try:
+            params["after_id"] = int(position["i"])
+            if sort == "relevance":
+                params["after_rank"] = float(position["r"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Cursor không hợp lệ: {cursor}") from e
+        after = (
+            f"AND ({rank_sql}, rowid) > (:after_rank, :after_id)" if sort == "relevance"
+            else "AND rowid < :after_id"
+        )
+    # rowid = articles.id tăng theo thời gian chèn, sắp theo rowid giảm dần FTS5 đọc thẳng theo thứ tự index
+    order = "rank, rowid" if sort == "relevance" else "rowid DESC"
+    rows = db.execute(
+        text(f"""
+            SELECT rowid AS id, {rank_sql} AS rank
+            FROM articles_fts
+            WHERE articles_fts MATCH :match {after}
+            ORDER BY {order}
+            LIMIT :limit
+        """),
+        params,
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_token({"r": last.rank, "i": last.id} if sort == "relevance" else {"i": last.id})
+
+    articles = {
+        article.id: article
+        for article in db.query(models.Article).filter(models.Article.id.in_([row.id for row in rows])).all()
+    }
+    return [(articles[row.id], row.rank) for row in rows if row.id in articles], next_cursor
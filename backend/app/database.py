@@ -1,16 +1,18 @@
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 # Cấu hình database SQLite
 SQLALCHEMY_DATABASE_URL = "sqlite:///./local_news_tracker.db"
+# Thời gian tối đa một câu lệnh chờ khóa ghi của SQLite
+SQLITE_BUSY_TIMEOUT_SECONDS = 30
 
 # Tạo engine với cấu hình tối ưu cho SQLite
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, 
     connect_args={
         "check_same_thread": False,
-        "timeout": 30  # Timeout 30 giây
+        "timeout": SQLITE_BUSY_TIMEOUT_SECONDS
     },
     echo=False  # Tắt SQL logging
 )
@@ -21,7 +23,7 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
     """Thiết lập PRAGMA cho SQLite khi tạo kết nối"""
     cursor = dbapi_connection.cursor()
     # Thiết lập busy timeout
-    cursor.execute("PRAGMA busy_timeout = 30000")  # 30 giây
+    cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_SECONDS * 1000}")
     # Thiết lập WAL mode cho hiệu suất tốt hơn với concurrent access
     cursor.execute("PRAGMA journal_mode = WAL")
     # Thiết lập synchronous mode
@@ -42,7 +44,198 @@ def get_db():
     finally:
         db.close()
 
+def add_missing_columns():
+    """Thêm các cột mới (nullable) và index mới vào bảng đã tồn tại, vì create_all không tự ALTER TABLE"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+                print(f"✅ Đã thêm cột {table.name}.{column.name}")
+            # Index mới khai báo trên bảng cũ
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=connection, checkfirst=True)
+                    print(f"✅ Đã tạo index {index.name}")
+
+# Tokenizer unicode61 bỏ dấu tiếng Việt (á, ạ, ơ... -> a, o) nhưng không coi "đ" là "d" có dấu,
+# nên "đ" được đổi sang "d" trước khi đưa vào index (phía truy vấn làm tương tự)
+def _fold_sql(expression: str) -> str:
+    return f"replace(replace(coalesce({expression}, ''), 'đ', 'd'), 'Đ', 'D')"
+
+SEARCH_INDEX_DDL = [
+    # rowid = articles.id; nội dung tìm kiếm gồm tiêu đề, đoạn trích và tóm tắt/từ khóa AI
+    """CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+        title, summary, ai_summary, keywords,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN
+        INSERT INTO articles_fts(rowid, title, summary, ai_summary, keywords)
+        VALUES (new.id, {_fold_sql('new.title')}, {_fold_sql('new.summary')}, '', '');
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE OF title, summary ON articles BEGIN
+        UPDATE articles_fts SET title = {_fold_sql('new.title')}, summary = {_fold_sql('new.summary')}
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN
+        DELETE FROM articles_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ai_analysis_fts_ai AFTER INSERT ON ai_analysis BEGIN
+        UPDATE articles_fts SET ai_summary = {_fold_sql('new.summary')}, keywords = {_fold_sql('new.keywords_extracted')}
+        WHERE rowid = new.article_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ai_analysis_fts_au AFTER UPDATE OF summary, keywords_extracted ON ai_analysis BEGIN
+        UPDATE articles_fts SET ai_summary = {_fold_sql('new.summary')}, keywords = {_fold_sql('new.keywords_extracted')}
+        WHERE rowid = new.article_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS ai_analysis_fts_ad AFTER DELETE ON ai_analysis BEGIN
+        UPDATE articles_fts SET ai_summary = '', keywords = '' WHERE rowid = old.article_id;
+    END""",
+]
+
+def rebuild_search_index(connection):
+    """Đổ lại toàn bộ index tìm kiếm từ articles + ai_analysis"""
+    connection.execute(text("DELETE FROM articles_fts"))
+    connection.execute(text(f"""
+        INSERT INTO articles_fts(rowid, title, summary, ai_summary, keywords)
+        SELECT a.id, {_fold_sql('a.title')}, {_fold_sql('a.summary')},
+               {_fold_sql('ai.summary')}, {_fold_sql('ai.keywords_extracted')}
+        FROM articles a LEFT JOIN ai_analysis ai ON ai.article_id = a.id
+    """))
+
+def create_search_index():
+    """Tạo bảng FTS5 + trigger đồng bộ; lần đầu tạo thì nạp dữ liệu đã có"""
+    with engine.begin() as connection:
+        existed = inspect(connection).has_table("articles_fts")
+        for statement in SEARCH_INDEX_DDL:
+            connection.execute(text(statement))
+        if not existed:
+            rebuild_search_index(connection)
+            print("✅ Đã tạo index tìm kiếm FTS5 articles_fts")
+
+def _bump_sql(scope: str, key: str, delta: int) -> str:
+    return (
+        f"INSERT INTO article_counters(scope, key, count) VALUES ('{scope}', {key}, {delta}) "
+        f"ON CONFLICT(scope, key) DO UPDATE SET count = count + {delta};"
+    )
+
+_CATEGORY_KEY = "coalesce({}.category, '')"
+
+COUNTER_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS articles_counter_ai AFTER INSERT ON articles BEGIN
+        {_bump_sql('total', "''", 1)}
+        {_bump_sql('source', 'new.source_url', 1)}
+        {_bump_sql('day', 'date(new.created_at)', 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS articles_counter_ad AFTER DELETE ON articles BEGIN
+        {_bump_sql('total', "''", -1)}
+        {_bump_sql('source', 'old.source_url', -1)}
+        {_bump_sql('day', 'date(old.created_at)', -1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS articles_counter_au AFTER UPDATE OF source_url, created_at ON articles BEGIN
+        {_bump_sql('source', 'old.source_url', -1)}
+        {_bump_sql('day', 'date(old.created_at)', -1)}
+        {_bump_sql('source', 'new.source_url', 1)}
+        {_bump_sql('day', 'date(new.created_at)', 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ai_analysis_counter_ai AFTER INSERT ON ai_analysis BEGIN
+        {_bump_sql('category', _CATEGORY_KEY.format('new'), 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ai_analysis_counter_ad AFTER DELETE ON ai_analysis BEGIN
+        {_bump_sql('category', _CATEGORY_KEY.format('old'), -1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ai_analysis_counter_au AFTER UPDATE OF category ON ai_analysis BEGIN
+        {_bump_sql('category', _CATEGORY_KEY.format('old'), -1)}
+        {_bump_sql('category', _CATEGORY_KEY.format('new'), 1)}
+    END""",
+]
+
+def rebuild_article_counters(connection):
+    """Tính lại toàn bộ bộ đếm từ articles + ai_analysis (khi mới tạo trigger hoặc nghi bị lệch)"""
+    connection.execute(text("DELETE FROM article_counters"))
+    connection.execute(text("""
+        INSERT INTO article_counters(scope, key, count)
+        SELECT 'total', '', count(*) FROM articles
+        UNION ALL SELECT 'source', source_url, count(*) FROM articles GROUP BY source_url
+        UNION ALL SELECT 'day', date(created_at), count(*) FROM articles GROUP BY date(created_at)
+        UNION ALL SELECT 'category', coalesce(category, ''), count(*) FROM ai_analysis GROUP BY coalesce(category, '')
+    """))
+
+def create_counter_triggers():
+    """Tạo trigger bộ đếm; lần đầu (DB cũ chưa có trigger) thì tính bộ đếm từ dữ liệu đã có"""
+    with engine.begin() as connection:
+        existed = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'articles_counter_ai'")
+        ).first() is not None
+        for statement in COUNTER_DDL:
+            connection.execute(text(statement))
+        if not existed:
+            rebuild_article_counters(connection)
+            print("✅ Đã tạo bộ đếm article_counters")
+
+# Các bảng có số phiên bản dữ liệu (cache response đọc từ các bảng này)
+DATA_VERSION_TABLES = ("articles", "ai_analysis", "companies", "company_metrics")
+
+# Cột mà response/export hiển thị: UPDATE chỉ tăng phiên bản khi một trong các cột này đổi giá trị.
+# Không có trong danh sách: thông tin nội bộ (lease_owner, lease_until, processing_state,
+# state_updated_at, simhash, body_compressed) để worker xử lý bài không làm cache hết hạn.
+# Bảng không có ở đây: mọi UPDATE đều tăng phiên bản.
+DATA_VERSION_WATCHED_COLUMNS = {
+    "articles": (
+        "title", "url", "summary", "published_date_str", "source_url", "content_hash",
+        "duplicate_of_id", "created_at", "updated_at",
+    ),
+    "ai_analysis": (
+        "article_id", "summary", "category", "sentiment_score", "impact_score",
+        "keywords_extracted", "analysis_metadata", "created_at", "updated_at",
+    ),
+}
+
+def _version_ddl(table: str) -> list:
+    bump = (
+        f"INSERT INTO data_versions(name, version) VALUES ('{table}', 1) "
+        f"ON CONFLICT(name) DO UPDATE SET version = version + 1;"
+    )
+    columns = DATA_VERSION_WATCHED_COLUMNS.get(table)
+    if columns:
+        # IS NOT so sánh được cả NULL; cột bị SET lại đúng giá trị cũ thì không tính là đổi
+        changed = " OR ".join(f"new.{column} IS NOT old.{column}" for column in columns)
+        update_event = f"UPDATE OF {', '.join(columns)} ON {table} WHEN {changed}"
+    else:
+        update_event = f"UPDATE ON {table}"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_ai AFTER INSERT ON {table} BEGIN {bump} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_au AFTER {update_event} BEGIN {bump} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_ad AFTER DELETE ON {table} BEGIN {bump} END",
+    ]
+
+def create_data_version_triggers():
+    """
+    Tạo trigger tăng data_versions cho các bảng đã tồn tại. Trigger UPDATE luôn được tạo lại
+    để database cũ nhận danh sách cột theo dõi mới nhất.
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in DATA_VERSION_TABLES:
+            if not inspector.has_table(table):
+                continue
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {table}_version_au"))
+            for statement in _version_ddl(table):
+                connection.execute(text(statement))
+
 # Hàm khởi tạo database
 def init_db():
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    create_search_index()
+    create_counter_triggers()
+    create_data_version_triggers()
     print("✅ Database tables created successfully!")
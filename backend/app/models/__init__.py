@@ -3,3 +3,7 @@ from . import article_model
 from . import crawl_source_model
 from . import watchlist_model
 from . import ai_analysis_model
+from . import job_model
+from . import leader_lease_model
+from . import article_counter_model
+from . import data_version_model
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+class ArticleCounter(Base):
+    """
+    Bộ đếm article, do trigger SQLite cập nhật trong cùng transaction với INSERT/DELETE
+    (xem COUNTER_DDL trong database.py) nên đọc số lượng không phải quét bảng articles.
+    """
+    __tablename__ = "article_counters"
+    
+    scope = Column(String, primary_key=True)  # 'total', 'source', 'category', 'day'
+    key = Column(String, primary_key=True)  # '' (total), source_url, category AI, ngày 'YYYY-MM-DD' (UTC)
+    count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<ArticleCounter(scope='{self.scope}', key='{self.key}', count={self.count})>"
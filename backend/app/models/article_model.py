@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, LargeBinary, Index, ForeignKey
 from datetime import datetime
 from app.database import Base
 from sqlalchemy.orm import relationship
@@ -13,9 +13,24 @@ class Article(Base):
     published_date_str = Column(String, nullable=True)
     source_url = Column(String, nullable=False)
     content_hash = Column(String, nullable=True, index=True)
+    body_compressed = Column(LargeBinary, nullable=True)  # Nội dung đầy đủ, nén zlib
+    simhash = Column(Integer, nullable=True)  # SimHash 64-bit (có dấu) của tiêu đề + đoạn trích
+    # Bài gốc nếu bài này là bản đăng lại/sửa tiêu đề của tin đã có
+    duplicate_of_id = Column(Integer, ForeignKey("articles.id"), nullable=True, index=True)
+    # Trạng thái xử lý: 'stored' -> 'analyzed' -> 'notified' (xem article_state_crud)
+    processing_state = Column(String, nullable=True, default="stored")
+    state_updated_at = Column(DateTime, nullable=True, default=datetime.utcnow)
+    lease_owner = Column(String, nullable=True)  # Worker đang xử lý stage hiện tại
+    lease_until = Column(DateTime, nullable=True)  # Hết hạn thì worker khác được nhận
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_articles_processing_state", "processing_state", "state_updated_at"),
+        # Phân trang keyset theo (created_at, id)
+        Index("ix_articles_created_at_id", "created_at", "id"),
+    )
+
     ai_analysis = relationship(
         "ArticleAIAnalysis", 
         back_populates="article", 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float
 from datetime import datetime
 from app.database import Base
 
@@ -7,16 +7,24 @@ class CrawlSource(Base):
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String, nullable=False, index=True)  # Tên nguồn (VD: "VnExpress - Doanh nghiệp")
-    url = Column(String, nullable=False)  # URL cần crawl
-    article_container_selector = Column(String, nullable=False)  # Selector chứa bài viết
-    title_selector = Column(String, nullable=False)  # Selector tiêu đề
-    link_selector = Column(String, nullable=False)  # Selector link
+    url = Column(String, nullable=False)  # URL cần crawl (trang HTML hoặc URL feed RSS/Atom)
+    source_type = Column(String, default="html", nullable=True)  # 'html' (CSS selector) hoặc 'feed' (RSS/Atom)
+    article_container_selector = Column(String, nullable=True)  # Selector chứa bài viết (bắt buộc với 'html')
+    title_selector = Column(String, nullable=True)  # Selector tiêu đề (bắt buộc với 'html')
+    link_selector = Column(String, nullable=True)  # Selector link (bắt buộc với 'html')
     summary_selector = Column(String, nullable=True)  # Selector tóm tắt
     date_selector = Column(String, nullable=True)  # Selector ngày tháng
     is_active = Column(Boolean, default=True, nullable=False)  # Có hoạt động không
     last_crawled_at = Column(DateTime, nullable=True)  # Lần crawl cuối
+    etag = Column(String, nullable=True)  # ETag của lần fetch cuối (conditional GET)
+    last_modified = Column(String, nullable=True)  # Header Last-Modified của lần fetch cuối
+    last_content_length = Column(Integer, nullable=True)  # Kích thước trang lần fetch cuối (bytes)
+    next_crawl_at = Column(DateTime, nullable=True, index=True)  # Lần crawl kế tiếp (lịch thích ứng)
+    crawl_interval_minutes = Column(Float, nullable=True)  # Khoảng cách crawl hiện tại đã học được
+    publish_rate_per_hour = Column(Float, nullable=True)  # Tốc độ đăng bài ước lượng (EWMA, bài/giờ)
+    seen_urls = Column(Text, nullable=True)  # JSON list các URL đã thấy gần đây (mới nhất trước) cho crawl incremental
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
-        return f"<CrawlSource(id={self.id}, name='{self.name}', active={self.is_active})>"
+        return f"<CrawlSource(id={self.id}, name='{self.name}', type='{self.source_type}', active={self.is_active})>"
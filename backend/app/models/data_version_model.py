@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+class DataVersion(Base):
+    """
+    Số phiên bản dữ liệu của từng bảng trong DATA_VERSION_TABLES, do trigger SQLite
+    (_version_ddl trong database.py) tăng trong cùng transaction với mọi INSERT/DELETE và với
+    UPDATE làm đổi giá trị một cột trong DATA_VERSION_WATCHED_COLUMNS (bảng không khai báo cột
+    thì mọi UPDATE đều tính). Cache response so số này để biết dữ liệu đã đổi, kể cả khi process khác ghi.
+    """
+    __tablename__ = "data_versions"
+    
+    name = Column(String, primary_key=True)  # Tên bảng: 'articles', 'ai_analysis', 'companies', 'company_metrics'
+    version = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DataVersion(name='{self.name}', version={self.version})>"
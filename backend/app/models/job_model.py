@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+from app.database import Base
+
+class Job(Base):
+    """Job trong hàng đợi bền vững (SQLite) - VD: phân tích AI cho một article"""
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    job_type = Column(String, nullable=False, index=True)  # VD: 'analyze_article'
+    payload = Column(Text, nullable=False, default="{}")  # JSON tham số của job
+    dedup_key = Column(String, nullable=True, unique=True)  # Tránh enqueue trùng (VD: 'analyze_article:42')
+    status = Column(String, nullable=False, default="pending")  # 'pending', 'running', 'done', 'failed'
+    attempts = Column(Integer, nullable=False, default=0)  # Số lần đã được claim
+    max_attempts = Column(Integer, nullable=False, default=5)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # Thời điểm được phép chạy (retry backoff)
+    locked_by = Column(String, nullable=True)  # Worker đang giữ job
+    locked_until = Column(DateTime, nullable=True)  # Hết hạn lease: worker chết thì job được claim lại
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_jobs_status_available_at", "status", "available_at"),
+    )
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, type='{self.job_type}', status='{self.status}', attempts={self.attempts})>"
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from app.database import Base
+
+class LeaderLease(Base):
+    """Khóa bầu leader giữa các process (VD: uvicorn --workers N): chỉ một process giữ lease còn hạn"""
+    __tablename__ = "leader_leases"
+    
+    name = Column(String, primary_key=True)  # Vai trò cần leader, VD: 'scheduler'
+    owner = Column(String, nullable=False)  # Process đang là leader (host:pid:id)
+    lease_until = Column(DateTime, nullable=False)  # Leader không gia hạn trước thời điểm này thì process khác được nhận
+    acquired_at = Column(DateTime, default=datetime.utcnow)  # Thời điểm owner hiện tại trở thành leader
+    heartbeat_at = Column(DateTime, default=datetime.utcnow)  # Lần gia hạn gần nhất
+    
+    def __repr__(self):
+        return f"<LeaderLease(name='{self.name}', owner='{self.owner}', lease_until='{self.lease_until}')>"
@@ -1,8 +1,7 @@
 # app/scheduler_script.py
-import requests
+import asyncio
 import json
 import time
-import schedule
 from datetime import datetime
 from typing import List, Dict, Optional
 import sys
@@ -14,98 +13,161 @@ backend_dir = os.path.dirname(current_dir)
 sys.path.insert(0, backend_dir)
 
 # Bây giờ có thể import bình thường
-from app.services.generic_crawler import scrape_news_from_website
+from app.services.crawl_engine import crawl_sources_concurrently
+from app.services.generic_crawler import merge_seen_urls
+from app.services.crawl_scheduling import is_source_due, plan_next_crawl
 from setup_sample_sources import main as source_setup
 from setup_watchlist import main as watchlist_setup
 from setup_company import main as company_setup
 from app.services.notification_service import test_telegram_connection
 from app.services.financial_api_service import fetch_all_active_company_metrics
+from app.services.ingestion_service import API_BASE_URL, ingestion_service
+from app.services.pipeline_scheduler import PipelineScheduler, pipeline_scheduler
+from app.services.leader_election import scheduler_leader
+from app.database import SessionLocal
+from app.crud import article_crud, job_crud
 
-API_BASE_URL = "https://stock-news-tracker-production.up.railway.app/api/v1"
-
-def post_article_to_api(article_data: dict) -> Optional[Dict]:
-    """Gửi bài báo đã crawl lên API để lưu trữ."""
-    payload = {
-        "title": article_data.get("title"),
-        "url": article_data.get("url"),
-        "summary": article_data.get("summary"),
-        "published_date_str": article_data.get("published_date_str") or article_data.get("collected_at_iso"),
-        "source_url": article_data.get("source_page")
-    }
-    
-    payload = {k: v for k, v in payload.items() if v is not None}
+# Crawl incremental: lấy tối đa N bài mỗi nguồn, dừng ở bài đã thấy ở lần trước
+INCREMENTAL_CRAWL = os.getenv("CRAWL_INCREMENTAL", "true").lower() == "true"
+MAX_ARTICLES_PER_SOURCE = int(os.getenv("CRAWL_MAX_ARTICLES_PER_SOURCE", "30"))
 
-    try:
-        response = requests.post(f"{API_BASE_URL}/articles", json=payload)
-        response.raise_for_status()
-        
-        created_article = response.json()
-        print(f"✅ Posted article to DB: '{payload.get('title')[:50]}...' (ID: {created_article.get('id')})")
-        return created_article
-        
-    except Exception as e:
-        print(f"❌ Lỗi khi post bài báo: {e}")
-        return None
+# Chu kỳ kiểm tra các nguồn tới lịch crawl (lịch của từng nguồn do crawl_scheduling tính)
+CRAWL_CHECK_INTERVAL_MINUTES = int(os.getenv("CRAWL_CHECK_INTERVAL_MINUTES", "5"))
+COMPANY_METRICS_INTERVAL_HOURS = float(os.getenv("COMPANY_METRICS_INTERVAL_HOURS", "3"))
+MAINTENANCE_INTERVAL_MINUTES = float(os.getenv("MAINTENANCE_INTERVAL_MINUTES", "60"))
+# Cộng ngẫu nhiên tối đa N giây vào mỗi chu kỳ để các pipeline không chạy dồn cùng lúc
+SCHEDULER_JITTER_SECONDS = float(os.getenv("SCHEDULER_JITTER_SECONDS", "30"))
+# Job đã xong/thất bại được giữ lại N ngày để tra cứu
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+
+def post_articles(articles: List[Dict]) -> List[Optional[Dict]]:
+    """Lưu các bài báo đã crawl (trực tiếp vào DB hoặc qua API tùy INGESTION_MODE)."""
+    created_articles = ingestion_service.ingest_articles(articles)
+    for article_data, created_article in zip(articles, created_articles):
+        if created_article:
+            status = "mới" if created_article.get('status') == "created" else "đã có"
+            print(f"✅ Posted article to DB ({status}): '{article_data.get('title', '')[:50]}...' (ID: {created_article.get('id')})")
+    return created_articles
 
-def update_source_last_crawled(source_id: int) -> bool:
-    """Cập nhật thời gian crawl cuối cho nguồn."""
+def update_source_last_crawled(
+    source_id: int,
+    crawl_result: Optional[Dict] = None,
+    seen_urls: Optional[List[str]] = None,
+    crawl_schedule: Optional[Dict] = None
+) -> bool:
+    """Cập nhật thời gian crawl cuối (validator ETag/Last-Modified, URL đã thấy, lịch crawl kế tiếp nếu có) cho nguồn."""
     try:
         payload = {"last_crawled_at": datetime.now().isoformat()}
-        response = requests.put(f"{API_BASE_URL}/crawl-sources/{source_id}", json=payload)
-        response.raise_for_status()
-        return True
+        if seen_urls is not None:
+            payload["seen_urls"] = seen_urls
+        if crawl_schedule:
+            payload.update({
+                "next_crawl_at": crawl_schedule["next_crawl_at"].isoformat(),
+                "crawl_interval_minutes": crawl_schedule["crawl_interval_minutes"],
+                "publish_rate_per_hour": crawl_schedule["publish_rate_per_hour"],
+            })
+        if crawl_result and not crawl_result.get('error'):
+            payload.update({
+                "etag": crawl_result.get('etag'),
+                "last_modified": crawl_result.get('last_modified'),
+                "last_content_length": crawl_result.get('content_length'),
+            })
+        return ingestion_service.update_source(source_id, payload)
     except Exception as e:
         print(f"❌ Lỗi khi cập nhật nguồn {source_id}: {e}")
         return False
 
-def fetch_and_process_all_active_sources():
-    """Lấy và xử lý tin tức từ các nguồn đang hoạt động."""
+def fetch_and_process_all_active_sources(due_only: bool = False):
+    """Lấy và xử lý tin tức từ các nguồn đang hoạt động (due_only: chỉ các nguồn đã tới lịch crawl)."""
     print(f"\n🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Bắt đầu chu kỳ xử lý...")
     
     try:
-        response = requests.get(f"{API_BASE_URL}/crawl-sources", params={"is_active": True})
-        response.raise_for_status()
-        sources = response.json()
+        sources = ingestion_service.get_active_sources()
         print(f"📊 Tìm thấy {len(sources)} nguồn đang hoạt động.")
         
+        if due_only:
+            sources = [source for source in sources if is_source_due(source)]
+            print(f"⏰ {len(sources)} nguồn đã tới lịch crawl.")
+            if not sources:
+                return
+        
         total_new_articles = 0
         
-        for source in sources:
-            print(f"\n🔍 Đang crawl: {source['name']}")
+        # 1. CRAWL TẤT CẢ NGUỒN ĐỒNG THỜI
+        max_articles = MAX_ARTICLES_PER_SOURCE if INCREMENTAL_CRAWL else 1
+        crawl_summary = crawl_sources_concurrently(
+            sources,
+            max_articles=max_articles,
+            incremental=INCREMENTAL_CRAWL
+        )
+        
+        for result in crawl_summary['results']:
+            # Mất vai trò leader / đang tắt: không ghi tiếp để không chạy trùng với leader mới
+            if pipeline_scheduler.stop_requested:
+                print("⏹️ Scheduler đang dừng, bỏ qua các nguồn còn lại")
+                break
+            source = result['source']
+            scraped_articles = result['articles']
             
-            # 1. CRAWL TIN TỨC
-            scraped_articles = scrape_news_from_website(
-                page_url=source['url'],
-                article_container_selector=source['article_container_selector'],
-                title_selector=source['title_selector'],
-                link_selector=source['link_selector'],
-                summary_selector=source.get('summary_selector'),
-                date_selector=source.get('date_selector'),
-                source_name=source['name'],
-                max_articles=1
+            # Lịch crawl kế tiếp theo tốc độ đăng bài quan sát được
+            crawl_schedule = plan_next_crawl(
+                source,
+                new_articles=len(scraped_articles),
+                max_articles=max_articles,
+                failed=result['error'] is not None
             )
+            print(
+                f"\n🔍 {source['name']}: {len(scraped_articles)} bài "
+                f"(chờ {result['wait_seconds']:.2f}s, fetch {result['fetch_seconds']:.2f}s, "
+                f"parse {result['parse_seconds']:.2f}s, nội dung {result['body_seconds']:.2f}s, "
+                f"tổng {result['total_seconds']:.2f}s)"
+            )
+            
+            if result['error']:
+                print(f"   ❌ Lỗi khi crawl {source['name']}: {result['error']}")
+                update_source_last_crawled(source['id'], result, crawl_schedule=crawl_schedule)
+                continue
+            
+            if result['not_modified']:
+                print(f"   ♻️ Trang không thay đổi (304), tiết kiệm ~{result['bytes_saved']} bytes")
+                update_source_last_crawled(source['id'], result, crawl_schedule=crawl_schedule)
+                continue
             
             if not scraped_articles:
                 print(f"   ⚠️ Không tìm thấy bài viết mới nào từ {source['name']}")
-                update_source_last_crawled(source['id'])
+                update_source_last_crawled(source['id'], result, crawl_schedule=crawl_schedule)
                 continue
 
             # 2. LƯU BÀI BÁO (AI sẽ được xử lý tự động trong article_crud.py)
             new_articles_count_for_source = 0
-            for article in scraped_articles:
-                created_article = post_article_to_api(article)
-                
+            stored_urls = []
+            for article, created_article in zip(scraped_articles, post_articles(scraped_articles)):
                 if created_article:
                     new_articles_count_for_source += 1
+                    stored_urls.append(article['url'])
                     print(f"   📝 Bài viết sẽ được phân tích AI tự động trong backend")
+                else:
+                    # Không đánh dấu các bài phía trên bài lỗi, để lần sau crawl không dừng trước nó
+                    stored_urls = []
             
             total_new_articles += new_articles_count_for_source
             
-            # 3. CẬP NHẬT THỜI GIAN CRAWL CUỐI
-            update_source_last_crawled(source['id'])
-            
-            time.sleep(2)
+            # 3. CẬP NHẬT THỜI GIAN CRAWL CUỐI (+ URL đã thấy)
+            seen_urls = merge_seen_urls(stored_urls, source.get('seen_urls')) if INCREMENTAL_CRAWL else None
+            update_source_last_crawled(source['id'], result, seen_urls, crawl_schedule)
+            print(f"   ⏭️ Lần crawl kế tiếp sau {crawl_schedule['crawl_interval_minutes']:.0f} phút")
         
+        print(
+            f"\n⏱️ Crawl {crawl_summary['total_sources']} nguồn trong {crawl_summary['cycle_seconds']:.2f}s "
+            f"(tổng thời gian từng nguồn: {crawl_summary['sum_source_seconds']:.2f}s, "
+            f"lỗi: {crawl_summary['error_count']})"
+        )
+        print(
+            f"♻️ {crawl_summary['not_modified_count']} nguồn không đổi (304): "
+            f"tải {crawl_summary['bytes_downloaded']} bytes, tiết kiệm ~{crawl_summary['bytes_saved']} bytes"
+        )
+        if crawl_summary['total_bodies']:
+            print(f"📰 Đã tải nội dung đầy đủ của {crawl_summary['total_bodies']} bài")
         print(f"\n🎉 Hoàn thành chu kỳ: {total_new_articles} bài báo mới đã được xử lý.")
         
     except Exception as e:
@@ -113,26 +175,20 @@ def fetch_and_process_all_active_sources():
 
 def check_api_connection(max_retries: int = 5, wait_seconds: int = 2) -> bool:
     """
-    Kiểm tra xem API đã sẵn sàng chưa bằng cách gửi GET đến một endpoint tồn tại.
-    Tránh dùng POST nếu không muốn tạo dữ liệu sample.
+    Kiểm tra nơi ghi dữ liệu đã sẵn sàng chưa: database (local) hoặc API (http).
+    Với http, gửi GET đến một endpoint tồn tại, tránh POST để không tạo dữ liệu sample.
     """
-    health_url = f"{API_BASE_URL}/articles/count"
+    target = API_BASE_URL if ingestion_service.mode == "http" else "database"
     
     for attempt in range(1, max_retries + 1):
-        try:
-            print(f"🔎 Kiểm tra API lần {attempt}... ({health_url})")
-            response = requests.get(health_url, timeout=5)
-            if response.status_code == 200:
-                print("✅ API đã sẵn sàng!")
-                return True
-            else:
-                print(f"⚠️ Phản hồi không hợp lệ: {response.status_code}")
-        except Exception as e:
-            print(f"⚠️ Kết nối thất bại: {e}")
+        print(f"🔎 Kiểm tra kết nối lần {attempt}... ({ingestion_service.mode}: {target})")
+        if ingestion_service.check_connection():
+            print("✅ Đã sẵn sàng!")
+            return True
         
         time.sleep(wait_seconds)
     
-    print("❌ API chưa sẵn sàng sau nhiều lần thử.")
+    print("❌ Chưa sẵn sàng sau nhiều lần thử.")
     return False
 
 def fetch_company_metrics():
@@ -144,7 +200,7 @@ def fetch_company_metrics():
     
     try:
         # 🔥 GỌI SERVICE THAY VÌ SETUP_COMPANY
-        summary = fetch_all_active_company_metrics()
+        summary = fetch_all_active_company_metrics(should_stop=lambda: pipeline_scheduler.stop_requested)
         
         if summary['success_count'] > 0:
             print(f"✅ SCHEDULER: Thành công fetch metrics cho {summary['success_count']} companies")
@@ -160,42 +216,62 @@ def fetch_company_metrics():
     except Exception as e:
         print(f"❌ SCHEDULER: Lỗi khi gọi Financial API Service: {e}")
 
-def gather_data():
-    fetch_and_process_all_active_sources()
-    fetch_company_metrics()
+def run_maintenance():
+    """Dọn job đã xong quá hạn, xếp hàng lại article xử lý dở"""
+    print(f"\n🧹 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Bảo trì hàng đợi...")
+    with SessionLocal() as db:
+        purged = job_crud.purge_finished_jobs(db, older_than_days=JOB_RETENTION_DAYS)
+        resumed = article_crud.resume_stalled_articles(db)
+    print(f"🧹 Đã xóa {purged} job cũ, xếp hàng lại {resumed} article")
 
+def fetch_due_sources():
+    fetch_and_process_all_active_sources(due_only=True)
 
-def main():
-
+def bootstrap_scheduler() -> bool:
+    """Chuẩn bị trước khi chạy pipeline: kiểm tra kết nối, dữ liệu mẫu, Telegram"""
     print("=" * 80)
     print("🤖 STOCK NEWS TRACKER SCHEDULER (with Gemini AI)")
     print("=" * 80)
 
-    time.sleep(10)
-
     if not check_api_connection():
-        return
+        return False
 
     source_setup()
     watchlist_setup()
     company_setup()
     test_telegram_connection()
-        
-    # Lập lịch
-    schedule.every(3).hours.do(gather_data)
-    
-    print("⏰ Scheduler đã khởi động. Lịch: Mỗi 3 tiếng.")
     print("🤖 AI phân tích sẽ được thực hiện tự động trong backend.")
-    
-    # Chạy ngay lần đầu để test
-    print("\n🚀 Chạy chu kỳ đầu tiên ngay bây giờ...")
-    gather_data()
-    
-    # Vòng lặp chính
+    return True
+
+def register_pipeline_jobs(scheduler: PipelineScheduler = pipeline_scheduler) -> PipelineScheduler:
+    """
+    Lập lịch: tin tức theo lịch thích ứng của từng nguồn, metrics mỗi 3 tiếng, bảo trì mỗi giờ.
+    Tin tức và metrics chạy song song, độc lập nhau; cả hai chạy ngay lần đầu.
+    """
+    scheduler.add_job("news", fetch_due_sources, CRAWL_CHECK_INTERVAL_MINUTES * 60, SCHEDULER_JITTER_SECONDS)
+    scheduler.add_job("metrics", fetch_company_metrics, COMPANY_METRICS_INTERVAL_HOURS * 3600, SCHEDULER_JITTER_SECONDS)
+    scheduler.add_job(
+        "maintenance", run_maintenance, MAINTENANCE_INTERVAL_MINUTES * 60, SCHEDULER_JITTER_SECONDS,
+        run_on_start=False
+    )
+    return scheduler
+
+async def run_forever():
+    """Chạy scheduler độc lập (không kèm API); vẫn tranh cử để không chạy trùng với API"""
+    register_pipeline_jobs()
+    scheduler_leader.start(
+        on_elected=lambda: pipeline_scheduler.start(bootstrap=bootstrap_scheduler),
+        on_demoted=pipeline_scheduler.stop,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await scheduler_leader.stop()
+        await pipeline_scheduler.stop()
+
+def main():
     try:
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+        asyncio.run(run_forever())
     except KeyboardInterrupt:
         print("\n👋 Đã dừng scheduler.")
 
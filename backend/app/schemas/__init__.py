@@ -3,3 +3,4 @@ from . import article_schema
 from . import crawl_source_schema  
 from . import watchlist_schema
 from . import ai_analysis_schema
+from . import job_schema
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class ArticleBase(BaseModel):
@@ -10,12 +10,33 @@ class ArticleBase(BaseModel):
     source_url: str
 
 class ArticleCreate(ArticleBase):
-    pass
+    body: Optional[str] = None  # Nội dung đầy đủ (nếu crawler đã tải), lưu dạng nén
 
 class ArticleInDB(ArticleBase):
     id: int
     content_hash: Optional[str] = None
+    duplicate_of_id: Optional[int] = None  # Bài gốc nếu là tin đăng lại
     created_at: datetime
     updated_at: datetime
     
     model_config = ConfigDict(from_attributes=True)
+
+class ArticleSearchResult(ArticleInDB):
+    rank: float  # Điểm bm25, càng nhỏ càng liên quan
+
+
+class ArticleBulkCreate(BaseModel):
+    articles: List[ArticleCreate] = Field(..., max_length=1000)
+
+class ArticleBulkItemResult(BaseModel):
+    index: int
+    url: str
+    status: Literal["created", "duplicate"]
+    id: Optional[int] = None
+    duplicate_reason: Optional[Literal["url", "content_hash", "batch"]] = None
+    duplicate_of_id: Optional[int] = None  # Bài mới nhưng gần giống bài gốc này, không phân tích lại
+
+class ArticleBulkResult(BaseModel):
+    created_count: int
+    duplicate_count: int
+    items: List[ArticleBulkItemResult]
@@ -1,23 +1,44 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+from typing import Optional, List, Literal
 from datetime import datetime
+import json
+
+SourceType = Literal["html", "feed"]
 
 class CrawlSourceBase(BaseModel):
     name: str
     url: str
-    article_container_selector: str
-    title_selector: str
-    link_selector: str
+    source_type: SourceType = "html"
+    article_container_selector: Optional[str] = None
+    title_selector: Optional[str] = None
+    link_selector: Optional[str] = None
     summary_selector: Optional[str] = None
     date_selector: Optional[str] = None
     is_active: bool = True
+    
+    @field_validator('source_type', mode='before')
+    @classmethod
+    def default_source_type(cls, v):
+        """Nguồn cũ chưa có source_type được coi là 'html'"""
+        return v or "html"
 
 class CrawlSourceCreate(CrawlSourceBase):
-    pass
+    @model_validator(mode='after')
+    def check_html_selectors(self):
+        """Nguồn HTML bắt buộc có selector container, tiêu đề và link"""
+        if self.source_type == "html":
+            missing = [
+                field for field in ('article_container_selector', 'title_selector', 'link_selector')
+                if not getattr(self, field)
+            ]
+            if missing:
+                raise ValueError(f"Nguồn HTML thiếu selector: {', '.join(missing)}")
+        return self
 
 class CrawlSourceUpdate(BaseModel):
     name: Optional[str] = None
     url: Optional[str] = None
+    source_type: Optional[SourceType] = None
     article_container_selector: Optional[str] = None
     title_selector: Optional[str] = None
     link_selector: Optional[str] = None
@@ -25,11 +46,39 @@ class CrawlSourceUpdate(BaseModel):
     date_selector: Optional[str] = None
     is_active: Optional[bool] = None
     last_crawled_at: Optional[datetime] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    last_content_length: Optional[int] = None
+    seen_urls: Optional[List[str]] = None
+    next_crawl_at: Optional[datetime] = None
+    crawl_interval_minutes: Optional[float] = None
+    publish_rate_per_hour: Optional[float] = None
 
 class CrawlSourceInDB(CrawlSourceBase):
     id: int
     last_crawled_at: Optional[datetime] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    last_content_length: Optional[int] = None
+    seen_urls: Optional[List[str]] = None
+    next_crawl_at: Optional[datetime] = None
+    crawl_interval_minutes: Optional[float] = None
+    publish_rate_per_hour: Optional[float] = None
     created_at: datetime
     updated_at: datetime
     
     model_config = ConfigDict(from_attributes=True)
+    
+    @field_validator('seen_urls', mode='before')
+    @classmethod
+    def parse_seen_urls(cls, v):
+        """Parse JSON string thành list nếu cần"""
+        if v is None:
+            return None
+        if isinstance(v, str):
+            try:
+                parsed = json.loads(v)
+                return parsed if isinstance(parsed, list) else None
+            except (json.JSONDecodeError, TypeError):
+                return None
+        return v
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import datetime
+
+class JobInDB(BaseModel):
+    id: int
+    job_type: str
+    payload: str  # JSON
+    status: str  # 'pending', 'running', 'done', 'failed'
+    attempts: int
+    max_attempts: int
+    available_at: datetime
+    locked_by: Optional[str] = None
+    locked_until: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    model_config = ConfigDict(from_attributes=True)
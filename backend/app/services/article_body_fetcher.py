@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import os
+import re
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+import lxml.html
+from lxml import etree
+
+from app.services.rate_limiter import THROTTLE_STATUS_CODES, HostRateLimiter
+
+# trafilatura cho chất lượng trích xuất tốt hơn (tùy chọn), không có thì dùng heuristic lxml
+try:
+    import trafilatura
+except ImportError:
+    trafilatura = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bật stage tải nội dung đầy đủ của bài viết (mặc định tắt)
+FETCH_ARTICLE_BODY = os.getenv("CRAWL_FETCH_ARTICLE_BODY", "false").lower() == "true"
+ARTICLE_BODY_CONCURRENCY = int(os.getenv("ARTICLE_BODY_CONCURRENCY", "8"))
+# Trang bài viết có nhịp riêng, không tranh token với trang danh sách
+ARTICLE_BODY_HOST_RATE = float(os.getenv("ARTICLE_BODY_HOST_RATE", "4"))
+ARTICLE_BODY_HOST_BURST = float(os.getenv("ARTICLE_BODY_HOST_BURST", "8"))
+ARTICLE_BODY_MAX_BYTES = int(os.getenv("ARTICLE_BODY_MAX_BYTES", str(3 * 1024 * 1024)))
+ARTICLE_BODY_MIN_CHARS = int(os.getenv("ARTICLE_BODY_MIN_CHARS", "200"))
+# Giới hạn độ dài nội dung gửi cho Gemini
+AI_CONTENT_MAX_CHARS = int(os.getenv("AI_CONTENT_MAX_CHARS", "6000"))
+
+# Thẻ không bao giờ chứa nội dung bài
+_BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "template", "iframe", "form", "button",
+    "nav", "header", "footer", "aside", "svg", "figure", "video",
+)
+# class/id của khối điều hướng, quảng cáo, bình luận, bài liên quan...
+_BOILERPLATE_PATTERN = re.compile(
+    r"comment|share|social|related|recommend|sidebar|breadcrumb|menu|navbar|banner|"
+    r"\bads?\b|advert|popup|subscribe|newsletter|footer|header|box-tag|author",
+    re.IGNORECASE,
+)
+# Khung nội dung quen thuộc (VnExpress: .fck_detail), ưu tiên trước khi dùng heuristic
+_CONTENT_XPATHS = (
+    etree.XPath("//*[@itemprop='articleBody']"),
+    etree.XPath("//*[contains(concat(' ', normalize-space(@class), ' '), ' fck_detail ')]"),
+    etree.XPath("//article"),
+)
+_TEXT_BLOCK_TAGS = {"p", "h2", "h3", "h4", "li", "blockquote", "pre"}
+_MIN_PARAGRAPH_CHARS = 25
+
+
+def _normalize_space(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _is_boilerplate(element) -> bool:
+    marker = f"{element.get('class', '')} {element.get('id', '')}"
+    return bool(marker.strip()) and _BOILERPLATE_PATTERN.search(marker) is not None
+
+
+def _strip_boilerplate(root):
+    """Xóa các khối menu/quảng cáo/bình luận nằm trong root (không xóa chính root)"""
+    for element in list(root.iter()):
+        if element is root or not isinstance(element.tag, str) or element.getparent() is None:
+            continue
+        if _is_boilerplate(element):
+            element.drop_tree()
+
+
+def _best_content_node(document):
+    """Khung nội dung đã biết, nếu không có thì chọn node cha có nhiều đoạn văn dài nhất"""
+    for xpath in _CONTENT_XPATHS:
+        matches = xpath(document)
+        if matches:
+            return max(matches, key=lambda node: len(node.text_content()))
+
+    # Heuristic: bỏ qua đoạn văn nằm trong khối boilerplate (bình luận, bài liên quan...)
+    scores: Dict[Any, float] = {}
+    for paragraph in document.iter("p"):
+        if any(_is_boilerplate(ancestor) for ancestor in paragraph.iterancestors()):
+            continue
+        length = len(_normalize_space(paragraph.text_content()))
+        if length < _MIN_PARAGRAPH_CHARS:
+            continue
+        parent = paragraph.getparent()
+        if parent is None:
+            continue
+        scores[parent] = scores.get(parent, 0) + length
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, 0) + length / 2
+    if not scores:
+        return document.find("body")
+    return max(scores, key=scores.get)
+
+
+def _extract_with_lxml(html: Union[str, bytes], encoding: str = "utf-8") -> Optional[str]:
+    try:
+        if isinstance(html, bytes):
+            document = lxml.html.document_fromstring(html, parser=lxml.html.HTMLParser(encoding=encoding))
+        else:
+            document = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+    for element in list(document.iter(*_BOILERPLATE_TAGS)):
+        if element.getparent() is not None:
+            element.drop_tree()
+
+    # Chọn khung nội dung trước rồi mới lọc theo class, vì khung bài viết
+    # có thể nằm trong khối có class giống boilerplate (VD: .sidebar-1 của VnExpress)
+    node = _best_content_node(document)
+    if node is None:
+        return None
+    _strip_boilerplate(node)
+
+    blocks = []
+    for element in node.iter(*_TEXT_BLOCK_TAGS):
+        # Bỏ <p> nằm trong <li>/<blockquote> đã lấy để không lặp chữ
+        if any(ancestor.tag in _TEXT_BLOCK_TAGS for ancestor in element.iterancestors() if ancestor is not node):
+            continue
+        text = _normalize_space(element.text_content())
+        if text:
+            blocks.append(text)
+    if not blocks:
+        blocks = [_normalize_space(node.text_content())]
+    return "\n".join(blocks)
+
+
+def extract_article_body(
+    html: Union[str, bytes], url: Optional[str] = None, encoding: str = "utf-8"
+) -> Optional[str]:
+    """
+    Trích phần nội dung chính của trang bài viết (bỏ menu, quảng cáo, bình luận...).
+    Hàm cấp module để chạy được trên parse process pool.
+    """
+    body = None
+    if trafilatura is not None:
+        try:
+            body = trafilatura.extract(
+                html, url=url, include_comments=False, include_tables=False, favor_precision=True
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ trafilatura lỗi với {url}: {e}")
+    if not body:
+        body = _extract_with_lxml(html, encoding)
+    if not body or len(body) < ARTICLE_BODY_MIN_CHARS:
+        return None
+    return body
+
+
+def compress_body(body: Optional[str]) -> Optional[bytes]:
+    """Nén nội dung bài để lưu DB (văn bản tiếng Việt thường giảm ~3 lần)"""
+    if not body:
+        return None
+    return zlib.compress(body.encode("utf-8"), 6)
+
+
+def decompress_body(data: Optional[bytes]) -> Optional[str]:
+    if not data:
+        return None
+    return zlib.decompress(data).decode("utf-8")
+
+
+def build_analysis_content(summary: Optional[str], body: Optional[str], max_chars: int = AI_CONTENT_MAX_CHARS) -> str:
+    """Nội dung đưa cho AI: ưu tiên toàn văn (cắt theo max_chars), không có thì dùng đoạn trích"""
+    if not body:
+        return summary or ""
+    if len(body) <= max_chars:
+        return body
+    cut = body.rfind("\n", 0, max_chars)
+    return body[:cut if cut > max_chars // 2 else max_chars]
+
+
+class ArticleBodyFetcher:
+    """
+    Tải trang chi tiết của các bài vừa crawl với số request đồng thời giới hạn,
+    trích nội dung trên parse process pool (không chặn event loop).
+    Tạo mới cho mỗi chu kỳ crawl vì semaphore gắn với event loop đang chạy.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        parse_pool: Optional[ProcessPoolExecutor] = None,
+        concurrency: int = ARTICLE_BODY_CONCURRENCY,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ):
+        self.client = client
+        self.parse_pool = parse_pool
+        self.rate_limiter = rate_limiter or article_body_rate_limiter
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_bodies(self, articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Gắn article['body'] cho từng bài (None nếu lỗi/không trích được), trả về thống kê"""
+        start = time.perf_counter()
+        sizes = await asyncio.gather(*(self._fetch_body(article) for article in articles))
+        return {
+            "body_count": len([a for a in articles if a.get("body")]),
+            "body_bytes_downloaded": sum(sizes),
+            "body_seconds": time.perf_counter() - start,
+        }
+
+    async def _fetch_body(self, article: Dict[str, Any]) -> int:
+        article["body"] = None
+        url = article.get("url")
+        if not url or not url.startswith("http"):
+            return 0
+
+        try:
+            await self.rate_limiter.acquire(url)
+            async with self._semaphore:
+                response = await self.client.get(url)
+            self.rate_limiter.record_response(url, response.status_code, response.headers.get("Retry-After"))
+            if response.status_code in THROTTLE_STATUS_CODES:
+                return 0
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            self.rate_limiter.record_error(url)
+            logger.warning(f"⚠️ Không tải được nội dung bài {url}: {e}")
+            return 0
+
+        content = response.content
+        encoding = response.encoding or "utf-8"
+        if len(content) > ARTICLE_BODY_MAX_BYTES:
+            logger.warning(f"⚠️ Bỏ qua trang quá lớn ({len(content)} bytes): {url}")
+            return len(content)
+
+        try:
+            if self.parse_pool is not None:
+                loop = asyncio.get_running_loop()
+                article["body"] = await loop.run_in_executor(self.parse_pool, extract_article_body, content, url, encoding)
+            else:
+                article["body"] = await asyncio.to_thread(extract_article_body, content, url, encoding)
+        except Exception as e:
+            logger.error(f"Lỗi khi trích nội dung bài {url}: {str(e)}")
+        return len(content)
+
+
+# Bộ giới hạn tốc độ dùng chung cho trang bài viết
+article_body_rate_limiter = HostRateLimiter(rate=ARTICLE_BODY_HOST_RATE, burst=ARTICLE_BODY_HOST_BURST)
@@ -0,0 +1,332 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from app.services.article_body_fetcher import FETCH_ARTICLE_BODY, ArticleBodyFetcher
+from app.services.feed_parser import FEED_ACCEPT_HEADER, parse_articles_from_feed
+from app.services.generic_crawler import DEFAULT_HEADERS, parse_articles_from_html
+from app.services.rate_limiter import THROTTLE_STATUS_CODES, HostRateLimiter, host_rate_limiter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Giới hạn số request đồng thời (toàn cục và theo từng host)
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("CRAWL_MAX_CONCURRENCY", "10"))
+DEFAULT_PER_HOST_CONCURRENCY = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", "2"))
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("CRAWL_TIMEOUT_SECONDS", "30"))
+DEFAULT_MAX_RETRIES = int(os.getenv("CRAWL_MAX_RETRIES", "2"))
+
+# Stage parse: số process parse (0 = parse trên thread, không dùng process pool)
+# và kích thước hàng đợi giữa stage fetch và stage parse
+DEFAULT_PARSE_WORKERS = int(os.getenv("CRAWL_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+DEFAULT_PARSE_QUEUE_SIZE = int(os.getenv("CRAWL_PARSE_QUEUE_SIZE", "8"))
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool(max_workers: int = DEFAULT_PARSE_WORKERS) -> Optional[ProcessPoolExecutor]:
+    """
+    Lấy process pool dùng cho stage parse (tạo lần đầu, dùng lại giữa các chu kỳ).
+    Dùng 'spawn' vì process cha (uvicorn) có nhiều thread, fork không an toàn.
+    """
+    global _parse_pool
+    if max_workers <= 0:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"🧵 Khởi tạo parse process pool với {max_workers} worker")
+        return _parse_pool
+
+
+def shutdown_parse_pool():
+    """Tắt process pool (gọi khi tắt ứng dụng)"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+            _parse_pool = None
+
+
+def build_request_headers(source: Dict[str, Any]) -> Dict[str, str]:
+    """Header riêng của nguồn: Accept cho feed và If-None-Match / If-Modified-Since từ validator đã lưu"""
+    headers = {}
+    if source.get("source_type") == "feed":
+        headers["Accept"] = FEED_ACCEPT_HEADER
+    if source.get("etag"):
+        headers["If-None-Match"] = source["etag"]
+    if source.get("last_modified"):
+        headers["If-Modified-Since"] = source["last_modified"]
+    return headers
+
+
+class AsyncCrawlEngine:
+    """
+    Crawl engine bất đồng bộ gồm 2 stage nối bằng hàng đợi có giới hạn:
+    - fetch (I/O): tất cả nguồn cùng lúc, giới hạn bởi semaphore toàn cục và theo host,
+      nhịp request mỗi host do token bucket dùng chung (rate_limiter) điều phối
+    - parse (CPU): chạy trên ProcessPoolExecutor để không tranh GIL với API
+    Nguồn HTML dùng chung parse_articles_from_html với generic_crawler,
+    nguồn feed (RSS/Atom) dùng parse_articles_from_feed; kết quả cùng định dạng.
+    fetch_bodies=True: parse xong nguồn nào thì tải ngay nội dung đầy đủ các bài
+    của nguồn đó (ArticleBodyFetcher), chạy song song với các nguồn còn lại.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        per_host_concurrency: int = DEFAULT_PER_HOST_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        parse_workers: int = DEFAULT_PARSE_WORKERS,
+        parse_queue_size: int = DEFAULT_PARSE_QUEUE_SIZE,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        fetch_bodies: bool = FETCH_ARTICLE_BODY,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.timeout = timeout
+        self.transport = transport
+        self.parse_workers = max(0, parse_workers)
+        self.parse_queue_size = max(1, parse_queue_size)
+        self.rate_limiter = rate_limiter or host_rate_limiter
+        self.max_retries = max(0, max_retries)
+        self.fetch_bodies = fetch_bodies
+        self._body_fetcher: Optional[ArticleBodyFetcher] = None
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """Lấy (hoặc tạo) semaphore cho host của URL"""
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_semaphores[host]
+
+    async def crawl_sources(
+        self, sources: List[Dict[str, Any]], max_articles: int = 1, incremental: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Crawl đồng thời danh sách nguồn, trả về kết quả và thời gian của từng nguồn.
+        incremental=True: dùng seen_urls của nguồn để chỉ lấy bài mới.
+        """
+        self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._host_semaphores = {}
+        parse_queue: asyncio.Queue = asyncio.Queue(maxsize=self.parse_queue_size)
+        parse_pool = get_parse_pool(self.parse_workers)
+
+        cycle_start = time.perf_counter()
+        parsers = [
+            asyncio.create_task(self._parse_worker(parse_queue, parse_pool))
+            for _ in range(max(1, self.parse_workers))
+        ]
+        try:
+            async with httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                timeout=self.timeout,
+                follow_redirects=True,
+                transport=self.transport,
+            ) as client:
+                self._body_fetcher = ArticleBodyFetcher(client, parse_pool) if self.fetch_bodies else None
+                results = await asyncio.gather(
+                    *(self._fetch_source(client, source, max_articles, incremental, parse_queue) for source in sources)
+                )
+            # Báo hết việc cho các parse worker rồi chờ chúng dừng
+            for _ in parsers:
+                await parse_queue.put(None)
+            await asyncio.gather(*parsers)
+        finally:
+            for task in parsers:
+                task.cancel()
+        cycle_seconds = time.perf_counter() - cycle_start
+
+        return {
+            "results": results,
+            "total_sources": len(sources),
+            "success_count": len([r for r in results if r["error"] is None]),
+            "error_count": len([r for r in results if r["error"] is not None]),
+            "total_articles": sum(len(r["articles"]) for r in results),
+            "not_modified_count": len([r for r in results if r["not_modified"]]),
+            "bytes_downloaded": sum(r["bytes_downloaded"] for r in results),
+            "bytes_saved": sum(r["bytes_saved"] for r in results),
+            "total_bodies": sum(r["body_count"] for r in results),
+            "cycle_seconds": cycle_seconds,
+            "sum_source_seconds": sum(r["total_seconds"] for r in results),
+        }
+
+    async def _fetch_source(
+        self,
+        client: httpx.AsyncClient,
+        source: Dict[str, Any],
+        max_articles: int,
+        incremental: bool,
+        parse_queue: asyncio.Queue,
+    ) -> Dict[str, Any]:
+        """Stage fetch: tải trang của một nguồn rồi đẩy sang hàng đợi parse"""
+        result = {
+            "source": source,
+            "articles": [],
+            "status_code": None,
+            "not_modified": False,
+            "etag": source.get("etag"),
+            "last_modified": source.get("last_modified"),
+            "content_length": source.get("last_content_length"),
+            "bytes_downloaded": 0,
+            "bytes_saved": 0,
+            "retries": 0,
+            "wait_seconds": 0.0,
+            "fetch_seconds": 0.0,
+            "parse_wait_seconds": 0.0,
+            "parse_seconds": 0.0,
+            "body_count": 0,
+            "body_bytes_downloaded": 0,
+            "body_seconds": 0.0,
+            "total_seconds": 0.0,
+            "error": None,
+        }
+        source_name = source.get("name", "Unknown")
+        start = time.perf_counter()
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                # Chờ token của host trước khi chiếm slot mạng
+                result["wait_seconds"] += await self.rate_limiter.acquire(source["url"])
+                slot_wait_start = time.perf_counter()
+                async with self._global_semaphore, self._get_host_semaphore(source["url"]):
+                    fetch_start = time.perf_counter()
+                    result["wait_seconds"] += fetch_start - slot_wait_start
+                    try:
+                        response = await client.get(source["url"], headers=build_request_headers(source))
+                    except httpx.TransportError:
+                        self.rate_limiter.record_error(source["url"])
+                        if attempt == self.max_retries:
+                            raise
+                        result["retries"] += 1
+                        continue
+                    finally:
+                        result["fetch_seconds"] += time.perf_counter() - fetch_start
+
+                result["status_code"] = response.status_code
+                self.rate_limiter.record_response(
+                    source["url"], response.status_code, response.headers.get("Retry-After")
+                )
+                if response.status_code not in THROTTLE_STATUS_CODES or attempt == self.max_retries:
+                    break
+                # 429/503: host đã bị chặn theo Retry-After, lần acquire sau sẽ chờ
+                result["retries"] += 1
+
+            if response.status_code == 304:
+                # Trang không đổi: bỏ qua hoàn toàn bước parse
+                result["not_modified"] = True
+                result["bytes_saved"] = source.get("last_content_length") or 0
+                result["total_seconds"] = time.perf_counter() - start
+                logger.info(f"♻️ {source_name} không thay đổi (304), bỏ qua parse")
+                return result
+
+            response.raise_for_status()
+            result["bytes_downloaded"] = len(response.content)
+            result["content_length"] = len(response.content)
+            result["etag"] = response.headers.get("ETag")
+            result["last_modified"] = response.headers.get("Last-Modified")
+
+        except httpx.HTTPError as e:
+            logger.error(f"Lỗi kết nối khi crawl {source_name}: {str(e)}")
+            result["error"] = str(e)
+        except Exception as e:
+            logger.error(f"Lỗi không xác định khi crawl {source_name}: {str(e)}")
+            result["error"] = str(e)
+
+        if result["error"] is not None:
+            result["total_seconds"] = time.perf_counter() - start
+            return result
+
+        # Đẩy sang stage parse (ngoài semaphore để không giữ slot mạng);
+        # hàng đợi đầy thì stage fetch tạm dừng cho tới khi parse bắt kịp
+        known_urls = set(source.get("seen_urls") or []) if incremental else None
+        if source.get("source_type") == "feed":
+            parse_job = functools.partial(
+                parse_articles_from_feed,
+                content=response.content,
+                page_url=source["url"],
+                source_name=source_name,
+                max_articles=max_articles,
+                known_urls=known_urls,
+            )
+        else:
+            parse_job = functools.partial(
+                parse_articles_from_html,
+                html=response.content,
+                page_url=source["url"],
+                article_container_selector=source["article_container_selector"],
+                title_selector=source["title_selector"],
+                link_selector=source["link_selector"],
+                summary_selector=source.get("summary_selector"),
+                date_selector=source.get("date_selector"),
+                source_name=source_name,
+                max_articles=max_articles,
+                selector_cache_key=source.get("id"),
+                known_urls=known_urls,
+            )
+        parsed = asyncio.get_running_loop().create_future()
+        await parse_queue.put((result, parse_job, time.perf_counter(), parsed))
+        await parsed
+
+        if self._body_fetcher is not None and result["articles"] and result["error"] is None:
+            result.update(await self._body_fetcher.fetch_bodies(result["articles"]))
+
+        result["total_seconds"] = time.perf_counter() - start
+        return result
+
+    async def _parse_worker(self, parse_queue: asyncio.Queue, parse_pool: Optional[ProcessPoolExecutor]):
+        """Stage parse: lấy trang từ hàng đợi và parse trên process pool (hoặc thread nếu không có pool)"""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await parse_queue.get()
+            if item is None:
+                return
+            result, parse_job, queued_at, parsed = item
+            parse_start = time.perf_counter()
+            result["parse_wait_seconds"] = parse_start - queued_at
+            try:
+                if parse_pool is not None:
+                    result["articles"] = await loop.run_in_executor(parse_pool, parse_job)
+                else:
+                    result["articles"] = await asyncio.to_thread(parse_job)
+            except Exception as e:
+                logger.error(f"Lỗi khi parse {result['source'].get('name', 'Unknown')}: {str(e)}")
+                result["error"] = str(e)
+            finally:
+                result["parse_seconds"] = time.perf_counter() - parse_start
+                if not parsed.done():
+                    parsed.set_result(None)
+
+
+def crawl_sources_concurrently(
+    sources: List[Dict[str, Any]],
+    max_articles: int = 1,
+    incremental: bool = False,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    per_host_concurrency: int = DEFAULT_PER_HOST_CONCURRENCY,
+    fetch_bodies: bool = FETCH_ARTICLE_BODY,
+) -> Dict[str, Any]:
+    """Wrapper đồng bộ cho scheduler chạy trên thread riêng"""
+    engine = AsyncCrawlEngine(
+        max_concurrency=max_concurrency,
+        per_host_concurrency=per_host_concurrency,
+        fetch_bodies=fetch_bodies,
+    )
+    return asyncio.run(engine.crawl_sources(sources, max_articles=max_articles, incremental=incremental))
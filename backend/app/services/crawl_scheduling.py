@@ -0,0 +1,90 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Union
+
+# Giới hạn khoảng cách giữa 2 lần crawl một nguồn (phút)
+MIN_CRAWL_INTERVAL_MINUTES = float(os.getenv("CRAWL_MIN_INTERVAL_MINUTES", "15"))
+MAX_CRAWL_INTERVAL_MINUTES = float(os.getenv("CRAWL_MAX_INTERVAL_MINUTES", "360"))
+DEFAULT_CRAWL_INTERVAL_MINUTES = float(os.getenv("CRAWL_DEFAULT_INTERVAL_MINUTES", "180"))
+
+# Muốn mỗi lần crawl gặp khoảng N bài mới
+TARGET_NEW_ARTICLES_PER_CRAWL = float(os.getenv("CRAWL_TARGET_NEW_ARTICLES", "3"))
+
+# Trọng số của quan sát mới trong trung bình trượt (EWMA) tốc độ đăng bài
+PUBLISH_RATE_SMOOTHING = float(os.getenv("CRAWL_PUBLISH_RATE_SMOOTHING", "0.3"))
+
+
+def _parse_datetime(value: Union[str, datetime, None]) -> Optional[datetime]:
+    """Nhận datetime hoặc chuỗi ISO (dữ liệu nguồn lấy qua API)"""
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _clamp_interval(minutes: float) -> float:
+    return max(MIN_CRAWL_INTERVAL_MINUTES, min(MAX_CRAWL_INTERVAL_MINUTES, minutes))
+
+
+def is_source_due(source: Dict[str, Any], now: Optional[datetime] = None) -> bool:
+    """Nguồn đã tới hạn crawl chưa (chưa có lịch thì coi như tới hạn)"""
+    next_crawl_at = _parse_datetime(source.get("next_crawl_at"))
+    return next_crawl_at is None or next_crawl_at <= (now or datetime.now())
+
+
+def update_publish_rate(previous_rate: Optional[float], new_articles: int, elapsed_hours: float) -> float:
+    """Cập nhật tốc độ đăng bài (bài/giờ) bằng trung bình trượt hàm mũ"""
+    observed_rate = new_articles / max(elapsed_hours, 1 / 60)
+    if previous_rate is None:
+        return observed_rate
+    return PUBLISH_RATE_SMOOTHING * observed_rate + (1 - PUBLISH_RATE_SMOOTHING) * previous_rate
+
+
+def plan_next_crawl(
+    source: Dict[str, Any],
+    new_articles: int,
+    max_articles: int,
+    crawled_at: Optional[datetime] = None,
+    failed: bool = False,
+) -> Dict[str, Any]:
+    """
+    Tính lịch crawl tiếp theo của nguồn từ số bài mới vừa thu được.
+    Trả về các field cần lưu vào CrawlSource: publish_rate_per_hour,
+    crawl_interval_minutes, next_crawl_at.
+    """
+    crawled_at = crawled_at or datetime.now()
+    previous_rate = source.get("publish_rate_per_hour")
+    current_interval = source.get("crawl_interval_minutes") or DEFAULT_CRAWL_INTERVAL_MINUTES
+
+    if failed:
+        # Lỗi: giữ nguyên tốc độ đã học, thử lại sớm nhưng không dồn dập
+        interval = _clamp_interval(min(current_interval, MIN_CRAWL_INTERVAL_MINUTES * 2))
+        return {
+            "publish_rate_per_hour": previous_rate,
+            "crawl_interval_minutes": current_interval,
+            "next_crawl_at": crawled_at + timedelta(minutes=interval),
+        }
+
+    last_crawled_at = _parse_datetime(source.get("last_crawled_at"))
+    if last_crawled_at is not None:
+        elapsed_hours = (crawled_at - last_crawled_at).total_seconds() / 3600
+    else:
+        elapsed_hours = current_interval / 60
+    publish_rate = update_publish_rate(previous_rate, new_articles, elapsed_hours)
+
+    if max_articles and new_articles >= max_articles:
+        # Chạm trần số bài mỗi lần crawl: tốc độ thật có thể cao hơn, rút ngắn mạnh
+        interval = current_interval / 2
+    elif publish_rate > 0:
+        interval = TARGET_NEW_ARTICLES_PER_CRAWL / publish_rate * 60
+    else:
+        interval = MAX_CRAWL_INTERVAL_MINUTES
+    interval = _clamp_interval(interval)
+
+    return {
+        "publish_rate_per_hour": publish_rate,
+        "crawl_interval_minutes": interval,
+        "next_crawl_at": crawled_at + timedelta(minutes=interval),
+    }
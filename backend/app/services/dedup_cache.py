@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.article_model import Article
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Số URL/content hash gần nhất giữ trong LRU (kèm id article)
+DEDUP_LRU_SIZE = int(os.getenv("DEDUP_LRU_SIZE", "50000"))
+# Bloom filter chứa mọi URL/hash đã biết; vượt capacity thì tỉ lệ dương tính giả tăng dần
+DEDUP_BLOOM_CAPACITY = int(os.getenv("DEDUP_BLOOM_CAPACITY", "1000000"))
+DEDUP_BLOOM_ERROR_RATE = float(os.getenv("DEDUP_BLOOM_ERROR_RATE", "0.01"))
+
+
+class BloomFilter:
+    """Bloom filter trên bytearray: không có âm tính giả, dương tính giả ~error_rate khi chưa vượt capacity"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        # Double hashing: k vị trí từ 2 giá trị 64-bit của một lần băm
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class ArticleDedupCache:
+    """
+    Cache kiểm tra trùng article trong process, đặt trước các câu SELECT theo URL/content hash:
+    - LRU (URL/hash -> id article) cho bài gặp gần đây: trùng thì trả lời ngay
+    - Bloom filter chứa mọi URL/hash trong DB: không có trong filter thì chắc chắn là bài mới
+    Chỉ khi Bloom filter báo "có thể đã có" mà LRU không có mới cần hỏi DB.
+    Bài do process khác chèn không có trong cache: trùng URL vẫn bị chặn bởi unique
+    constraint, trùng content hash giữa các process thì có thể lọt.
+    """
+
+    def __init__(
+        self,
+        lru_size: int = DEDUP_LRU_SIZE,
+        bloom_capacity: int = DEDUP_BLOOM_CAPACITY,
+        bloom_error_rate: float = DEDUP_BLOOM_ERROR_RATE,
+    ):
+        self.lru_size = lru_size
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._urls: "OrderedDict[str, int]" = OrderedDict()
+        self._hashes: "OrderedDict[str, int]" = OrderedDict()
+        self._bloom = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+        # Chưa warm thì Bloom filter chưa đủ dữ liệu, không được dùng để kết luận "bài mới"
+        self.ready = False
+        self.warm_seconds: Optional[float] = None
+        self.lru_hits = 0
+        self.bloom_negatives = 0
+        self.db_checks = 0
+
+    @staticmethod
+    def _remember(lru: "OrderedDict[str, int]", key: str, article_id: int, max_size: int):
+        lru[key] = article_id
+        lru.move_to_end(key)
+        if len(lru) > max_size:
+            lru.popitem(last=False)
+
+    def warm(self, db: Session, batch_size: int = 5000):
+        """Nạp toàn bộ URL/content hash từ DB vào Bloom filter, các bài mới nhất vào LRU"""
+        start = time.perf_counter()
+        with self._lock:
+            self._reset()
+            rows = db.execute(
+                select(Article.id, Article.url, Article.content_hash)
+                .order_by(Article.id)
+                .execution_options(yield_per=batch_size)
+            )
+            for article_id, url, content_hash in rows:
+                self._add(url, content_hash, article_id)
+            self.ready = True
+            self.warm_seconds = time.perf_counter() - start
+        logger.info(f"🧠 Dedup cache: nạp {self._bloom.count} khóa trong {self.warm_seconds:.2f}s")
+
+    def ensure_warm(self, db: Session):
+        if not self.ready:
+            self.warm(db)
+
+    def _add(self, url: Optional[str], content_hash: Optional[str], article_id: int):
+        if url:
+            self._remember(self._urls, url, article_id, self.lru_size)
+            self._bloom.add("u:" + url)
+        if content_hash:
+            # Giữ id của bài đầu tiên có hash này
+            if content_hash not in self._hashes:
+                self._remember(self._hashes, content_hash, article_id, self.lru_size)
+            self._bloom.add("h:" + content_hash)
+
+    def add(self, url: Optional[str], content_hash: Optional[str], article_id: int):
+        """Ghi nhận article đã có trong DB (gọi sau khi commit)"""
+        with self._lock:
+            self._add(url, content_hash, article_id)
+
+    def lookup(self, url: str, content_hash: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Kiểm tra trùng chỉ bằng bộ nhớ. Trả về:
+        - ("url" | "content_hash", id): trùng, biết id article
+        - ("new", None): chắc chắn chưa có trong DB (theo những gì process này biết)
+        - (None, None): không kết luận được, cần hỏi DB
+        """
+        with self._lock:
+            if url in self._urls:
+                self._urls.move_to_end(url)
+                self.lru_hits += 1
+                return "url", self._urls[url]
+            if content_hash and content_hash in self._hashes:
+                self._hashes.move_to_end(content_hash)
+                self.lru_hits += 1
+                return "content_hash", self._hashes[content_hash]
+            if self.ready and ("u:" + url) not in self._bloom and (
+                not content_hash or ("h:" + content_hash) not in self._bloom
+            ):
+                self.bloom_negatives += 1
+                return "new", None
+            self.db_checks += 1
+            return None, None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "warm_seconds": self.warm_seconds,
+                "lru_urls": len(self._urls),
+                "lru_hashes": len(self._hashes),
+                "bloom_keys": self._bloom.count,
+                "bloom_bytes": len(self._bloom.bits),
+                "lru_hits": self.lru_hits,
+                "bloom_negatives": self.bloom_negatives,
+                "db_checks": self.db_checks,
+            }
+
+
+# Cache dùng chung trong process
+article_dedup_cache = ArticleDedupCache()
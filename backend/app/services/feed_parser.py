@@ -0,0 +1,119 @@
+import io
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Union
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml import etree
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FEED_ACCEPT_HEADER = "application/rss+xml, application/atom+xml, application/xml;q=0.9, text/xml;q=0.9, */*;q=0.8"
+
+# RSS 2.0 (<item>) và Atom (<entry>), bỏ qua namespace
+_ITEM_TAGS = ("{*}item", "item", "{*}entry", "entry")
+
+
+def _local_name(tag) -> str:
+    return etree.QName(tag).localname if isinstance(tag, str) else ""
+
+
+def _child_text(item, *names: str) -> str:
+    """Text của phần tử con đầu tiên khớp một trong các tên (không phân biệt namespace)"""
+    for name in names:
+        for child in item:
+            if _local_name(child.tag) == name and child.text and child.text.strip():
+                return child.text.strip()
+    return ""
+
+
+def _item_link(item) -> str:
+    """Link bài viết: <link>url</link> (RSS) hoặc <link rel="alternate" href=".."/> (Atom)"""
+    for child in item:
+        if _local_name(child.tag) != "link":
+            continue
+        href = child.get("href")
+        if href and child.get("rel", "alternate") == "alternate":
+            return href.strip()
+        if child.text and child.text.strip():
+            return child.text.strip()
+    # Một số feed chỉ có guid là permalink
+    guid = _child_text(item, "guid", "id")
+    return guid if guid.startswith("http") else ""
+
+
+def _strip_html(text: str) -> str:
+    """Mô tả RSS thường chứa HTML (ảnh, link) - chỉ giữ phần chữ"""
+    if not text or "<" not in text:
+        return text
+    try:
+        return " ".join(lxml.html.fragment_fromstring(text, create_parent="div").text_content().split())
+    except (etree.ParserError, ValueError):
+        return text
+
+
+def parse_articles_from_feed(
+    content: Union[str, bytes],
+    page_url: str,
+    source_name: str = "Unknown",
+    max_articles: int = 1,
+    known_urls: Optional[Set[str]] = None
+) -> List[Dict[str, str]]:
+    """
+    Parse feed RSS/Atom dạng streaming (iterparse): xử lý từng item rồi giải phóng,
+    dừng sớm khi đủ max_articles hoặc gặp bài đã thấy (crawl incremental).
+    Trả về cùng định dạng với parse_articles_from_html để đi chung pipeline.
+    """
+    articles = []
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    context = etree.iterparse(
+        io.BytesIO(content),
+        events=("end",),
+        tag=_ITEM_TAGS,
+        resolve_entities=False,
+        no_network=True,
+        huge_tree=False,
+        recover=True,
+    )
+    try:
+        for _, item in context:
+            if len(articles) >= max_articles:
+                break
+
+            title = _strip_html(_child_text(item, "title"))
+            url = _item_link(item)
+            if url.startswith('/'):
+                url = urljoin(page_url, url)
+            summary = _strip_html(_child_text(item, "description", "summary", "content"))
+            published_date = _child_text(item, "pubDate", "published", "updated", "date")
+
+            # Giải phóng item đã xử lý để bộ nhớ không tăng theo kích thước feed
+            item.clear()
+            while item.getprevious() is not None:
+                del item.getparent()[0]
+
+            if not title:
+                logger.info(f"Bỏ qua item: Không có tiêu đề ({source_name})")
+                continue
+
+            if known_urls and url in known_urls:
+                logger.info(f"⏹️ Dừng feed {source_name}: gặp bài đã thấy từ lần crawl trước")
+                break
+
+            articles.append({
+                'title': title,
+                'url': url,
+                'summary': summary,
+                'published_date_str': published_date,
+                'source_page': source_name,
+                'collected_at_iso': datetime.now().isoformat()
+            })
+            logger.info(f"✅ Feed item: {title[:50]}...")
+    except etree.XMLSyntaxError as e:
+        logger.error(f"Lỗi khi parse feed {source_name} ({page_url}): {str(e)}")
+
+    return articles
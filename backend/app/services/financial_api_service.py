@@ -3,7 +3,7 @@ import os
 import time
 import json
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -235,10 +235,10 @@ class FinancialAPIService:
 financial_api = FinancialAPIService()
 
 # 🚀 MAIN SERVICE FUNCTION CHO SCHEDULER
-def fetch_all_active_company_metrics() -> Dict[str, Any]:
+def fetch_all_active_company_metrics(should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
     """
     🎯 HÀM CHÍNH: Fetch metrics cho tất cả active companies
-    Function này được gọi bởi SCHEDULER
+    Function này được gọi bởi SCHEDULER; should_stop trả về True thì dừng trước công ty kế tiếp
     """
     
     # Import ở đây để tránh circular import
@@ -280,6 +280,10 @@ def fetch_all_active_company_metrics() -> Dict[str, Any]:
             try:
                 print(f"📈 [{i}/{len(active_companies)}] Fetching metrics cho {company.symbol} ({company.company_name})...")
                 
+                if should_stop and should_stop():
+                    print(f"⏹️ Scheduler đang dừng, dừng tại {company.symbol}")
+                    break
+
                 # Check if we're approaching rate limit
                 if financial_api.request_count >= financial_api.daily_limit - 5:
                     print(f"⚠️ Sắp đạt API limit, dừng tại {company.symbol}")
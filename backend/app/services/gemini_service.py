@@ -12,6 +12,9 @@ if GOOGLE_API_KEY:
 else:
     print("CẢNH BÁO: GOOGLE_API_KEY không được tìm thấy trong file .env")
 
+class GeminiUnavailableError(Exception):
+    """Gemini không trả về kết quả (lỗi mạng, hết quota...) - có thể thử lại sau"""
+
 def call_gemini(prompt: str, model_name: str = "gemini-1.5-flash") -> Optional[str]:
     """
     Gửi một prompt đến Gemini API và nhận về text response.
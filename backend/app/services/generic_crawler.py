@@ -1,13 +1,129 @@
 import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union, Hashable, Set
+from urllib.parse import urljoin
 from datetime import datetime
 import logging
-import time
+
+from app.services.html_parser import get_compiled_selectors
+from app.services.rate_limiter import host_rate_limiter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Số URL gần nhất lưu lại cho mỗi nguồn để crawl incremental
+SEEN_URLS_LIMIT = 200
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'vi-VN,vi;q=0.9,en;q=0.8',
+}
+
+def parse_articles_from_html(
+    html: Union[str, bytes],
+    page_url: str,
+    article_container_selector: str,
+    title_selector: str,
+    link_selector: str,
+    summary_selector: Optional[str] = None,
+    date_selector: Optional[str] = None,
+    source_name: str = "Unknown",
+    max_articles: int = 1,
+    parser_backend: Optional[str] = None,
+    selector_cache_key: Optional[Hashable] = None,
+    known_urls: Optional[Set[str]] = None
+) -> List[Dict[str, str]]:
+    """
+    Trích xuất bài viết từ HTML của trang danh sách theo các CSS selector
+    (dùng chung cho crawler đồng bộ và crawl engine async).
+    Nếu có known_urls (crawl incremental): duyệt container theo thứ tự và dừng
+    ở bài đầu tiên đã thấy, chỉ trả về các bài mới phía trên nó.
+    """
+    articles = []
+    
+    compiled = get_compiled_selectors(
+        {
+            'article_container_selector': article_container_selector,
+            'title_selector': title_selector,
+            'link_selector': link_selector,
+            'summary_selector': summary_selector,
+            'date_selector': date_selector,
+        },
+        backend_name=parser_backend,
+        cache_key=selector_cache_key
+    )
+    backend = compiled.backend
+    document = backend.parse_document(html)
+    
+    # Tìm các container chứa bài viết
+    article_containers = backend.select_all(document, compiled.container)
+    logger.info(f"Tìm thấy {len(article_containers)} containers từ {source_name}")
+    
+    # Giới hạn số lượng bài viết
+    article_containers = article_containers[:max_articles]
+    
+    for idx, container in enumerate(article_containers):
+        try:
+            # Trích xuất tiêu đề
+            title_element = backend.select_first(container, compiled.title)
+            title = backend.get_text(title_element) if title_element is not None else ""
+            
+            if not title:
+                logger.info(f"Bỏ qua container {idx+1}: Không có tiêu đề")
+                continue
+            
+            # Trích xuất link
+            link_element = backend.select_first(container, compiled.link)
+            if link_element is not None:
+                url = backend.get_attribute(link_element, 'href', '')
+                if url.startswith('/'):
+                    url = urljoin(page_url, url)
+            else:
+                url = ""
+            
+            # Gặp bài đã crawl -> các bài phía dưới cũng đã có
+            if known_urls and url in known_urls:
+                logger.info(f"⏹️ Dừng ở container {idx+1}: bài đã thấy từ lần crawl trước ({source_name})")
+                break
+            
+            # Trích xuất tóm tắt
+            summary = ""
+            if compiled.summary is not None:
+                summary_element = backend.select_first(container, compiled.summary)
+                summary = backend.get_text(summary_element) if summary_element is not None else ""
+            
+            # Trích xuất ngày tháng
+            published_date = ""
+            if compiled.date is not None:
+                date_element = backend.select_first(container, compiled.date)
+                published_date = backend.get_text(date_element) if date_element is not None else ""
+            
+            article_data = {
+                'title': title,
+                'url': url,
+                'summary': summary,
+                'published_date_str': published_date,
+                'source_page': source_name,
+                'collected_at_iso': datetime.now().isoformat()
+            }
+            
+            articles.append(article_data)
+            logger.info(f"✅ Crawled: {title[:50]}...")
+            
+        except Exception as e:
+            logger.error(f"Lỗi khi xử lý container {idx+1}: {str(e)}")
+            continue
+    
+    return articles
+
+def merge_seen_urls(new_urls: List[str], seen_urls: Optional[List[str]], limit: int = SEEN_URLS_LIMIT) -> List[str]:
+    """Gộp URL mới vào danh sách đã thấy (mới nhất trước, không trùng, giới hạn kích thước)"""
+    merged = []
+    for url in list(new_urls) + list(seen_urls or []):
+        if url and url not in merged:
+            merged.append(url)
+    return merged[:limit]
+
 def scrape_news_from_website(
     page_url: str,
     article_container_selector: str,
@@ -24,74 +140,23 @@ def scrape_news_from_website(
     articles = []
     
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'vi-VN,vi;q=0.9,en;q=0.8',
-        }
-        
-        response = requests.get(page_url, headers=headers, timeout=30)
+        host_rate_limiter.acquire_sync(page_url)
+        response = requests.get(page_url, headers=DEFAULT_HEADERS, timeout=30)
+        host_rate_limiter.record_response(page_url, response.status_code, response.headers.get('Retry-After'))
         response.raise_for_status()
         response.encoding = 'utf-8'
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Tìm các container chứa bài viết
-        article_containers = soup.select(article_container_selector)
-        logger.info(f"Tìm thấy {len(article_containers)} containers từ {source_name}")
-        
-        # Giới hạn số lượng bài viết
-        article_containers = article_containers[:max_articles]
-        
-        for idx, container in enumerate(article_containers):
-            try:
-                # Trích xuất tiêu đề
-                title_element = container.select_one(title_selector)
-                title = title_element.get_text(strip=True) if title_element else ""
-                
-                if not title:
-                    logger.info(f"Bỏ qua container {idx+1}: Không có tiêu đề")
-                    continue
-                
-                # Trích xuất link
-                link_element = container.select_one(link_selector)
-                if link_element:
-                    url = link_element.get('href', '')
-                    if url.startswith('/'):
-                        from urllib.parse import urljoin
-                        url = urljoin(page_url, url)
-                else:
-                    url = ""
-                
-                # Trích xuất tóm tắt
-                summary = ""
-                if summary_selector:
-                    summary_element = container.select_one(summary_selector)
-                    summary = summary_element.get_text(strip=True) if summary_element else ""
-                
-                # Trích xuất ngày tháng
-                published_date = ""
-                if date_selector:
-                    date_element = container.select_one(date_selector)
-                    published_date = date_element.get_text(strip=True) if date_element else ""
-                
-                article_data = {
-                    'title': title,
-                    'url': url,
-                    'summary': summary,
-                    'published_date_str': published_date,
-                    'source_page': source_name,
-                    'collected_at_iso': datetime.now().isoformat()
-                }
-                
-                articles.append(article_data)
-                logger.info(f"✅ Crawled: {title[:50]}...")
-                
-            except Exception as e:
-                logger.error(f"Lỗi khi xử lý container {idx+1}: {str(e)}")
-                continue
-        
-        time.sleep(1)  # Delay để tránh bị block
+        articles = parse_articles_from_html(
+            html=response.content,
+            page_url=page_url,
+            article_container_selector=article_container_selector,
+            title_selector=title_selector,
+            link_selector=link_selector,
+            summary_selector=summary_selector,
+            date_selector=date_selector,
+            source_name=source_name,
+            max_articles=max_articles
+        )
         
     except requests.RequestException as e:
         logger.error(f"Lỗi kết nối khi crawl {source_name}: {str(e)}")
@@ -0,0 +1,184 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+# lxml + cssselect là fast path (tùy chọn), BeautifulSoup luôn có để fallback
+try:
+    import lxml.html
+    from lxml import etree
+    from cssselect import HTMLTranslator, SelectorError
+except ImportError:
+    lxml = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PARSER_BACKEND = os.getenv("CRAWLER_PARSER_BACKEND", "lxml")
+
+SELECTOR_FIELDS = (
+    "article_container_selector",
+    "title_selector",
+    "link_selector",
+    "summary_selector",
+    "date_selector",
+)
+
+
+class BeautifulSoupBackend:
+    """Backend thuần Python (html.parser + soupsieve) - chậm nhưng luôn có sẵn"""
+
+    name = "bs4"
+
+    def compile(self, selector: str):
+        return soupsieve.compile(selector)
+
+    def parse_document(self, html: Union[str, bytes]):
+        return BeautifulSoup(html, "html.parser")
+
+    def select_all(self, node, compiled) -> List[Any]:
+        return compiled.select(node)
+
+    def select_first(self, node, compiled):
+        return compiled.select_one(node)
+
+    def get_text(self, node) -> str:
+        return node.get_text(strip=True)
+
+    def get_attribute(self, node, name: str, default: str = "") -> str:
+        return node.get(name, default)
+
+
+class LxmlBackend:
+    """Backend libxml2: selector CSS được dịch sang XPath đã compile sẵn"""
+
+    name = "lxml"
+
+    # Giống BeautifulSoup.get_text: bỏ qua nội dung script/style/template
+    _SKIPPED_TEXT_TAGS = {"script", "style", "template"}
+
+    def __init__(self):
+        self._translator = HTMLTranslator()
+        self._html_parser = lxml.html.HTMLParser(encoding="utf-8")
+
+    def compile(self, selector: str):
+        # prefix 'descendant::' để khớp ngữ nghĩa soupsieve: chỉ tìm trong con cháu, không gồm chính node
+        try:
+            return etree.XPath(self._translator.css_to_xpath(selector, prefix="descendant::"))
+        except SelectorError as e:
+            raise ValueError(f"Selector không hỗ trợ bởi lxml: {selector} ({e})")
+
+    def parse_document(self, html: Union[str, bytes]):
+        if isinstance(html, bytes):
+            return lxml.html.document_fromstring(html, parser=self._html_parser)
+        return lxml.html.document_fromstring(html)
+
+    def select_all(self, node, compiled) -> List[Any]:
+        return compiled(node)
+
+    def select_first(self, node, compiled):
+        matches = compiled(node)
+        return matches[0] if matches else None
+
+    def _iter_text(self, element):
+        """
+        Text theo thứ tự tài liệu: text của node, rồi lần lượt từng con và tail của con đó.
+        Comment/script/style/template bị bỏ nội dung, còn tail (text phía sau) vẫn được giữ.
+        """
+        if not isinstance(element.tag, str) or element.tag in self._SKIPPED_TEXT_TAGS:
+            return
+        if element.text:
+            yield element.text
+        for child in element:
+            yield from self._iter_text(child)
+            if child.tail:
+                yield child.tail
+
+    def get_text(self, node) -> str:
+        return "".join(part.strip() for part in self._iter_text(node) if part.strip())
+
+    def get_attribute(self, node, name: str, default: str = "") -> str:
+        return node.get(name, default)
+
+
+_backends: Dict[str, Any] = {"bs4": BeautifulSoupBackend()}
+if lxml is not None:
+    _backends["lxml"] = LxmlBackend()
+
+
+def available_backends() -> List[str]:
+    """Danh sách backend parse có thể dùng trong môi trường hiện tại"""
+    return list(_backends.keys())
+
+
+def get_parser_backend(name: Optional[str] = None):
+    """Lấy backend theo tên, fallback về BeautifulSoup nếu backend không có"""
+    name = name or PARSER_BACKEND
+    backend = _backends.get(name)
+    if backend is None:
+        logger.warning(f"⚠️ Parser backend '{name}' không khả dụng, dùng bs4")
+        backend = _backends["bs4"]
+    return backend
+
+
+class CompiledSelectors:
+    """Bộ selector của một nguồn crawl đã được compile cho một backend"""
+
+    def __init__(self, backend, selectors: Dict[str, Optional[str]]):
+        self.backend = backend
+        self.container = backend.compile(selectors["article_container_selector"])
+        self.title = backend.compile(selectors["title_selector"])
+        self.link = backend.compile(selectors["link_selector"])
+        self.summary = backend.compile(selectors["summary_selector"]) if selectors.get("summary_selector") else None
+        self.date = backend.compile(selectors["date_selector"]) if selectors.get("date_selector") else None
+
+
+# (backend, cache_key) -> (selector gốc, CompiledSelectors); cache_key thường là source_id
+_compiled_cache: Dict[Tuple[str, Hashable], Tuple[Tuple, CompiledSelectors]] = {}
+_compiled_cache_lock = threading.Lock()
+
+
+def get_compiled_selectors(
+    selectors: Dict[str, Optional[str]],
+    backend_name: Optional[str] = None,
+    cache_key: Optional[Hashable] = None,
+) -> CompiledSelectors:
+    """
+    Compile selector một lần và cache lại theo nguồn.
+    Khi nguồn được cập nhật selector, bản compile cũ bị thay thế.
+    Nếu backend nhanh không hỗ trợ selector thì fallback về BeautifulSoup.
+    """
+    backend = get_parser_backend(backend_name)
+    selector_values = tuple(selectors.get(field) for field in SELECTOR_FIELDS)
+    key = (backend.name, cache_key if cache_key is not None else selector_values)
+
+    with _compiled_cache_lock:
+        cached = _compiled_cache.get(key)
+    if cached is not None and cached[0] == selector_values:
+        return cached[1]
+
+    try:
+        compiled = CompiledSelectors(backend, selectors)
+    except ValueError as e:
+        logger.warning(f"⚠️ {e} - fallback về bs4")
+        compiled = CompiledSelectors(_backends["bs4"], selectors)
+
+    with _compiled_cache_lock:
+        _compiled_cache[key] = (selector_values, compiled)
+    return compiled
+
+
+def invalidate_compiled_selectors(cache_key: Hashable):
+    """Bỏ các selector đã compile của một nguồn (gọi khi nguồn bị cập nhật/xóa)"""
+    with _compiled_cache_lock:
+        for key in [k for k in _compiled_cache if k[1] == cache_key]:
+            del _compiled_cache[key]
+
+
+def clear_selector_cache():
+    """Xóa toàn bộ selector đã compile"""
+    with _compiled_cache_lock:
+        _compiled_cache.clear()
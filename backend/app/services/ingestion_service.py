@@ -0,0 +1,159 @@
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import requests
+from pydantic import ValidationError
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.crud import article_crud, crawl_source_crud
+from app.schemas import article_schema, crawl_source_schema
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# local: scheduler chạy cùng process với API, ghi thẳng vào DB qua crud
+# http: crawler chạy ở máy khác, gửi dữ liệu qua REST API
+INGESTION_MODE = os.getenv("INGESTION_MODE", "local").lower()
+API_BASE_URL = os.getenv("API_BASE_URL", "https://stock-news-tracker-production.up.railway.app/api/v1")
+HTTP_TIMEOUT_SECONDS = float(os.getenv("INGESTION_HTTP_TIMEOUT_SECONDS", "30"))
+# Số bài tối đa mỗi request POST /articles/bulk
+BULK_BATCH_SIZE = 500
+
+
+def build_article_payload(article_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Chuyển bài vừa crawl sang payload ArticleCreate (bỏ field rỗng)"""
+    payload = {
+        "title": article_data.get("title"),
+        "url": article_data.get("url"),
+        "summary": article_data.get("summary"),
+        "published_date_str": article_data.get("published_date_str") or article_data.get("collected_at_iso"),
+        "source_url": article_data.get("source_page"),
+        "body": article_data.get("body"),
+    }
+    return {k: v for k, v in payload.items() if v is not None}
+
+
+class LocalIngestionService:
+    """Ghi trực tiếp vào DB bằng crud, không qua HTTP/JSON"""
+
+    mode = "local"
+
+    def check_connection(self) -> bool:
+        try:
+            with SessionLocal() as db:
+                db.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.error(f"❌ Không kết nối được database: {e}")
+            return False
+
+    def get_active_sources(self) -> List[Dict[str, Any]]:
+        with SessionLocal() as db:
+            sources = crawl_source_crud.get_crawl_sources(db, limit=100, is_active=True)
+            return [crawl_source_schema.CrawlSourceInDB.model_validate(source).model_dump() for source in sources]
+
+    def ingest_articles(self, articles: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Lưu các bài của một nguồn bằng một lần bulk insert; trả về trạng thái từng bài
+        ({id, status: created/duplicate}), phần tử None = bài không hợp lệ hoặc lưu lỗi.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(articles)
+        valid_indexes = []
+        article_creates = []
+        for index, article_data in enumerate(articles):
+            try:
+                article_creates.append(article_schema.ArticleCreate(**build_article_payload(article_data)))
+                valid_indexes.append(index)
+            except ValidationError as e:
+                logger.error(f"❌ Bài báo không hợp lệ {article_data.get('url')}: {e}")
+
+        with SessionLocal() as db:
+            try:
+                items = article_crud.create_articles_bulk(db, article_creates)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"❌ Lỗi khi lưu {len(article_creates)} bài báo: {e}")
+                return results
+        for index, item in zip(valid_indexes, items):
+            results[index] = {**item, "index": index}
+        return results
+
+    def update_source(self, source_id: int, update_data: Dict[str, Any]) -> bool:
+        try:
+            with SessionLocal() as db:
+                source_update = crawl_source_schema.CrawlSourceUpdate(**update_data)
+                return crawl_source_crud.update_crawl_source(db, source_id, source_update) is not None
+        except Exception as e:
+            logger.error(f"❌ Lỗi khi cập nhật nguồn {source_id}: {e}")
+            return False
+
+
+class HttpIngestionService:
+    """Gửi dữ liệu qua REST API (crawler chạy tách khỏi API), dùng lại kết nối keep-alive"""
+
+    mode = "http"
+
+    def __init__(self, base_url: str = API_BASE_URL, timeout: float = HTTP_TIMEOUT_SECONDS):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def check_connection(self) -> bool:
+        try:
+            response = self.session.get(f"{self.base_url}/articles/count", timeout=5)
+            return response.status_code == 200
+        except requests.RequestException as e:
+            logger.warning(f"⚠️ Kết nối API thất bại: {e}")
+            return False
+
+    def get_active_sources(self) -> List[Dict[str, Any]]:
+        response = self.session.get(
+            f"{self.base_url}/crawl-sources", params={"is_active": True}, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def ingest_articles(self, articles: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Gửi cả batch qua POST /articles/bulk, mỗi request tối đa BULK_BATCH_SIZE bài"""
+        results: List[Optional[Dict[str, Any]]] = []
+        for offset in range(0, len(articles), BULK_BATCH_SIZE):
+            batch = articles[offset:offset + BULK_BATCH_SIZE]
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/articles/bulk",
+                    json={"articles": [build_article_payload(article_data) for article_data in batch]},
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+                results.extend(response.json()["items"])
+            except (requests.RequestException, KeyError, ValueError) as e:
+                logger.error(f"❌ Lỗi khi post {len(batch)} bài báo: {e}")
+                results.extend([None] * len(batch))
+        return results
+
+    def update_source(self, source_id: int, update_data: Dict[str, Any]) -> bool:
+        try:
+            response = self.session.put(
+                f"{self.base_url}/crawl-sources/{source_id}", json=update_data, timeout=self.timeout
+            )
+            response.raise_for_status()
+            return True
+        except requests.RequestException as e:
+            logger.error(f"❌ Lỗi khi cập nhật nguồn {source_id}: {e}")
+            return False
+
+
+def get_ingestion_service(mode: Optional[str] = None):
+    """Chọn cách ghi dữ liệu theo INGESTION_MODE (local | http)"""
+    mode = (mode or INGESTION_MODE).lower()
+    if mode == "http":
+        return HttpIngestionService()
+    if mode != "local":
+        logger.warning(f"⚠️ INGESTION_MODE '{mode}' không hợp lệ, dùng local")
+    return LocalIngestionService()
+
+
+# Instance dùng chung cho scheduler
+ingestion_service = get_ingestion_service()
@@ -0,0 +1,154 @@
+import logging
+import os
+import socket
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.crud import job_crud
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "2"))
+# Job chạy quá thời gian này mà chưa xong (worker chết/treo) sẽ được worker khác nhận lại
+JOB_VISIBILITY_TIMEOUT_SECONDS = float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "300"))
+
+# Loại job: mỗi stage xử lý article là một loại job
+ANALYZE_ARTICLE_JOB = "analyze_article"
+NOTIFY_ARTICLE_JOB = "notify_article"
+STAGE_JOB_TYPES = {"analyze": ANALYZE_ARTICLE_JOB, "notify": NOTIFY_ARTICLE_JOB}
+
+# handler(db, payload, job): raise exception để job được thử lại theo backoff.
+# job gồm id, job_type, attempts, max_attempts, worker_id (dùng làm chủ lease)
+JobHandler = Callable[[Session, Dict[str, Any], Dict[str, Any]], None]
+
+
+class JobWorkerPool:
+    """
+    Pool thread xử lý job từ hàng đợi SQLite. An toàn khi chạy nhiều pool
+    (nhiều process) cùng lúc: việc nhận job là một câu UPDATE nguyên tử có lease.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = JOB_WORKERS,
+        poll_interval: float = JOB_POLL_INTERVAL_SECONDS,
+        visibility_timeout: float = JOB_VISIBILITY_TIMEOUT_SECONDS,
+    ):
+        self.num_workers = max(0, num_workers)
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.handlers: Dict[str, JobHandler] = {}
+        self._threads: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def register(self, job_type: str, handler: JobHandler):
+        """Đăng ký hàm xử lý cho một loại job"""
+        self.handlers[job_type] = handler
+
+    def start(self):
+        """Khởi động các worker thread (gọi lại khi đang chạy thì không làm gì)"""
+        if self._threads or self.num_workers == 0:
+            return
+        self._stop_event.clear()
+        for index in range(self.num_workers):
+            thread = threading.Thread(
+                target=self._worker_loop, args=(f"{self._worker_prefix}:{index}",), daemon=True,
+                name=f"job-worker-{index}",
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"🧵 Khởi động {self.num_workers} job worker: {list(self.handlers)}")
+
+    def stop(self, timeout: float = 5.0):
+        """Dừng worker; job đang chạy dở sẽ được nhận lại khi hết lease"""
+        self._stop_event.set()
+        self._wake_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        """Báo worker có job mới để không phải chờ hết chu kỳ poll"""
+        self._wake_event.set()
+
+    def run_once(self, worker_id: Optional[str] = None) -> bool:
+        """Nhận và xử lý tối đa một job, trả về True nếu có job được xử lý"""
+        worker_id = worker_id or f"{self._worker_prefix}:manual"
+        if not self.handlers:
+            return False
+
+        with SessionLocal() as db:
+            job_crud.fail_expired_jobs(db)
+            jobs = job_crud.claim_jobs(db, worker_id, list(self.handlers), self.visibility_timeout, limit=1)
+        if not jobs:
+            return False
+
+        job = jobs[0]
+        job["worker_id"] = worker_id
+        handler = self.handlers[job["job_type"]]
+        # Gia hạn lease trong lúc handler chạy (VD: gọi Gemini + retry lâu hơn visibility timeout)
+        # để job không bị worker khác nhận lại và xử lý trùng
+        handler_done = threading.Event()
+        renewer = threading.Thread(
+            target=self._renew_lease, args=(job, worker_id, handler_done), daemon=True,
+            name=f"job-lease-{job['id']}",
+        )
+        renewer.start()
+        try:
+            try:
+                with SessionLocal() as db:
+                    handler(db, job["payload"], job)
+            finally:
+                handler_done.set()
+                renewer.join()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            with SessionLocal() as db:
+                status = job_crud.fail_job(db, job["id"], worker_id, error + "\n" + traceback.format_exc(limit=5))
+            logger.warning(
+                f"⚠️ Job {job['id']} ({job['job_type']}) lỗi lần {job['attempts']}/{job['max_attempts']}: "
+                f"{error} -> {status}"
+            )
+            return True
+
+        with SessionLocal() as db:
+            if not job_crud.complete_job(db, job["id"], worker_id):
+                logger.warning(f"⚠️ Job {job['id']} đã hết lease trước khi xong, có thể bị xử lý lại")
+        return True
+
+    def _renew_lease(self, job: Dict[str, Any], worker_id: str, handler_done: threading.Event):
+        """Gia hạn lease mỗi 1/3 visibility timeout cho tới khi handler xong hoặc mất lease"""
+        interval = self.visibility_timeout / 3
+        while not handler_done.wait(interval):
+            try:
+                with SessionLocal() as db:
+                    if not job_crud.extend_job_lease(db, job["id"], worker_id, self.visibility_timeout):
+                        logger.warning(f"⚠️ Job {job['id']} đã bị worker khác nhận, ngừng gia hạn lease")
+                        return
+            except Exception as e:
+                # Lỗi DB tạm thời: thử lại ở chu kỳ sau, lease cũ vẫn còn ít nhất 2/3 thời gian
+                logger.warning(f"⚠️ Không gia hạn được lease job {job['id']}: {e}")
+
+    def _worker_loop(self, worker_id: str):
+        while not self._stop_event.is_set():
+            try:
+                processed = self.run_once(worker_id)
+            except Exception as e:
+                # Lỗi DB (VD: database bị khóa) - chờ rồi thử lại
+                logger.error(f"❌ Job worker {worker_id} lỗi: {e}")
+                processed = False
+            if not processed:
+                self._wake_event.wait(self.poll_interval)
+                self._wake_event.clear()
+
+
+# Pool dùng chung cho API process
+job_worker_pool = JobWorkerPool()
@@ -0,0 +1,138 @@
+import asyncio
+import inspect
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from app.database import SQLITE_BUSY_TIMEOUT_SECONDS, SessionLocal
+from app.crud import leader_lease_crud
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Leader không gia hạn trong LEADER_LEASE_SECONDS giây (process chết/treo) thì process khác nhận thay.
+# Phải dài hơn hẳn busy timeout của SQLite + một heartbeat: một lần gia hạn phải chờ khóa ghi
+# không được làm lease hết hạn trong khi leader vẫn sống
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "90"))
+LEADER_HEARTBEAT_SECONDS = float(os.getenv("LEADER_HEARTBEAT_SECONDS", "10"))
+
+# Callback có thể là hàm thường hoặc coroutine
+LeaderCallback = Callable[[], Any]
+
+
+class LeaderElector:
+    """
+    Bầu một leader giữa các process dùng chung database (VD: uvicorn --workers N)
+    bằng một dòng lease trong SQLite. Leader gia hạn lease mỗi heartbeat; các process
+    khác thử nhận lease mỗi heartbeat và chỉ thành công khi lease đã hết hạn.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        lease_seconds: float = LEADER_LEASE_SECONDS,
+        heartbeat_seconds: float = LEADER_HEARTBEAT_SECONDS,
+    ):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = min(heartbeat_seconds, lease_seconds / 2)
+        if lease_seconds <= SQLITE_BUSY_TIMEOUT_SECONDS + self.heartbeat_seconds:
+            logger.warning(
+                f"⚠️ Lease leader '{name}' ({lease_seconds:.0f}s) không dài hơn busy timeout SQLite "
+                f"({SQLITE_BUSY_TIMEOUT_SECONDS}s) + heartbeat ({self.heartbeat_seconds:.0f}s): "
+                f"leader có thể mất lease khi database bận"
+            )
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self.on_elected: Optional[LeaderCallback] = None
+        self.on_demoted: Optional[LeaderCallback] = None
+        self._lease_deadline = 0.0  # Theo đồng hồ monotonic của process
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, on_elected: LeaderCallback, on_demoted: LeaderCallback):
+        """Bắt đầu tranh cử trên event loop hiện tại"""
+        if self._task is not None and not self._task.done():
+            return
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self._task = asyncio.create_task(self._run(), name=f"leader-{self.name}")
+
+    async def stop(self):
+        """Dừng tranh cử; đang là leader thì dừng công việc và trả lease cho process khác"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.is_leader:
+            await self._demote()
+            try:
+                await asyncio.to_thread(self._release)
+            except Exception as e:
+                logger.warning(f"⚠️ Không trả được lease {self.name}: {e}")
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                acquired = await asyncio.to_thread(self._try_acquire)
+            except Exception as e:
+                # Lỗi DB (VD: database bị khóa): vẫn là leader cho tới khi lease đã nhận hết hạn
+                logger.warning(f"⚠️ Gia hạn lease {self.name} lỗi: {e}")
+                acquired = self.is_leader and time.monotonic() < self._lease_deadline
+            else:
+                if acquired:
+                    self._lease_deadline = started + self.lease_seconds
+
+            if acquired and not self.is_leader:
+                self.is_leader = True
+                logger.info(f"👑 {self.owner} trở thành leader '{self.name}'")
+                await self._call(self.on_elected)
+            elif not acquired and self.is_leader:
+                logger.warning(f"⚠️ {self.owner} mất vai trò leader '{self.name}'")
+                await self._demote()
+
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    async def _demote(self):
+        # on_demoted (pipeline_scheduler.stop) chờ pipeline đang chạy dừng hẳn; vòng tranh cử
+        # chỉ chạy tiếp sau đó nên process không thể được bầu lại khi còn việc cũ đang chạy
+        self.is_leader = False
+        await self._call(self.on_demoted)
+
+    async def _call(self, callback: Optional[LeaderCallback]):
+        if callback is None:
+            return
+        try:
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.error(f"❌ Lỗi callback leader '{self.name}': {e}")
+
+    def _try_acquire(self) -> bool:
+        with SessionLocal() as db:
+            return leader_lease_crud.try_acquire_lease(db, self.name, self.owner, self.lease_seconds)
+
+    def _release(self):
+        with SessionLocal() as db:
+            leader_lease_crud.release_lease(db, self.name, self.owner)
+
+    def status(self) -> Dict[str, Any]:
+        try:
+            with SessionLocal() as db:
+                lease = leader_lease_crud.get_lease(db, self.name)
+        except Exception as e:
+            lease = {"error": str(e)}
+        return {
+            "name": self.name,
+            "owner": self.owner,
+            "is_leader": self.is_leader,
+            "lease": lease,
+        }
+
+
+# Chỉ process giữ vai trò này chạy scheduler (crawl, metrics, bảo trì)
+scheduler_leader = LeaderElector("scheduler")
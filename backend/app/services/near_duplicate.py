@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.article_model import Article
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+# Hai bài có SimHash khác nhau tối đa N bit được coi là cùng một tin (bài đăng lại, sửa tiêu đề...)
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "4"))
+# Số bài gốc gần nhất giữ trong index (tin đăng lại thường xuất hiện gần nhau về thời gian)
+NEAR_DUPLICATE_INDEX_SIZE = int(os.getenv("NEAR_DUPLICATE_INDEX_SIZE", "50000"))
+# Đoạn văn quá ngắn thì SimHash không đủ tin cậy
+NEAR_DUPLICATE_MIN_TOKENS = int(os.getenv("NEAR_DUPLICATE_MIN_TOKENS", "12"))
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _to_signed(value: int) -> int:
+    """SQLite INTEGER là số có dấu 64-bit"""
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value & ((1 << SIMHASH_BITS) - 1)
+
+
+def compute_simhash(title: Optional[str], summary: Optional[str]) -> Optional[int]:
+    """
+    SimHash 64-bit trên các từ (âm tiết) của tiêu đề + đoạn trích, đã chuẩn hóa Unicode/chữ thường.
+    Trả về số có dấu để lưu thẳng vào SQLite; None nếu văn bản quá ngắn.
+    """
+    text = unicodedata.normalize("NFC", f"{title or ''} {summary or ''}").lower()
+    tokens = _TOKEN_PATTERN.findall(text)
+    if len(tokens) < NEAR_DUPLICATE_MIN_TOKENS:
+        return None
+
+    weights = [0] * SIMHASH_BITS
+    for token in tokens:
+        token_hash = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if token_hash >> bit & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return _to_signed(fingerprint)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(_to_unsigned(a) ^ _to_unsigned(b)).count("1")
+
+
+class SimHashIndex:
+    """
+    Index tra SimHash gần giống theo băng (banded lookup): chia 64 bit thành max_distance + 1
+    băng, hai SimHash lệch không quá max_distance bit chắc chắn trùng nhau ít nhất một băng.
+    Chỉ so khoảng cách Hamming với các ứng viên trùng băng thay vì toàn bộ index.
+    """
+
+    def __init__(self, max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE, max_size: int = NEAR_DUPLICATE_INDEX_SIZE):
+        self.max_distance = max_distance
+        self.max_size = max_size
+        num_bands = max_distance + 1
+        band_bits = SIMHASH_BITS // num_bands
+        # (shift, mask) của từng băng; băng cuối lấy phần bit còn dư
+        self._bands: List[Tuple[int, int]] = []
+        for band in range(num_bands):
+            width = band_bits if band < num_bands - 1 else SIMHASH_BITS - band_bits * band
+            self._bands.append((band * band_bits, (1 << width) - 1))
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._fingerprints: "OrderedDict[Any, int]" = OrderedDict()
+        self._buckets: List[Dict[int, List[Any]]] = [{} for _ in self._bands]
+        self.ready = False
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        unsigned = _to_unsigned(fingerprint)
+        return [(unsigned >> shift) & mask for shift, mask in self._bands]
+
+    def _add(self, key: Any, fingerprint: int):
+        if key in self._fingerprints:
+            return
+        self._fingerprints[key] = fingerprint
+        for buckets, band_key in zip(self._buckets, self._band_keys(fingerprint)):
+            buckets.setdefault(band_key, []).append(key)
+        if len(self._fingerprints) > self.max_size:
+            self._remove(next(iter(self._fingerprints)))
+
+    def _remove(self, key: Any):
+        fingerprint = self._fingerprints.pop(key)
+        for buckets, band_key in zip(self._buckets, self._band_keys(fingerprint)):
+            bucket = buckets.get(band_key)
+            if bucket is None:
+                continue
+            bucket.remove(key)
+            if not bucket:
+                del buckets[band_key]
+
+    def add(self, key: Any, fingerprint: Optional[int]):
+        if fingerprint is None:
+            return
+        with self._lock:
+            self._add(key, fingerprint)
+
+    def find(self, fingerprint: Optional[int]) -> Optional[Tuple[Any, int]]:
+        """Bài gần giống nhất trong ngưỡng: (key, khoảng cách), None nếu không có"""
+        if fingerprint is None:
+            return None
+        best: Optional[Tuple[Any, int]] = None
+        with self._lock:
+            seen = set()
+            for buckets, band_key in zip(self._buckets, self._band_keys(fingerprint)):
+                for key in buckets.get(band_key, ()):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    distance = hamming_distance(fingerprint, self._fingerprints[key])
+                    if distance <= self.max_distance and (best is None or distance < best[1]):
+                        best = (key, distance)
+        return best
+
+    def warm(self, db: Session, batch_size: int = 5000):
+        """Nạp SimHash của các bài gốc (không phải bản sao) gần nhất từ DB"""
+        with self._lock:
+            self._reset()
+            latest_ids = (
+                select(Article.id)
+                .where(Article.simhash.isnot(None), Article.duplicate_of_id.is_(None))
+                .order_by(Article.id.desc())
+                .limit(self.max_size)
+                .subquery()
+            )
+            rows = db.execute(
+                select(Article.id, Article.simhash)
+                .where(Article.id.in_(select(latest_ids.c.id)))
+                .order_by(Article.id)
+                .execution_options(yield_per=batch_size)
+            )
+            for article_id, fingerprint in rows:
+                self._add(article_id, fingerprint)
+            self.ready = True
+        logger.info(f"🧬 Near-duplicate index: nạp {len(self._fingerprints)} bài")
+
+    def ensure_warm(self, db: Session):
+        if not self.ready:
+            self.warm(db)
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+
+# Index dùng chung trong process: article_id -> SimHash của bài gốc
+near_duplicate_index = SimHashIndex()
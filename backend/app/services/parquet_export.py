@@ -0,0 +1,334 @@
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.orm import Session
+
+from app.crud import export_crud
+from app.models.ai_analysis_model import ArticleAIAnalysis
+from app.models.article_model import Article
+from app.models.company_model import CompanyMetrics
+
+# pyarrow là phụ thuộc tùy chọn, chỉ cần khi xuất Parquet
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXPORT_STATE_FILE = "_export_state.json"
+PARQUET_EXPORT_BATCH_SIZE = int(os.getenv("PARQUET_EXPORT_BATCH_SIZE", "50000"))
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+# Số file partition mở cùng lúc khi ghi; vượt thì đóng file mở lâu nhất (lô sau mở file mới)
+MAX_OPEN_PARTITIONS = 32
+# Tên partition cho dòng không có ngày (quy ước của Hive)
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def _parse_keywords(value: Optional[str]) -> Optional[List[str]]:
+    """keywords_extracted lưu dạng chuỗi JSON, xuất thành list<string>"""
+    if not value:
+        return None
+    try:
+        parsed = json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    return [str(keyword) for keyword in parsed] if isinstance(parsed, list) else None
+
+
+class DatasetSpec(NamedTuple):
+    table: Table
+    partition_column: str  # Cột DateTime dùng để chia partition theo ngày
+    columns: Sequence[tuple]  # (tên cột, kiểu Arrow: int64 | float64 | string | timestamp | list_string)
+    converters: Dict[str, Callable[[Any], Any]] = {}
+
+
+# Bỏ các cột nặng/không dùng cho phân tích: body_compressed, raw_data, thông tin lease
+DATASETS: Dict[str, DatasetSpec] = {
+    "articles": DatasetSpec(
+        Article.__table__, "created_at",
+        [
+            ("id", "int64"), ("title", "string"), ("url", "string"), ("summary", "string"),
+            ("published_date_str", "string"), ("source_url", "string"), ("content_hash", "string"),
+            ("simhash", "int64"), ("duplicate_of_id", "int64"), ("processing_state", "string"),
+            ("created_at", "timestamp"), ("updated_at", "timestamp"),
+        ],
+    ),
+    "ai_analysis": DatasetSpec(
+        ArticleAIAnalysis.__table__, "created_at",
+        [
+            ("id", "int64"), ("article_id", "int64"), ("summary", "string"), ("category", "string"),
+            ("sentiment_score", "float64"), ("impact_score", "float64"), ("keywords_extracted", "list_string"),
+            ("analysis_metadata", "string"), ("created_at", "timestamp"), ("updated_at", "timestamp"),
+        ],
+        {"keywords_extracted": _parse_keywords},
+    ),
+    "company_metrics": DatasetSpec(
+        CompanyMetrics.__table__, "recorded_at",
+        [
+            ("id", "int64"), ("company_id", "int64"), ("symbol", "string"),
+            ("pe_ratio", "float64"), ("pb_ratio", "float64"), ("price_to_sales_ratio", "float64"),
+            ("market_cap", "int64"), ("eps", "float64"), ("revenue", "int64"), ("net_income", "int64"),
+            ("roe", "float64"), ("roa", "float64"), ("gross_profit", "int64"), ("operating_income", "int64"),
+            ("ebitda", "int64"), ("debt_to_equity", "float64"), ("current_ratio", "float64"),
+            ("quick_ratio", "float64"), ("cash_ratio", "float64"), ("debt_ratio", "float64"),
+            ("gross_profit_margin", "float64"), ("operating_profit_margin", "float64"),
+            ("net_profit_margin", "float64"), ("operating_cash_flow_ratio", "float64"),
+            ("shares_outstanding", "int64"), ("revenue_per_share", "float64"),
+            ("net_income_per_share", "float64"), ("data_source", "string"),
+            ("recorded_at", "timestamp"), ("created_at", "timestamp"),
+        ],
+    ),
+}
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Xuất Parquet cần pyarrow: pip install pyarrow")
+
+
+def _arrow_schema(spec: DatasetSpec) -> "pa.Schema":
+    types = {
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "string": pa.string(),
+        "timestamp": pa.timestamp("us"),
+        "list_string": pa.list_(pa.string()),
+    }
+    return pa.schema([(name, types[type_name]) for name, type_name in spec.columns])
+
+
+def load_export_state(output_dir: str) -> Dict[str, Any]:
+    path = os.path.join(output_dir, EXPORT_STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_export_state(output_dir: str, state: Dict[str, Any]):
+    """Ghi file trạng thái qua file tạm + rename để không bao giờ còn file ghi dở"""
+    path = os.path.join(output_dir, EXPORT_STATE_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class _PartitionWriters:
+    """
+    Một ParquetWriter cho mỗi partition ngày đang ghi (mỗi lô là một row group).
+    File được ghi dưới tên bắt đầu bằng "_" (pyarrow.dataset, Spark... bỏ qua); việc đổi
+    sang tên thật do _publish_pending làm sau khi trạng thái đã được ghi.
+    """
+
+    def __init__(self, dataset_dir: str, schema: "pa.Schema", run_id: str):
+        self.dataset_dir = dataset_dir
+        self.schema = schema
+        self.run_id = run_id
+        self._writers: "OrderedDict[str, tuple]" = OrderedDict()  # partition -> (writer, đường dẫn tạm)
+        self._finished: List[str] = []  # File tạm đã đóng, chờ đổi tên
+        self._sequence = 0
+
+    def write(self, partition: str, table: "pa.Table"):
+        entry = self._writers.get(partition)
+        if entry is None:
+            if len(self._writers) >= MAX_OPEN_PARTITIONS:
+                _, oldest = self._writers.popitem(last=False)
+                self._close(*oldest)
+            partition_dir = os.path.join(self.dataset_dir, f"date={partition}")
+            os.makedirs(partition_dir, exist_ok=True)
+            self._sequence += 1
+            path = os.path.join(partition_dir, f"_part-{self.run_id}-{self._sequence:04d}.parquet")
+            entry = (pq.ParquetWriter(path, self.schema, compression=PARQUET_COMPRESSION), path)
+            self._writers[partition] = entry
+        else:
+            self._writers.move_to_end(partition)
+        entry[0].write_table(table)
+
+    def _close(self, writer, path: str):
+        self._finished.append(path)
+        writer.close()
+
+    def close(self) -> List[str]:
+        """Đóng mọi file, trả về đường dẫn các file tạm đã ghi"""
+        while self._writers:
+            _, entry = self._writers.popitem(last=False)
+            self._close(*entry)
+        finished, self._finished = self._finished, []
+        return finished
+
+    def abort(self):
+        """Lỗi giữa chừng: bỏ mọi file của lần xuất này, trạng thái không đổi nên lần sau xuất lại"""
+        while self._writers:
+            _, entry = self._writers.popitem(last=False)
+            try:
+                self._close(*entry)
+            except Exception:
+                pass
+        for tmp_path in self._finished:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._finished = []
+
+
+def _published_path(tmp_path: str) -> str:
+    directory, tmp_name = os.path.split(tmp_path)
+    return os.path.join(directory, tmp_name[1:])
+
+
+def _publish_pending(output_dir: str, name: str, state: Dict[str, Any]) -> int:
+    """
+    Đổi tên các file tạm trong pending_files của dataset sang tên thật rồi xóa danh sách này
+    khỏi state. Chạy lại được nhiều lần: file đã đổi tên ở lần trước (bị dừng giữa chừng) được bỏ qua.
+    """
+    dataset_state = state.get(name, {})
+    pending = dataset_state.get("pending_files")
+    if not pending:
+        return 0
+    for relative_path in pending:
+        tmp_path = os.path.join(output_dir, relative_path)
+        if os.path.exists(tmp_path):
+            os.replace(tmp_path, _published_path(tmp_path))
+        elif not os.path.exists(_published_path(tmp_path)):
+            logger.warning(f"⚠️ Export {name}: thiếu file {relative_path}, các dòng trong file này sẽ không có")
+    del dataset_state["pending_files"]
+    save_export_state(output_dir, state)
+    return len(pending)
+
+
+def _recover_dataset(output_dir: str, name: str, state: Dict[str, Any]):
+    """
+    Dọn kết quả của lần xuất trước bị dừng giữa chừng: file đã ghi vào state thì đổi tên nốt,
+    file tạm "_part-*" còn lại (state chưa ghi nên các dòng này sẽ được xuất lại) thì xóa.
+    """
+    recovered = _publish_pending(output_dir, name, state)
+    if recovered:
+        logger.info(f"📦 Export {name}: hoàn tất {recovered} file của lần xuất trước")
+    for directory, _, file_names in os.walk(os.path.join(output_dir, name)):
+        for file_name in file_names:
+            if file_name.startswith("_part-") and file_name.endswith(".parquet"):
+                os.remove(os.path.join(directory, file_name))
+                logger.info(f"🗑️ Export {name}: xóa file tạm còn sót {file_name}")
+
+
+def _partition_key(value: Optional[datetime]) -> str:
+    return value.date().isoformat() if value is not None else NULL_PARTITION
+
+
+def _batch_to_partitions(spec: DatasetSpec, schema: "pa.Schema", rows: Iterable) -> Dict[str, "pa.Table"]:
+    """Chia một lô dòng theo ngày của partition_column, mỗi ngày thành một bảng Arrow"""
+    names = [name for name, _ in spec.columns]
+    partition_index = names.index(spec.partition_column)
+    grouped: Dict[str, List] = {}
+    for row in rows:
+        grouped.setdefault(_partition_key(row[partition_index]), []).append(row)
+
+    tables = {}
+    for partition, partition_rows in grouped.items():
+        arrays = []
+        for index, (name, column) in enumerate(zip(names, zip(*partition_rows))):
+            converter = spec.converters.get(name)
+            values = [converter(value) for value in column] if converter else column
+            arrays.append(pa.array(values, type=schema.field(index).type))
+        tables[partition] = pa.Table.from_arrays(arrays, schema=schema)
+    return tables
+
+
+def export_dataset(
+    db: Session,
+    name: str,
+    output_dir: str,
+    state: Dict[str, Any],
+    batch_size: int = PARQUET_EXPORT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Xuất các dòng mới (id lớn hơn lần xuất trước) của một dataset ra
+    output_dir/<name>/date=YYYY-MM-DD/part-*.parquet.
+    Thứ tự: ghi file tạm -> ghi state (last_id mới + pending_files) -> đổi tên file. Dừng ở bất kỳ
+    bước nào thì lần chạy sau (_recover_dataset) hoặc xuất lại, hoặc đổi tên nốt; không dòng nào bị xuất hai lần.
+    Chỉ thêm dòng mới: dòng đã xuất mà sau đó bị sửa sẽ không được xuất lại (dùng full để làm lại).
+    """
+    require_pyarrow()
+    _recover_dataset(output_dir, name, state)
+    spec = DATASETS[name]
+    schema = _arrow_schema(spec)
+    dataset_state = state.get(name, {})
+    last_id = dataset_state.get("last_id", 0)
+    run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    writers = _PartitionWriters(os.path.join(output_dir, name), schema, run_id)
+
+    start = time.perf_counter()
+    rows_written = 0
+    max_id = last_id
+    column_names = [column_name for column_name, _ in spec.columns]
+    try:
+        for batch in export_crud.iter_table_batches(db, spec.table, column_names, last_id, batch_size):
+            for partition, table in _batch_to_partitions(spec, schema, batch).items():
+                writers.write(partition, table)
+            rows_written += len(batch)
+            max_id = batch[-1].id
+        tmp_files = writers.close()
+    except Exception:
+        writers.abort()
+        raise
+
+    files = 0
+    if rows_written:
+        state[name] = {
+            "last_id": max_id,
+            "rows": dataset_state.get("rows", 0) + rows_written,
+            "last_exported_at": datetime.utcnow().isoformat(),
+            "pending_files": [os.path.relpath(path, output_dir) for path in tmp_files],
+        }
+        save_export_state(output_dir, state)
+        files = _publish_pending(output_dir, name, state)
+    result = {
+        "dataset": name,
+        "rows": rows_written,
+        "files": files,
+        "last_id": max_id,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    logger.info(f"📦 Export {name}: {rows_written} dòng, {files} file trong {result['seconds']}s")
+    return result
+
+
+def run_export(
+    db: Session,
+    output_dir: str,
+    datasets: Optional[Sequence[str]] = None,
+    full: bool = False,
+    batch_size: int = PARQUET_EXPORT_BATCH_SIZE,
+) -> List[Dict[str, Any]]:
+    """
+    Xuất các dataset (mặc định tất cả) ra output_dir. full=True xóa dữ liệu đã xuất và xuất lại từ đầu.
+    File trạng thái được ghi sau mỗi dataset thành công (export_dataset tự ghi).
+    """
+    require_pyarrow()
+    datasets = list(datasets or DATASETS)
+    unknown = [name for name in datasets if name not in DATASETS]
+    if unknown:
+        raise ValueError(f"Dataset không hợp lệ: {unknown}, chọn trong {list(DATASETS)}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    state = load_export_state(output_dir)
+    results = []
+    for name in datasets:
+        if full:
+            shutil.rmtree(os.path.join(output_dir, name), ignore_errors=True)
+            state.pop(name, None)
+            save_export_state(output_dir, state)
+        results.append(export_dataset(db, name, output_dir, state, batch_size))
+    return results
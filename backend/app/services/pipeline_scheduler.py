@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ScheduledJob:
+    """Một pipeline chạy định kỳ kèm thống kê các lần chạy"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        interval_seconds: float,
+        jitter_seconds: float = 0.0,
+        run_on_start: bool = True,
+    ):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.jitter_seconds = jitter_seconds
+        self.run_on_start = run_on_start
+
+        self.running = False
+        self.run_count = 0
+        self.error_count = 0
+        self.skipped_count = 0
+        self.last_started_at: Optional[datetime] = None
+        self.last_finished_at: Optional[datetime] = None
+        self.last_duration_seconds: Optional[float] = None
+        self.max_duration_seconds: Optional[float] = None
+        self.total_duration_seconds = 0.0
+        self.last_error: Optional[str] = None
+        self.next_run_at: Optional[datetime] = None
+
+    def next_delay(self) -> float:
+        """Khoảng chờ tới lần chạy sau, cộng jitter để các pipeline không dồn cùng lúc"""
+        return self.interval_seconds + random.uniform(0, self.jitter_seconds)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval_seconds,
+            "running": self.running,
+            "run_count": self.run_count,
+            "error_count": self.error_count,
+            "skipped_count": self.skipped_count,
+            "last_started_at": self.last_started_at,
+            "last_finished_at": self.last_finished_at,
+            "last_duration_seconds": self.last_duration_seconds,
+            "avg_duration_seconds": self.total_duration_seconds / self.run_count if self.run_count else None,
+            "max_duration_seconds": self.max_duration_seconds,
+            "last_error": self.last_error,
+            "next_run_at": self.next_run_at,
+        }
+
+
+class PipelineScheduler:
+    """
+    Scheduler chạy trên event loop của API: mỗi pipeline có vòng lặp riêng nên
+    pipeline chậm không làm trễ pipeline khác. Mỗi pipeline chỉ có tối đa một lần
+    chạy tại một thời điểm (single-flight). Hàm đồng bộ chạy trên thread để không
+    chặn event loop. Khi dừng (VD: mất vai trò leader), stop() đặt cờ stop_requested để
+    pipeline dừng ở ranh giới tiếp theo (giữa các nguồn/công ty) rồi chờ thread chạy xong.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.started_at: Optional[datetime] = None
+        self.bootstrap_error: Optional[str] = None
+        self._tasks: List[asyncio.Task] = []
+        self._runs: Set[asyncio.Future] = set()  # Pipeline đang chạy trên thread
+        self._stop_requested = threading.Event()
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        interval_seconds: float,
+        jitter_seconds: float = 0.0,
+        run_on_start: bool = True,
+    ) -> ScheduledJob:
+        """Đăng ký pipeline (đăng ký lại cùng tên sẽ thay thế)"""
+        job = ScheduledJob(name, func, interval_seconds, jitter_seconds, run_on_start)
+        self.jobs[name] = job
+        return job
+
+    @property
+    def stop_requested(self) -> bool:
+        """Pipeline (chạy trên thread) kiểm tra cờ này giữa các bước để dừng sớm khi scheduler dừng"""
+        return self._stop_requested.is_set()
+
+    @property
+    def is_running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self, bootstrap: Optional[Callable[[], bool]] = None):
+        """
+        Khởi động scheduler trên event loop hiện tại. bootstrap (đồng bộ, chạy trên thread)
+        được gọi một lần trước khi chạy pipeline; trả về False thì scheduler không chạy.
+        """
+        if self.is_running:
+            return
+        self._stop_requested.clear()
+        self.started_at = datetime.now()
+        self._tasks = [asyncio.create_task(self._run(bootstrap), name="pipeline-scheduler")]
+
+    async def stop(self):
+        """
+        Hủy các vòng lặp, báo pipeline đang chạy dừng lại và chờ thread của chúng kết thúc.
+        Chỉ return khi không còn pipeline nào chạy, nên process mất leader không chạy trùng
+        với leader mới sau khi được bầu lại.
+        """
+        self._stop_requested.set()
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._runs:
+            logger.info(f"⏳ Chờ {len(self._runs)} pipeline đang chạy dừng hẳn...")
+            await asyncio.wait(set(self._runs))
+
+    async def _run(self, bootstrap: Optional[Callable[[], bool]]):
+        if bootstrap is not None:
+            try:
+                ready = await asyncio.to_thread(bootstrap)
+            except Exception as e:
+                ready = False
+                self.bootstrap_error = f"{type(e).__name__}: {e}"
+                logger.error(f"❌ Lỗi khởi tạo scheduler: {e}")
+            if not ready:
+                logger.error("❌ Scheduler không khởi động vì bước khởi tạo thất bại")
+                return
+
+        self._tasks.extend(
+            asyncio.create_task(self._job_loop(job), name=f"pipeline-{job.name}") for job in self.jobs.values()
+        )
+        logger.info(
+            "⏰ Scheduler đã khởi động: "
+            + ", ".join(f"{job.name} mỗi {job.interval_seconds / 60:.0f} phút" for job in self.jobs.values())
+        )
+
+    async def _job_loop(self, job: ScheduledJob):
+        delay = 0.0 if job.run_on_start else job.next_delay()
+        while True:
+            job.next_run_at = datetime.now() + timedelta(seconds=delay)
+            await asyncio.sleep(delay)
+            await self.run_job(job.name)
+            delay = job.next_delay()
+
+    async def run_job(self, name: str) -> bool:
+        """Chạy pipeline ngay; trả về False nếu lần chạy trước chưa xong (bỏ qua lần này)"""
+        job = self.jobs[name]
+        if job.running:
+            job.skipped_count += 1
+            logger.warning(f"⏭️ Bỏ qua {name}: lần chạy trước vẫn chưa xong")
+            return False
+
+        job.running = True
+        job.last_started_at = datetime.now()
+        start = time.perf_counter()
+        run = asyncio.ensure_future(asyncio.to_thread(job.func))
+        self._runs.add(run)
+        run.add_done_callback(lambda finished: self._finish_run(job, finished, start))
+        # asyncio.wait không hủy run khi task này bị hủy: thread vẫn được theo dõi tới khi xong
+        await asyncio.wait({run})
+        return True
+
+    def _finish_run(self, job: ScheduledJob, run: asyncio.Future, start: float):
+        """Ghi thống kê khi thread của pipeline kết thúc"""
+        self._runs.discard(run)
+        duration = time.perf_counter() - start
+        error = None if run.cancelled() else run.exception()
+        if error is None:
+            job.last_error = None
+        else:
+            job.error_count += 1
+            job.last_error = f"{type(error).__name__}: {error}"
+            logger.error(f"❌ Pipeline {job.name} lỗi: {error}")
+        job.running = False
+        job.run_count += 1
+        job.last_finished_at = datetime.now()
+        job.last_duration_seconds = duration
+        job.total_duration_seconds += duration
+        job.max_duration_seconds = max(job.max_duration_seconds or 0.0, duration)
+        logger.info(f"✅ Pipeline {job.name} xong trong {duration:.2f}s")
+
+    def trigger(self, name: str) -> bool:
+        """Yêu cầu chạy pipeline ngay (không chờ); False nếu pipeline đang chạy"""
+        if self.jobs[name].running:
+            return False
+        self._tasks = [task for task in self._tasks if not task.done()]
+        self._tasks.append(asyncio.create_task(self.run_job(name), name=f"pipeline-{name}-manual"))
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "started_at": self.started_at,
+            "bootstrap_error": self.bootstrap_error,
+            "jobs": [job.status() for job in self.jobs.values()],
+        }
+
+
+# Scheduler dùng chung cho API process
+pipeline_scheduler = PipelineScheduler()
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Mặc định mỗi host: 1 request/giây, cho phép burst 3 request
+DEFAULT_HOST_RATE = float(os.getenv("CRAWL_HOST_RATE", "1.0"))
+DEFAULT_HOST_BURST = float(os.getenv("CRAWL_HOST_BURST", "3"))
+BACKOFF_BASE_SECONDS = float(os.getenv("CRAWL_BACKOFF_BASE_SECONDS", "2"))
+BACKOFF_MAX_SECONDS = float(os.getenv("CRAWL_BACKOFF_MAX_SECONDS", "300"))
+
+# Status code báo server đang quá tải / giới hạn tốc độ
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse header Retry-After (số giây hoặc HTTP date) thành số giây cần chờ"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Token bucket theo kiểu đặt chỗ: mỗi request lấy 1 token, nếu thiếu thì
+    được báo phải chờ bao lâu. Có thể bị chặn tạm thời (Retry-After / backoff).
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = max(rate, 0.001)
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.consecutive_failures = 0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Lấy 1 token, trả về số giây phải chờ trước khi gửi request"""
+        with self._lock:
+            now = time.monotonic()
+            # Khi đang bị chặn, updated_at là thời điểm hết chặn: token chưa hồi và
+            # các request xếp hàng được giãn cách 1/rate tính từ lúc đó
+            if now > self.updated_at:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+            self.tokens -= 1
+            return (self.updated_at - now) + max(0.0, -self.tokens / self.rate)
+
+    def block_for(self, seconds: float):
+        """Chặn host trong một khoảng thời gian; hết chặn thì bucket bắt đầu lại từ 0 token"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            if self.blocked_until > self.updated_at:
+                self.tokens = 0.0
+                self.updated_at = self.blocked_until
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> float:
+        """Tăng số lần lỗi liên tiếp, trả về thời gian backoff (lũy thừa 2, có trần)"""
+        with self._lock:
+            self.consecutive_failures += 1
+            return min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** (self.consecutive_failures - 1)))
+
+
+class HostRateLimiter:
+    """
+    Bộ giới hạn tốc độ dùng chung theo host: các host khác nhau không chờ nhau,
+    các nguồn cùng host (VD: các chuyên mục VnExpress) chia chung một bucket.
+    Dùng được từ cả code async (acquire) và code đồng bộ (acquire_sync).
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_HOST_RATE,
+        burst: float = DEFAULT_HOST_BURST,
+        host_overrides: Optional[Dict[str, Dict[str, float]]] = None,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.host_overrides = host_overrides or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def get_bucket(self, url: str) -> TokenBucket:
+        """Lấy (hoặc tạo) bucket cho host của URL"""
+        host = self.host_of(url)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                override = self.host_overrides.get(host, {})
+                bucket = TokenBucket(override.get("rate", self.rate), override.get("burst", self.burst))
+                self._buckets[host] = bucket
+            return bucket
+
+    async def acquire(self, url: str) -> float:
+        """Chờ (async) tới lượt gửi request cho host, trả về thời gian đã chờ"""
+        delay = self.get_bucket(url).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def acquire_sync(self, url: str) -> float:
+        """Chờ (blocking) tới lượt gửi request cho host, trả về thời gian đã chờ"""
+        delay = self.get_bucket(url).reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def record_response(self, url: str, status_code: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """
+        Ghi nhận kết quả request. Với 429/503: chặn host theo Retry-After
+        (hoặc backoff lũy thừa nếu không có), trả về số giây bị chặn.
+        """
+        bucket = self.get_bucket(url)
+        if status_code not in THROTTLE_STATUS_CODES:
+            bucket.record_success()
+            return None
+
+        backoff = bucket.record_failure()
+        wait_seconds = parse_retry_after(retry_after)
+        if wait_seconds is None:
+            wait_seconds = backoff
+        wait_seconds = min(wait_seconds, BACKOFF_MAX_SECONDS)
+        bucket.block_for(wait_seconds)
+        logger.warning(f"⏳ {self.host_of(url)} trả về {status_code}, tạm dừng host {wait_seconds:.1f}s")
+        return wait_seconds
+
+    def record_error(self, url: str) -> float:
+        """Lỗi kết nối: backoff lũy thừa cho host"""
+        bucket = self.get_bucket(url)
+        wait_seconds = bucket.record_failure()
+        bucket.block_for(wait_seconds)
+        return wait_seconds
+
+
+# Instance dùng chung cho toàn bộ crawler
+host_rate_limiter = HostRateLimiter()
@@ -0,0 +1,164 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from sqlalchemy.orm import Session
+
+from app.crud import data_version_crud
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Giới hạn số response và tổng dung lượng (byte) giữ trong cache, vượt thì bỏ response lâu chưa dùng nhất
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_STATUS_HEADER = "X-Cache"
+# Client phải hỏi lại server mỗi lần dùng (gửi If-None-Match), server trả 304 nếu dữ liệu chưa đổi
+CACHE_CONTROL = "no-cache"
+
+# Hàm dựng response khi cache miss: trả về (body JSON, header cần giữ kèm, VD: X-Next-Cursor)
+ResponseBuilder = Callable[[], Tuple[bytes, Dict[str, str]]]
+
+
+class ResponseCache:
+    """
+    LRU các response JSON đã serialize sẵn, khóa theo route + query string.
+    Mỗi entry ghi kèm số phiên bản dữ liệu (data_versions, max id) lúc dựng response; phiên bản
+    hiện tại khác thì entry coi như hết hạn. Số phiên bản đọc trước khi dựng response nên
+    ghi xen giữa chỉ làm entry hết hạn sớm, không bao giờ giữ dữ liệu cũ.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Tuple, bytes, Dict[str, str]]]" = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _pop(self, key: str):
+        _, body, _ = self._entries.pop(key)
+        self.size_bytes -= len(body)
+
+    def get(self, key: str, versions: Tuple) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != versions:
+                if entry is not None:
+                    self._pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key: str, versions: Tuple, body: bytes, headers: Dict[str, str]):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (versions, body, headers)
+            self.size_bytes += len(body)
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Cache dùng chung trong process
+response_cache = ResponseCache()
+
+_list_adapters: Dict[type, TypeAdapter] = {}
+
+
+def serialize_models(schema: type, items: Sequence[Any]) -> bytes:
+    """Serialize danh sách ORM object/dict theo schema Pydantic thành JSON (như response_model của FastAPI)"""
+    adapter = _list_adapters.get(schema)
+    if adapter is None:
+        adapter = _list_adapters[schema] = TypeAdapter(List[schema])
+    return adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+
+
+def serialize_model(schema: type, item: Any) -> bytes:
+    return schema.model_validate(item, from_attributes=True).model_dump_json().encode("utf-8")
+
+
+def serialize_json(data: Any) -> bytes:
+    return to_json(data)
+
+
+def cache_key(request: Request) -> str:
+    """Route + query string đã sắp xếp (thứ tự tham số không làm lệch khóa)"""
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+def data_etag(fingerprint: Tuple) -> str:
+    """ETag mạnh từ số phiên bản dữ liệu, không cần serialize/băm body"""
+    return '"' + hashlib.blake2b(repr(fingerprint).encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """So If-None-Match (có thể là danh sách) với ETag theo kiểu so sánh yếu: bỏ tiền tố W/"""
+    if not if_none_match:
+        return False
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def cached_response(
+    request: Request,
+    db: Session,
+    tables: Sequence[str],
+    build: ResponseBuilder,
+    extra_version: Tuple = (),
+) -> Response:
+    """
+    Trả response từ cache nếu dữ liệu các bảng tables chưa đổi, ngược lại gọi build rồi lưu lại.
+    Response kèm ETag tính từ số phiên bản; client gửi If-None-Match khớp thì trả 304 không body.
+    extra_version: giá trị ngoài DB mà response phụ thuộc (VD: bộ đếm trong process).
+    Lỗi trong build (HTTPException...) được ném ra nguyên vẹn và không được cache.
+    """
+    key = cache_key(request)
+    versions = data_version_crud.get_data_fingerprint(db, tables) + tuple(extra_version)
+    etag = data_etag((key,) + versions)
+    validators = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=validators)
+
+    cached = response_cache.get(key, versions)
+    if cached is not None:
+        body, headers = cached
+        status = "HIT"
+    else:
+        body, headers = build()
+        response_cache.put(key, versions, body, headers)
+        status = "MISS"
+    return Response(
+        content=body, media_type="application/json", headers={**headers, **validators, CACHE_STATUS_HEADER: status}
+    )
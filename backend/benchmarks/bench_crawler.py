@@ -0,0 +1,263 @@
+"""
+Benchmark + kiểm tra hồi quy crawler trên corpus trang đã lưu (benchmarks/fixtures),
+chạy hoàn toàn offline qua ReplayTransport.
+
+    python benchmarks/bench_crawler.py                                  # chạy và in kết quả
+    python benchmarks/bench_crawler.py --save-baseline baseline.json    # lưu kết quả làm mốc
+    python benchmarks/bench_crawler.py --baseline baseline.json         # so với mốc, exit 1 nếu hồi quy
+
+Đo: số trang/giây, số bài/giây của stage parse (từng backend) và của cả
+AsyncCrawlEngine (fetch + parse), bộ nhớ đỉnh (tracemalloc, ru_maxrss).
+Kiểm tra: số bài trích xuất của từng trang phải đúng như manifest,
+các backend cho cùng kết quả, request có ETag được trả 304.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, current_dir)
+
+from app.services.crawl_engine import DEFAULT_PARSE_WORKERS, AsyncCrawlEngine, shutdown_parse_pool
+from app.services.feed_parser import parse_articles_from_feed
+from app.services.generic_crawler import parse_articles_from_html
+from app.services.html_parser import available_backends, clear_selector_cache
+from app.services.rate_limiter import HostRateLimiter
+from replay import FIXTURES_DIR, ReplayTransport, load_fixture_body, load_manifest
+from setup_sample_sources import sample_sources
+
+# Tắt log từng bài/từng request để không ảnh hưởng kết quả đo. Đặt ở cấp module
+# vì process parse (spawn) import lại file này chứ không chạy main()
+for _logger_name in ("app.services.generic_crawler", "app.services.feed_parser", "app.services.crawl_engine", "httpx"):
+    logging.getLogger(_logger_name).setLevel(logging.WARNING)
+
+# Mặc định cho phép chậm hơn mốc tối đa 20% trước khi báo hồi quy
+DEFAULT_TOLERANCE = 0.2
+
+
+def load_corpus(fixtures_dir):
+    """Ghép nguồn trong setup_sample_sources.py với trang đã lưu tương ứng"""
+    manifest = load_manifest(fixtures_dir)
+    corpus = []
+    seen = set()
+    for index, source in enumerate(sample_sources, start=1):
+        entry = manifest.get(source["url"])
+        if entry is None or source["url"] in seen:
+            continue
+        seen.add(source["url"])
+        corpus.append({
+            "source": {**source, "id": index},
+            "entry": entry,
+            "body": load_fixture_body(entry, fixtures_dir),
+        })
+    if not corpus:
+        sys.exit(f"❌ Không có trang nào trong {fixtures_dir}, chạy record_fixtures.py trước")
+    return corpus
+
+
+def extract(item, backend):
+    """Parse một trang đã lưu như crawler làm, không giới hạn số bài"""
+    source = item["source"]
+    if source.get("source_type") == "feed":
+        return parse_articles_from_feed(item["body"], page_url=source["url"], source_name=source["name"], max_articles=10_000)
+    return parse_articles_from_html(
+        html=item["body"],
+        page_url=source["url"],
+        article_container_selector=source["article_container_selector"],
+        title_selector=source["title_selector"],
+        link_selector=source["link_selector"],
+        summary_selector=source.get("summary_selector"),
+        date_selector=source.get("date_selector"),
+        source_name=source["name"],
+        max_articles=10_000,
+        parser_backend=backend,
+        selector_cache_key=source["id"],
+    )
+
+
+def without_timestamp(articles):
+    return [{k: v for k, v in a.items() if k != "collected_at_iso"} for a in articles]
+
+
+def check_extraction(corpus, backends):
+    """Số bài từng trang phải khớp manifest và mọi backend phải cho cùng kết quả"""
+    failures = []
+    reference = None
+    for backend in backends:
+        clear_selector_cache()
+        extracted = {item["source"]["url"]: without_timestamp(extract(item, backend)) for item in corpus}
+        for item in corpus:
+            url = item["source"]["url"]
+            expected = item["entry"]["expected_articles"]
+            if len(extracted[url]) != expected:
+                failures.append(f"{backend}: {item['source']['name']} trích xuất {len(extracted[url])} bài, cần {expected}")
+        if reference is None:
+            reference = extracted
+        elif extracted != reference:
+            failures.append(f"{backend}: kết quả khác backend {backends[0]}")
+    return failures
+
+
+def bench_parse(corpus, backend, iterations):
+    """Thông lượng stage parse (chạy tuần tự trong process hiện tại)"""
+    clear_selector_cache()
+    pages = articles = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for item in corpus:
+            articles += len(extract(item, backend))
+            pages += 1
+    elapsed = time.perf_counter() - start
+    return {"pages_per_sec": pages / elapsed, "articles_per_sec": articles / elapsed}
+
+
+def build_engine(fixtures_dir, parse_workers, latency):
+    transport = ReplayTransport(fixtures_dir, latency_seconds=latency)
+    # Corpus phát lại cục bộ: bỏ giới hạn tốc độ theo host để chỉ đo crawler
+    rate_limiter = HostRateLimiter(rate=1_000_000, burst=1_000_000)
+    return AsyncCrawlEngine(transport=transport, parse_workers=parse_workers, rate_limiter=rate_limiter, max_retries=0)
+
+
+def bench_engine(corpus, fixtures_dir, rounds, parse_workers, latency):
+    """Thông lượng toàn bộ AsyncCrawlEngine (fetch qua replay + parse)"""
+    engine = build_engine(fixtures_dir, parse_workers, latency)
+    sources = [item["source"] for item in corpus] * rounds
+
+    # Lượt khởi động: tạo process pool, compile selector
+    asyncio.run(engine.crawl_sources(sources[:len(corpus)], max_articles=10_000))
+
+    start = time.perf_counter()
+    summary = asyncio.run(engine.crawl_sources(sources, max_articles=10_000))
+    elapsed = time.perf_counter() - start
+    return {
+        "pages_per_sec": len(sources) / elapsed,
+        "articles_per_sec": summary["total_articles"] / elapsed,
+        "error_count": summary["error_count"],
+    }
+
+
+def check_conditional_get(corpus, fixtures_dir):
+    """Nguồn đã có ETag khớp phải được trả 304 và không bị parse lại"""
+    engine = build_engine(fixtures_dir, parse_workers=0, latency=0.0)
+    sources = [{**item["source"], "etag": item["entry"].get("etag")} for item in corpus if item["entry"].get("etag")]
+    summary = asyncio.run(engine.crawl_sources(sources, max_articles=10_000))
+    if summary["not_modified_count"] != len(sources) or summary["total_articles"]:
+        return [f"conditional GET: {summary['not_modified_count']}/{len(sources)} nguồn được trả 304"]
+    return []
+
+
+def measure_memory(corpus, backend):
+    """Bộ nhớ đỉnh (tracemalloc, chỉ tính cấp phát của Python) khi parse toàn bộ corpus một lượt"""
+    clear_selector_cache()
+    tracemalloc.start()
+    for item in corpus:
+        extract(item, backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả KB, macOS trả byte
+    return usage / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """So các chỉ số thông lượng với mốc, trả về danh sách hồi quy"""
+    regressions = []
+    for name, metrics in baseline.get("throughput", {}).items():
+        current = results["throughput"].get(name)
+        if current is None:
+            continue
+        for metric, base_value in metrics.items():
+            value = current.get(metric)
+            if value is not None and base_value and value < base_value * (1 - tolerance):
+                regressions.append(f"{name}.{metric}: {value:.1f} < mốc {base_value:.1f} (-{(1 - value / base_value) * 100:.0f}%)")
+    for backend, base_peak in baseline.get("peak_memory_mb", {}).items():
+        peak = results["peak_memory_mb"].get(backend)
+        if peak is not None and peak > base_peak * (1 + tolerance):
+            regressions.append(f"peak_memory_mb.{backend}: {peak:.2f} > mốc {base_peak:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark và kiểm tra hồi quy crawler trên corpus đã lưu")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--iterations", type=int, default=10, help="Số lượt parse corpus mỗi backend")
+    parser.add_argument("--rounds", type=int, default=10, help="Số lần lặp lại danh sách nguồn khi chạy engine")
+    parser.add_argument("--parse-workers", type=int, default=None, help="Số process parse của engine (0 = thread)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Độ trễ mạng giả lập mỗi request (giây)")
+    parser.add_argument("--backends", default=",".join(available_backends()))
+    parser.add_argument("--baseline", help="File JSON kết quả mốc để so sánh")
+    parser.add_argument("--save-baseline", help="Lưu kết quả lần chạy này ra file JSON")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.fixtures)
+    backends = [b for b in args.backends.split(",") if b in available_backends()]
+    total_bytes = sum(len(item["body"]) for item in corpus)
+    print(f"📄 {len(corpus)} trang, {total_bytes / 1024:.0f} KB, backend: {backends}")
+
+    failures = check_extraction(corpus, backends)
+    failures += check_conditional_get(corpus, args.fixtures)
+
+    results = {"throughput": {}, "peak_memory_mb": {}}
+    for backend in backends:
+        metrics = bench_parse(corpus, backend, args.iterations)
+        results["throughput"][f"parse_{backend}"] = metrics
+        results["peak_memory_mb"][backend] = measure_memory(corpus, backend)
+        print(
+            f"⏱️ parse {backend:>5}: {metrics['pages_per_sec']:.1f} trang/s, {metrics['articles_per_sec']:.0f} bài/s, "
+            f"bộ nhớ đỉnh {results['peak_memory_mb'][backend]:.2f} MB"
+        )
+
+    parse_workers = DEFAULT_PARSE_WORKERS if args.parse_workers is None else args.parse_workers
+    try:
+        metrics = bench_engine(corpus, args.fixtures, args.rounds, parse_workers, args.latency)
+    finally:
+        shutdown_parse_pool()
+    if metrics.pop("error_count"):
+        failures.append("engine: có nguồn bị lỗi khi phát lại corpus")
+    results["throughput"]["engine"] = metrics
+    print(f"⏱️ engine     : {metrics['pages_per_sec']:.1f} trang/s, {metrics['articles_per_sec']:.0f} bài/s")
+
+    rss = max_rss_mb()
+    if rss is not None:
+        results["max_rss_mb"] = rss
+        print(f"💾 ru_maxrss: {rss:.1f} MB")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"📁 Đã lưu mốc vào {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        failures += [f"hồi quy {r}" for r in regressions]
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Không phát hiện hồi quy")
+
+
+if __name__ == "__main__":
+    main()
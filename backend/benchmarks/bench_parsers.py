@@ -0,0 +1,114 @@
+"""
+Benchmark so sánh các parser backend (bs4 vs lxml) trên trang danh sách đã lưu.
+
+    python benchmarks/bench_parsers.py --pages path/to/saved_pages --iterations 20
+
+Không có --pages thì dùng các trang HTML trong corpus benchmarks/fixtures.
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, current_dir)
+
+from app.services.generic_crawler import parse_articles_from_html
+from app.services.html_parser import available_backends, clear_selector_cache
+from replay import load_fixture_body, load_manifest
+
+# Selector giống các nguồn VnExpress trong setup_sample_sources.py
+SELECTORS = {
+    "article_container_selector": ".item-news",
+    "title_selector": "h3 a, h2 a",
+    "link_selector": "h3 a, h2 a",
+    "summary_selector": ".description",
+    "date_selector": ".time",
+}
+
+
+def load_pages(pages_dir):
+    """Đọc các file .html đã lưu, hoặc các trang HTML trong corpus fixtures"""
+    if pages_dir:
+        pages = {}
+        for path in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+            with open(path, "rb") as f:
+                pages[os.path.basename(path)] = f.read()
+        if not pages:
+            sys.exit(f"❌ Không tìm thấy file .html nào trong {pages_dir}")
+        return pages
+    return {
+        entry["file"]: load_fixture_body(entry)
+        for entry in load_manifest().values()
+        if entry["content_type"].startswith("text/html")
+    }
+
+
+def extract(html, backend):
+    return parse_articles_from_html(
+        html=html,
+        page_url="https://vnexpress.net/kinh-doanh",
+        source_name="benchmark",
+        max_articles=1000,
+        parser_backend=backend,
+        selector_cache_key="benchmark",
+        **SELECTORS,
+    )
+
+
+def without_timestamp(articles):
+    return [{k: v for k, v in a.items() if k != "collected_at_iso"} for a in articles]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parser backend cho generic_crawler")
+    parser.add_argument("--pages", help="Thư mục chứa trang danh sách đã lưu (*.html)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--backends", default=",".join(available_backends()))
+    args = parser.parse_args()
+
+    # Tắt log từng bài để không ảnh hưởng kết quả đo
+    logging.getLogger("app.services.generic_crawler").setLevel(logging.WARNING)
+
+    pages = load_pages(args.pages)
+    backends = [b for b in args.backends.split(",") if b in available_backends()]
+    total_bytes = sum(len(html) for html in pages.values())
+    print(f"📄 {len(pages)} trang, {total_bytes / 1024:.0f} KB, {args.iterations} lần lặp, backend: {backends}")
+
+    timings = {}
+    reference = None
+    for backend in backends:
+        clear_selector_cache()
+        # Kiểm tra các backend trích xuất ra cùng kết quả
+        extracted = {name: without_timestamp(extract(html, backend)) for name, html in pages.items()}
+        if reference is None:
+            reference = extracted
+        elif extracted != reference:
+            print(f"⚠️ Backend {backend} cho kết quả khác {backends[0]}")
+
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for html in pages.values():
+                extract(html, backend)
+        elapsed = time.perf_counter() - start
+        timings[backend] = elapsed
+
+        page_count = len(pages) * args.iterations
+        articles = sum(len(a) for a in extracted.values())
+        print(
+            f"⏱️ {backend:>5}: {elapsed / page_count * 1000:.2f} ms/trang, "
+            f"{page_count / elapsed:.1f} trang/s, {articles} bài/lượt"
+        )
+
+    if "bs4" in timings:
+        for backend, elapsed in timings.items():
+            if backend != "bs4":
+                print(f"🚀 {backend} nhanh hơn bs4 {timings['bs4'] / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Ghi lại corpus trang danh sách cho các nguồn trong setup_sample_sources.py.
+
+    python benchmarks/record_fixtures.py              # tải trang thật (cần mạng)
+    python benchmarks/record_fixtures.py --synthetic  # sinh trang giả lập (offline)
+
+Mỗi trang được lưu dạng .gz, manifest.json ghi URL, content-type, ETag
+và số bài trích xuất được (dùng để phát hiện crawler bị hỏng).
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+
+import requests
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, current_dir)
+
+from app.services.feed_parser import parse_articles_from_feed
+from app.services.generic_crawler import DEFAULT_HEADERS, parse_articles_from_html
+from replay import FIXTURES_DIR, MANIFEST_FILE
+from sample_pages import build_feed, build_listing_page
+from setup_sample_sources import sample_sources
+
+
+def fixture_name(url: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", url.lower().split("://", 1)[-1]).strip("-")
+    return f"{slug}.gz"
+
+
+def count_articles(source: dict, body: bytes) -> int:
+    """Số bài trích xuất được từ trang (không giới hạn)"""
+    if source.get("source_type") == "feed":
+        return len(parse_articles_from_feed(body, page_url=source["url"], max_articles=10_000))
+    return len(parse_articles_from_html(
+        html=body,
+        page_url=source["url"],
+        article_container_selector=source["article_container_selector"],
+        title_selector=source["title_selector"],
+        link_selector=source["link_selector"],
+        summary_selector=source.get("summary_selector"),
+        date_selector=source.get("date_selector"),
+        max_articles=10_000,
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ghi corpus trang danh sách cho benchmark")
+    parser.add_argument("--synthetic", action="store_true", help="Sinh trang giả lập thay vì tải trang thật")
+    parser.add_argument("--output", default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    logging.getLogger("app.services.generic_crawler").setLevel(logging.WARNING)
+    logging.getLogger("app.services.feed_parser").setLevel(logging.WARNING)
+    os.makedirs(args.output, exist_ok=True)
+
+    manifest = {}
+    for seed, source in enumerate(sample_sources):
+        url = source["url"]
+        if url in manifest:
+            continue
+        is_feed = source.get("source_type") == "feed"
+
+        if args.synthetic:
+            section = url.rstrip("/").rsplit("/", 1)[-1]
+            page = build_feed(seed, section=section) if is_feed else build_listing_page(seed, section=section)
+            body = page.encode("utf-8")
+            content_type = "application/rss+xml; charset=utf-8" if is_feed else "text/html; charset=utf-8"
+        else:
+            try:
+                response = requests.get(url, headers=DEFAULT_HEADERS, timeout=30)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                print(f"❌ Không tải được {url}: {e}")
+                continue
+            body = response.content
+            content_type = response.headers.get("Content-Type", "text/html; charset=utf-8")
+
+        file_name = fixture_name(url)
+        with gzip.open(os.path.join(args.output, file_name), "wb", compresslevel=9) as f:
+            f.write(body)
+
+        manifest[url] = {
+            "file": file_name,
+            "source_name": source["name"],
+            "content_type": content_type,
+            "etag": '"' + hashlib.md5(body).hexdigest() + '"',
+            "size_bytes": len(body),
+            "expected_articles": count_articles(source, body),
+            "synthetic": args.synthetic,
+        }
+        print(f"✅ {source['name']}: {len(body) / 1024:.0f} KB, {manifest[url]['expected_articles']} bài")
+
+    with open(os.path.join(args.output, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"\n📁 Đã lưu {len(manifest)} trang vào {args.output}")
+
+
+if __name__ == "__main__":
+    main()
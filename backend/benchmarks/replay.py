@@ -0,0 +1,59 @@
+"""
+Corpus trang đã lưu (benchmarks/fixtures) và transport httpx phát lại chúng,
+để chạy crawl engine hoàn toàn offline.
+"""
+import asyncio
+import gzip
+import json
+import os
+from typing import Dict, Optional
+
+import httpx
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+MANIFEST_FILE = "manifest.json"
+
+
+def load_manifest(fixtures_dir: str = FIXTURES_DIR) -> Dict[str, Dict]:
+    """Đọc manifest: URL nguồn -> thông tin file đã lưu"""
+    with open(os.path.join(fixtures_dir, MANIFEST_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_fixture_body(entry: Dict, fixtures_dir: str = FIXTURES_DIR) -> bytes:
+    """Đọc nội dung trang đã lưu (file .gz được giải nén)"""
+    path = os.path.join(fixtures_dir, entry["file"])
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        return f.read()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Transport trả về trang đã lưu theo URL thay vì gọi mạng.
+    Hỗ trợ ETag/If-None-Match (trả 304) và giả lập độ trễ mạng.
+    """
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, latency_seconds: float = 0.0):
+        self.manifest = load_manifest(fixtures_dir)
+        self.bodies = {url: load_fixture_body(entry, fixtures_dir) for url, entry in self.manifest.items()}
+        self.latency_seconds = latency_seconds
+        self.request_count = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.request_count += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+
+        url = str(request.url)
+        entry: Optional[Dict] = self.manifest.get(url)
+        if entry is None:
+            return httpx.Response(404, request=request)
+
+        headers = {"Content-Type": entry.get("content_type", "text/html; charset=utf-8")}
+        if entry.get("etag"):
+            headers["ETag"] = entry["etag"]
+            if request.headers.get("If-None-Match") == entry["etag"]:
+                return httpx.Response(304, headers=headers, request=request)
+
+        return httpx.Response(200, headers=headers, content=self.bodies[url], request=request)
@@ -0,0 +1,74 @@
+"""
+Sinh trang danh sách giả lập theo cấu trúc VnExpress (.item-news, h3 a, .description, .time)
+để benchmark khi chưa có trang thật được lưu lại.
+"""
+import random
+
+_WORDS = (
+    "ngân hàng lãi suất chứng khoán cổ phiếu doanh nghiệp xuất khẩu tỷ giá vàng "
+    "đầu tư bất động sản lợi nhuận quý tăng trưởng kinh tế thị trường giá dầu "
+    "Vietcombank VinGroup FPT Hòa Phát Masan thuế nhập khẩu trái phiếu"
+).split()
+
+
+def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize()
+
+
+def build_listing_page(seed: int = 0, n_items: int = 40, section: str = "kinh-doanh") -> str:
+    """Tạo HTML trang danh sách với header, menu, các bài viết, script và footer"""
+    rng = random.Random(seed)
+    parts = [
+        "<!DOCTYPE html><html lang='vi'><head><meta charset='utf-8'>",
+        f"<title>{section} - VnExpress</title>",
+        "<script>window.dataLayer = window.dataLayer || [];" + "var x = 1;" * 200 + "</script>",
+        "<style>" + ".a{color:red}" * 300 + "</style></head><body>",
+        "<header class='header'><nav class='main-nav'><ul>",
+    ]
+    parts.extend(f"<li><a href='/muc-{i}'>{_sentence(rng, 1, 2)}</a></li>" for i in range(40))
+    parts.append("</ul></nav></header><section class='section'><div class='container'>")
+
+    for i in range(n_items):
+        article_id = 4_800_000 + seed * 1000 + i
+        tag = "h2" if i == 0 else "h3"
+        parts.append(
+            f"<article class='item-news item-news-common thumb-left' data-offset='{i}'>"
+            f"<div class='thumb-art'><a href='https://vnexpress.net/bai-{article_id}.html' class='thumb thumb-5x3'>"
+            f"<picture><img src='https://i1-vnexpress.vnecdn.net/{article_id}.jpg' alt=''></picture></a></div>"
+            f"<{tag} class='title-news'><a data-medium='Item-{i}' href='https://vnexpress.net/bai-{article_id}.html' "
+            f"title='{_sentence(rng, 6, 12)}'>{_sentence(rng, 6, 14)}</a></{tag}>"
+            f"<p class='description'><a href='https://vnexpress.net/bai-{article_id}.html'>{_sentence(rng, 20, 40)}</a>"
+            f"<span class='meta-news'><a class='count_cmt' href='#box_comment'><span class='font_icon'>{i}</span></a></span></p>"
+            f"<span class='time'>{rng.randint(1, 23)} giờ trước</span>"
+            "</article>"
+        )
+        if i % 10 == 9:
+            parts.append("<div class='banner-ads'><script>googletag.cmd.push(function(){});</script></div>")
+
+    parts.append("</div></section><footer class='footer'>")
+    parts.extend(f"<p>{_sentence(rng, 10, 20)}</p>" for _ in range(20))
+    parts.append("</footer></body></html>")
+    return "".join(parts)
+
+
+def build_feed(seed: int = 0, n_items: int = 40, section: str = "kinh-doanh") -> str:
+    """Tạo feed RSS 2.0 giả lập theo định dạng RSS của VnExpress (mô tả dạng CDATA có HTML)"""
+    rng = random.Random(seed)
+    parts = [
+        "<?xml version='1.0' encoding='UTF-8'?><rss version='2.0'><channel>",
+        f"<title>{section} - VnExpress RSS</title><link>https://vnexpress.net/{section}</link>",
+        "<description>VnExpress RSS</description>",
+    ]
+    for i in range(n_items):
+        article_id = 4_900_000 + seed * 1000 + i
+        url = f"https://vnexpress.net/bai-{article_id}.html"
+        parts.append(
+            f"<item><title>{_sentence(rng, 6, 14)}</title>"
+            f"<description><![CDATA[<a href=\"{url}\"><img src=\"https://i1-vnexpress.vnecdn.net/{article_id}.jpg\"></a>"
+            f"</br>{_sentence(rng, 20, 40)}]]></description>"
+            f"<pubDate>Sat, 18 Oct 2026 {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00 +0700</pubDate>"
+            f"<link>{url}</link><guid>{url}</guid></item>"
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts)
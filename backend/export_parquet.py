@@ -0,0 +1,61 @@
+"""
+Xuất articles, ai_analysis và company_metrics ra Parquet (chia partition theo ngày) để phân tích.
+
+    python export_parquet.py                                  # xuất thêm các dòng mới vào ./exports
+    python export_parquet.py --output /data/news --datasets ai_analysis,company_metrics
+    python export_parquet.py --full                           # xóa dữ liệu đã xuất và xuất lại từ đầu
+
+Mỗi lần chạy chỉ xuất các dòng có id lớn hơn lần trước (ghi trong <output>/_export_state.json),
+thêm file mới vào <output>/<dataset>/date=YYYY-MM-DD/. Đọc lại bằng:
+
+    pyarrow.dataset.dataset("exports/articles", format="parquet", partitioning="hive")
+    pandas.read_parquet("exports/ai_analysis")
+
+Cần cài pyarrow: pip install pyarrow
+"""
+import argparse
+import os
+import sys
+
+# Add backend directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from app.database import SessionLocal, init_db
+from app.services import parquet_export
+
+def main():
+    parser = argparse.ArgumentParser(description="Xuất dữ liệu ra Parquet theo partition ngày, chạy tăng dần")
+    parser.add_argument("--output", default=os.getenv("PARQUET_EXPORT_DIR", "exports"), help="Thư mục xuất")
+    parser.add_argument("--datasets", default=",".join(parquet_export.DATASETS), help="Danh sách dataset, cách nhau bởi dấu phẩy")
+    parser.add_argument("--full", action="store_true", help="Xóa dữ liệu đã xuất và xuất lại toàn bộ")
+    parser.add_argument("--batch-size", type=int, default=parquet_export.PARQUET_EXPORT_BATCH_SIZE, help="Số dòng đọc mỗi lô")
+    args = parser.parse_args()
+
+    if parquet_export.pa is None:
+        print("❌ Cần cài đặt: pip install pyarrow")
+        sys.exit(1)
+
+    # Import tất cả models để init_db tạo đủ bảng
+    from app.models import article_model, crawl_source_model, watchlist_model, ai_analysis_model, company_model, job_model, leader_lease_model, article_counter_model, data_version_model
+    init_db()
+
+    datasets = [name.strip() for name in args.datasets.split(",") if name.strip()]
+    print(f"📦 Xuất {', '.join(datasets)} -> {os.path.abspath(args.output)}" + (" (toàn bộ)" if args.full else ""))
+    with SessionLocal() as db:
+        try:
+            results = parquet_export.run_export(
+                db, args.output, datasets=datasets, full=args.full, batch_size=args.batch_size
+            )
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    for result in results:
+        print(
+            f"   ✅ {result['dataset']}: {result['rows']} dòng mới, {result['files']} file, "
+            f"id cuối {result['last_id']}, {result['seconds']}s"
+        )
+
+if __name__ == "__main__":
+    main()
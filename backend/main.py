@@ -1,14 +1,20 @@
 import asyncio
 import logging
-import threading
 import os
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app import database
-from app.api.endpoints import article_endpoints, crawl_source_endpoints, watchlist_endpoints, ai_analysis_endpoints, company_endpoints
-from app.scheduler_script import main as start_scheduler
+from app.api.endpoints import article_endpoints, crawl_source_endpoints, watchlist_endpoints, ai_analysis_endpoints, company_endpoints, job_endpoints, scheduler_endpoints, export_endpoints
+from app.crud import article_crud
+from app.scheduler_script import bootstrap_scheduler, register_pipeline_jobs
+from app.services.crawl_engine import shutdown_parse_pool
+from app.services.job_queue import ANALYZE_ARTICLE_JOB, NOTIFY_ARTICLE_JOB, job_worker_pool
+from app.services.pipeline_scheduler import pipeline_scheduler
+from app.services.leader_election import scheduler_leader
+from app.services.dedup_cache import article_dedup_cache
+from app.services.near_duplicate import near_duplicate_index
 
 # Cấu hình logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -48,7 +54,7 @@ app.add_middleware(
         "User-Agent",
         "Cache-Control",
     ],
-    expose_headers=["*"],
+    expose_headers=["*", "X-Next-Cursor", "X-Cache", "ETag"],
     max_age=86400,  # Cache preflight cho 24 hours
 )
 
@@ -118,12 +124,30 @@ async def startup_event():
     
     try:
         # Import tất cả models
-        from app.models import article_model, crawl_source_model, watchlist_model, ai_analysis_model, company_model
+        from app.models import article_model, crawl_source_model, watchlist_model, ai_analysis_model, company_model, job_model, leader_lease_model, article_counter_model, data_version_model
         database.init_db()
         print("✅ Database đã được khởi tạo!")
         logger.info("Database initialized successfully")
         
-        threading.Thread(target=start_scheduler, daemon=True).start()
+        # Nạp URL/content hash đã biết vào cache kiểm tra trùng, SimHash bài gốc vào index tin gần giống
+        with database.SessionLocal() as db:
+            article_dedup_cache.warm(db)
+            near_duplicate_index.warm(db)
+        
+        # Worker xử lý hàng đợi phân tích AI (job dở dang từ lần chạy trước được nhận lại)
+        job_worker_pool.register(ANALYZE_ARTICLE_JOB, article_crud.process_analyze_article_job)
+        job_worker_pool.register(NOTIFY_ARTICLE_JOB, article_crud.process_notify_article_job)
+        job_worker_pool.start()
+        with database.SessionLocal() as db:
+            article_crud.resume_stalled_articles(db)
+        
+        # Scheduler chạy trên event loop của API: tin tức, metrics, bảo trì là các pipeline độc lập.
+        # Chạy nhiều worker (uvicorn --workers N) thì chỉ process được bầu làm leader chạy scheduler
+        register_pipeline_jobs(pipeline_scheduler)
+        scheduler_leader.start(
+            on_elected=lambda: pipeline_scheduler.start(bootstrap=bootstrap_scheduler),
+            on_demoted=pipeline_scheduler.stop,
+        )
             
     except Exception as e:
         logger.error(f"Startup error: {e}", exc_info=True)
@@ -133,6 +157,10 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Stock News Tracker API...")
+    await scheduler_leader.stop()
+    await pipeline_scheduler.stop()
+    job_worker_pool.stop()
+    shutdown_parse_pool()
     print("👋 Stock News Tracker API đã tắt")
 
 # ✅ SỬA: Include routers với API prefix
@@ -141,6 +169,9 @@ app.include_router(crawl_source_endpoints.router, prefix="/api/v1")
 app.include_router(watchlist_endpoints.router, prefix="/api/v1")
 app.include_router(ai_analysis_endpoints.router, prefix="/api/v1")
 app.include_router(company_endpoints.router, prefix="/api/v1")
+app.include_router(job_endpoints.router, prefix="/api/v1")
+app.include_router(scheduler_endpoints.router, prefix="/api/v1")
+app.include_router(export_endpoints.router, prefix="/api/v1")
 
 # ✅ CẢI THIỆN: Root endpoint
 @app.get("")
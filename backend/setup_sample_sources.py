@@ -85,6 +85,12 @@ sample_sources = [
         "date_selector": ".time",
         "is_active": True
     },
+    {
+        "name": "VnExpress RSS - Kinh doanh",
+        "url": "https://vnexpress.net/rss/kinh-doanh.rss",
+        "source_type": "feed",
+        "is_active": True
+    },
     # {
     #     "name": "VnExpress - Trang chủ",
     #     "url": "https://vnexpress.net",
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Session trên database SQLite tạm, đã chạy init_db (bảng, FTS, trigger)"""
+    # Import tất cả models để init_db tạo đủ bảng
+    from app.models import article_model, crawl_source_model, watchlist_model, ai_analysis_model, company_model, job_model, leader_lease_model, article_counter_model, data_version_model
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    monkeypatch.setattr(database, "engine", engine)
+    database.init_db()
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
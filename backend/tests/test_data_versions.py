@@ -0,0 +1,54 @@
+from app.crud import article_state_crud, data_version_crud
+from app.models.ai_analysis_model import ArticleAIAnalysis
+from app.models.article_model import Article
+from app.services.response_cache import data_etag
+
+
+def _etag(db, tables=("articles", "ai_analysis")):
+    return data_etag(data_version_crud.get_data_fingerprint(db, tables))
+
+
+def _add_article(db, title="Tin mới"):
+    article = Article(title=title, url=f"https://example.com/{title}", source_url="https://example.com")
+    db.add(article)
+    db.commit()
+    db.refresh(article)
+    return article
+
+
+def test_etag_unchanged_across_lease_cycle(db):
+    article = _add_article(db)
+    updated_at = article.updated_at
+    etag = _etag(db)
+
+    assert article_state_crud.acquire_article_lease(db, article.id, "analyze", "worker-1", 30)
+    assert _etag(db) == etag
+    article_state_crud.release_article_lease(db, article.id, "worker-1")
+    assert _etag(db) == etag
+
+    assert article_state_crud.acquire_article_lease(db, article.id, "analyze", "worker-1", 30)
+    assert article_state_crud.advance_article_state(db, article.id, "analyze", "worker-1")
+    db.commit()
+    assert _etag(db) == etag
+
+    db.refresh(article)
+    assert article.processing_state == article_state_crud.STATE_ANALYZED
+    assert article.updated_at == updated_at
+
+
+def test_etag_changes_when_displayed_content_changes(db):
+    article = _add_article(db)
+    etag = _etag(db)
+
+    article.title = "Tiêu đề đã sửa"
+    db.commit()
+    etag_after_title = _etag(db)
+    assert etag_after_title != etag
+
+    db.add(ArticleAIAnalysis(article_id=article.id, summary="Tóm tắt", category="Kinh tế"))
+    db.commit()
+    etag_after_analysis = _etag(db)
+    assert etag_after_analysis != etag_after_title
+
+    _add_article(db, "Tin thứ hai")
+    assert _etag(db) != etag_after_analysis
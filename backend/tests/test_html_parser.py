@@ -0,0 +1,32 @@
+import pytest
+
+from app.services import html_parser
+
+pytestmark = pytest.mark.skipif(
+    "lxml" not in html_parser.available_backends(), reason="Cần lxml + cssselect"
+)
+
+NESTED_MARKUP = [
+    "<p>A<b>B<i>C</i>D</b>E</p>",
+    "<a><span>Giá <b>vàng</b></span> hôm nay</a>",
+    "<div><h3><a href='/x'>Lãi suất <em>tăng</em> <strong>mạnh</strong></a></h3> cuối tuần</div>",
+    "<p>Trước<script>var x = 1;</script>sau<style>p {}</style>hết<!-- ghi chú -->.</p>",
+    "<p>  <span> </span>Khoảng <br>trắng  </p>",
+]
+
+
+@pytest.mark.parametrize("markup", NESTED_MARKUP)
+def test_get_text_matches_bs4_on_nested_markup(markup):
+    texts = {}
+    for name in ("bs4", "lxml"):
+        backend = html_parser.get_parser_backend(name)
+        document = backend.parse_document(f"<html><body><div id='root'>{markup}</div></body></html>")
+        node = backend.select_first(document, backend.compile("#root"))
+        texts[name] = backend.get_text(node)
+    assert texts["lxml"] == texts["bs4"]
+
+
+def test_get_text_keeps_document_order():
+    backend = html_parser.get_parser_backend("lxml")
+    document = backend.parse_document("<html><body><p>A<b>B<i>C</i>D</b>E</p></body></html>")
+    assert backend.get_text(backend.select_first(document, backend.compile("p"))) == "ABCDE"
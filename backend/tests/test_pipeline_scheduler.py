@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+
+from app.services.pipeline_scheduler import PipelineScheduler
+
+
+def test_stop_waits_for_running_pipeline_thread():
+    scheduler = PipelineScheduler()
+    steps = []
+    finished = threading.Event()
+
+    def pipeline():
+        # Giống crawl: kiểm tra cờ dừng giữa các nguồn
+        for source in range(100):
+            if scheduler.stop_requested:
+                break
+            steps.append(source)
+            time.sleep(0.02)
+        finished.set()
+
+    job = scheduler.add_job("news", pipeline, interval_seconds=3600)
+
+    async def scenario():
+        scheduler.start()
+        while not steps:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        # stop() chỉ trả về khi thread đã dừng hẳn, không còn ghi nhận là đang chạy
+        assert finished.is_set()
+        assert not job.running
+        assert job.run_count == 1
+        assert len(steps) < 100
+
+        # Bầu lại: chạy được ngay, không bị bỏ qua vì lần chạy cũ
+        steps.clear()
+        finished.clear()
+        scheduler.start()
+        while not finished.is_set() and len(steps) < 3:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        assert job.skipped_count == 0
+        assert job.run_count == 2
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=10))
+
+
+def test_failed_pipeline_is_recorded():
+    scheduler = PipelineScheduler()
+
+    def pipeline():
+        raise RuntimeError("hỏng")
+
+    job = scheduler.add_job("metrics", pipeline, interval_seconds=3600)
+    assert asyncio.run(scheduler.run_job("metrics"))
+    assert job.error_count == 1
+    assert job.last_error == "RuntimeError: hỏng"
+    assert not job.running
@@ -0,0 +1,42 @@
+import pytest
+
+from app.services import rate_limiter
+from app.services.rate_limiter import TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Đồng hồ giả cho time.monotonic trong rate_limiter"""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_burst_then_spaced_by_rate(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    delays = [bucket.reserve() for _ in range(5)]
+    assert delays == pytest.approx([0.0, 0.0, 0.0, 0.5, 1.0])
+
+
+def test_requests_after_block_are_spaced_by_rate(clock):
+    bucket = TokenBucket(rate=1.0, burst=3)
+    bucket.block_for(30)
+    delays = [bucket.reserve() for _ in range(30)]
+    assert delays[0] >= 30
+    gaps = [later - earlier for earlier, later in zip(delays, delays[1:])]
+    assert gaps == pytest.approx([1.0] * 29)
+
+
+def test_tokens_do_not_refill_during_block(clock):
+    bucket = TokenBucket(rate=1.0, burst=3)
+    bucket.block_for(30)
+    clock[0] += 20  # Vẫn đang bị chặn: không được tích token trong 20 giây này
+    assert bucket.reserve() == pytest.approx(11.0)
+    assert bucket.reserve() == pytest.approx(12.0)
+
+
+def test_bucket_recovers_after_block(clock):
+    bucket = TokenBucket(rate=1.0, burst=3)
+    bucket.block_for(10)
+    clock[0] += 10 + 5  # Hết chặn 5 giây: hồi 3 token (tối đa burst)
+    assert [bucket.reserve() for _ in range(4)] == pytest.approx([0.0, 0.0, 0.0, 1.0])